@@ -0,0 +1 @@
+"""Benchmark and load-test scripts for cowsay-mcp; each prints machine-readable JSON."""
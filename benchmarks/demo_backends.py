@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shlex
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any, Awaitable, Callable, Sequence
+
+from .http_load import spawn_server
+from .stats import latency_summary
+
+"""Round-trip latency of the demo's tool-calling backends against the old process-per-call hop."""
+
+LEGACY_COMMAND = f"{shlex.quote(sys.executable)} -m cowsay_mcp.main"
+
+
+def _time_calls(call: Callable[[], Any], calls: int) -> dict[str, Any]:
+    started = time.perf_counter()
+    call()
+    first = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return {"first_call_ms": round(first * 1000, 3), **latency_summary(latencies)}
+
+
+async def _time_async_calls(
+    call: Callable[[], Awaitable[Any]], calls: int
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    await call()
+    first = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    return {"first_call_ms": round(first * 1000, 3), **latency_summary(latencies)}
+
+
+def bench_backend(backend: str, calls: int, url: str | None = None) -> dict[str, Any]:
+    """Open one client and time `calls` tool calls over the same connection."""
+
+    from demo.client import open_client
+
+    args = {"text": "Hello from the demo"}
+
+    async def run() -> dict[str, Any]:
+        async with open_client(backend, url=url) as client:
+            return await _time_async_calls(
+                lambda: client.call_tool("cowsay-mcp", args), calls
+            )
+
+    return asyncio.run(run())
+
+
+def bench_process_per_call(calls: int, command: str) -> dict[str, Any]:
+    """The previous demo behaviour: start a new process for every tool call."""
+
+    argv = shlex.split(command)
+    payload = json.dumps(
+        {"tool": "cowsay-mcp", "args": {"text": "Hello from the demo"}}
+    )
+
+    def call() -> None:
+        proc = subprocess.run(argv, input=payload, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip())
+
+    return _time_calls(call, calls)
+
+
+def run(
+    calls: int, backends: Sequence[str], legacy_command: str
+) -> dict[str, dict[str, Any]]:
+    report: dict[str, dict[str, Any]] = {}
+    with ExitStack() as stack:
+        for backend in backends:
+            if backend == "process_per_call":
+                report[backend] = bench_process_per_call(
+                    max(1, calls // 10), legacy_command
+                )
+                continue
+            url = (
+                stack.enter_context(spawn_server("http")) if backend == "http" else None
+            )
+            report[backend] = bench_backend(backend, calls, url)
+    return report
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    choices = ("inprocess", "stdio", "http", "process_per_call")
+    parser = argparse.ArgumentParser(
+        description="Compare demo tool-call backends on round-trip latency."
+    )
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=choices,
+        help="backend to measure (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--legacy-command",
+        default=LEGACY_COMMAND,
+        help='one-shot command for process_per_call, e.g. "uv run python -m cowsay_mcp.main"',
+    )
+    args = parser.parse_args(argv)
+    report = run(args.calls, args.backend or choices, args.legacy_command)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
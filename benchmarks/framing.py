@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import time
+from typing import Any, Sequence
+
+from .suite import QUICK, Budget, measure
+
+"""Worker pipe protocols: parse cost of large responses and pipelined call throughput."""
+
+_LINE = "The quick brown fox jumps over the lazy cow."
+
+
+def _response(size: int) -> dict[str, Any]:
+    from cowsay_mcp.tools import run_cowsay
+
+    lines = max(1, size // (len(_LINE) + 1))
+    return {"id": 1, "result": run_cowsay("\n".join([_LINE] * lines))}
+
+
+def bench_parse(sizes: Sequence[int], budget: Budget) -> list[dict[str, Any]]:
+    """Time reading one response of roughly each size in bytes, per framing."""
+
+    from cowsay_mcp.framing import codec_functions, frame, read_frame
+
+    codecs = ["json"]
+    try:
+        codec_functions("msgpack")
+    except RuntimeError:
+        pass
+    else:
+        codecs.append("msgpack")
+
+    results: list[dict[str, Any]] = []
+    for size in sizes:
+        response = _response(size)
+        line = (json.dumps(response) + "\n").encode()
+
+        def lines(data: bytes = line) -> None:
+            json.loads(io.BytesIO(data).readline())
+
+        cases = {"lines": (lines, len(line))}
+        for codec in codecs:
+            encode, decode = codec_functions(codec)
+            data = frame(encode(response))
+
+            def framed(data: bytes = data, decode: Any = decode) -> None:
+                decode(read_frame(io.BytesIO(data)))
+
+            cases[codec] = (framed, len(data))
+        for framing, (fn, wire_bytes) in cases.items():
+            results.append(
+                {
+                    "framing": framing,
+                    "case": f"{size // 1024}_kb",
+                    "wire_bytes": wire_bytes,
+                    **measure(fn, budget),
+                }
+            )
+    return results
+
+
+def bench_pipelined(framing: str, calls: int) -> dict[str, Any]:
+    """Issue `calls` tool calls at once over one worker and time until all return."""
+
+    from demo.client import open_client
+
+    args = {"text": _LINE}
+
+    async def run() -> dict[str, Any]:
+        async with open_client("stdio", framing=framing) as client:
+            await client.connect()
+            await client.call_tool("cowsay-mcp", args)
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(client.call_tool("cowsay-mcp", args) for _ in range(calls))
+            )
+            elapsed = time.perf_counter() - started
+        return {
+            "calls": calls,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "calls_per_s": round(calls / elapsed, 2) if elapsed else 0.0,
+        }
+
+    return asyncio.run(run())
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the worker's JSON-lines and length-prefixed protocols."
+    )
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument(
+        "--size",
+        type=int,
+        action="append",
+        help="response size in bytes to parse (repeatable; default: 1 KB and 1 MB)",
+    )
+    parser.add_argument("--quick", action="store_true", help="tiny timing budget")
+    args = parser.parse_args(argv)
+    budget = QUICK if args.quick else Budget()
+    report = {
+        "parse": bench_parse(args.size or (1024, 1024 * 1024), budget),
+        "pipelined": {
+            framing: bench_pipelined(framing, args.calls)
+            for framing in ("lines", "json")
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+from .stats import summarise
+
+"""Drive a cowsay-mcp HTTP/SSE server with many concurrent MCP clients and report latency."""
+
+
+async def _client_loop(
+    url: str, requests: int, text: str, latencies: list[float]
+) -> int:
+    from fastmcp import Client
+
+    errors = 0
+    async with Client(url) as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                await client.call_tool("cowsay-mcp", {"text": text})
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    return errors
+
+
+async def run_load(
+    url: str, *, clients: int, requests: int, text: str
+) -> dict[str, float]:
+    """Run `clients` concurrent sessions issuing `requests` tool calls each."""
+
+    latencies: list[float] = []
+    started = time.perf_counter()
+    errors = await asyncio.gather(
+        *(_client_loop(url, requests, text, latencies) for _ in range(clients))
+    )
+    return summarise(latencies, sum(errors), time.perf_counter() - started)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"server did not listen on {host}:{port} within {timeout}s")
+
+
+@contextmanager
+def spawn_server(
+    transport: str = "http", extra_args: Sequence[str] = ()
+) -> Iterator[str]:
+    """Start `python -m cowsay_mcp.main` on a free port and yield its URL."""
+
+    port = free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "cowsay_mcp.main",
+            "--transport",
+            transport,
+            "--port",
+            str(port),
+            *extra_args,
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port("127.0.0.1", port)
+        path = "sse" if transport == "sse" else "mcp"
+        yield f"http://127.0.0.1:{port}/{path}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Load-test a cowsay-mcp HTTP/SSE server and report latency as JSON."
+    )
+    parser.add_argument("--url", help="server endpoint; omit to spawn a local server")
+    parser.add_argument("--transport", choices=("http", "sse"), default="http")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="calls per client")
+    parser.add_argument("--text", default="Hello from the load test")
+    args = parser.parse_args(argv)
+
+    def run(url: str) -> dict[str, float]:
+        return asyncio.run(
+            run_load(url, clients=args.clients, requests=args.requests, text=args.text)
+        )
+
+    if args.url:
+        report = {"url": args.url, **run(args.url)}
+    else:
+        with spawn_server(args.transport) as url:
+            report = {"url": url, **run(url)}
+    report.update(clients=args.clients, transport=args.transport)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Sequence
+
+from .stats import latency_summary
+
+"""Microbenchmark of the per-call cost of the tool metrics middleware."""
+
+
+def bench_record(iterations: int) -> float:
+    """Nanoseconds per MetricsRegistry.record call."""
+
+    from cowsay_mcp.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    started = time.perf_counter_ns()
+    for i in range(iterations):
+        registry.record("cowsay-mcp", 150_000 + i % 5000, bytes_in=40, bytes_out=300)
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def bench_middleware(iterations: int) -> dict[str, float]:
+    """Nanoseconds per call with and without the middleware around a no-op tool."""
+
+    from fastmcp.tools.tool import ToolResult
+
+    from cowsay_mcp.metrics import MetricsRegistry
+    from cowsay_mcp.server import ToolMetricsMiddleware
+
+    result = ToolResult(content="x" * 300)
+    context = SimpleNamespace(
+        message=SimpleNamespace(name="cowsay-mcp", arguments={"text": "x" * 40})
+    )
+    middleware = ToolMetricsMiddleware(MetricsRegistry())
+
+    async def call_next(ctx: Any) -> ToolResult:
+        return result
+
+    async def run(instrumented: bool) -> float:
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            if instrumented:
+                await middleware.on_call_tool(context, call_next)
+            else:
+                await call_next(context)
+        return (time.perf_counter_ns() - started) / iterations
+
+    bare = asyncio.run(run(False))
+    instrumented = asyncio.run(run(True))
+    return {
+        "bare_ns": round(bare, 1),
+        "instrumented_ns": round(instrumented, 1),
+        "overhead_ns": round(instrumented - bare, 1),
+    }
+
+
+def bench_round_trip(calls: int) -> dict[str, Any]:
+    """In-memory FastMCP call_tool latency with the middleware on and off."""
+
+    from fastmcp import Client
+
+    from cowsay_mcp.server import ToolMetricsMiddleware, server
+
+    async def run() -> list[float]:
+        timings = []
+        async with Client(server) as client:
+            for i in range(calls):
+                started = time.perf_counter()
+                await client.call_tool("cowsay-mcp", {"text": f"hello {i % 16}"})
+                timings.append(time.perf_counter() - started)
+        return timings
+
+    installed = [m for m in server.middleware if isinstance(m, ToolMetricsMiddleware)]
+    for middleware in installed:
+        server.middleware.remove(middleware)
+    try:
+        without = latency_summary(asyncio.run(run()))
+    finally:
+        server.middleware.extend(installed)
+    with_metrics = latency_summary(asyncio.run(run()))
+    return {"without_metrics": without, "with_metrics": with_metrics}
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the overhead of the tool metrics middleware."
+    )
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    report = {
+        "record_ns": round(bench_record(args.iterations), 1),
+        "middleware": bench_middleware(args.iterations),
+        "round_trip": bench_round_trip(args.calls),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
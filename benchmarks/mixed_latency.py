@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Sequence
+
+from cowsay_mcp import tools
+from cowsay_mcp.cache import RenderCache
+from cowsay_mcp.pool import RenderPool
+
+from .stats import latency_summary
+
+"""Compare tail latency of small renders when large renders run inline versus on the pool."""
+
+
+def build_traffic(
+    small: int, large: int, large_size: int, seed: int = 7
+) -> list[tuple[str, str]]:
+    """Return a shuffled list of ("small" | "large", text) requests with unique texts."""
+
+    rng = random.Random(seed)
+    requests = [("small", f"status update #{i}: all good") for i in range(small)]
+    line = "A multi-kilobyte poem keeps the renderer busy for a while. "
+    requests += [
+        ("large", f"{i} " + line * (large_size // len(line) + 1)) for i in range(large)
+    ]
+    rng.shuffle(requests)
+    return requests
+
+
+async def _replay(traffic: list[tuple[str, str]], interval: float) -> dict[str, list]:
+    latencies: dict[str, list[float]] = {"small": [], "large": []}
+
+    async def timed(kind: str, text: str, arrived: float) -> None:
+        await tools.run_cowsay_async(text)
+        latencies[kind].append(time.perf_counter() - arrived)
+
+    # Open-loop arrivals: each request has a scheduled arrival time, so time
+    # spent waiting behind a blocked event loop counts towards its latency.
+    tasks = []
+    start = time.perf_counter()
+    for index, (kind, text) in enumerate(traffic):
+        arrival = start + index * interval
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        tasks.append(asyncio.create_task(timed(kind, text, arrival)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def run_mode(
+    traffic: list[tuple[str, str]], *, workers: int, threshold: int, interval: float
+) -> dict[str, dict[str, float]]:
+    """Replay traffic through run_cowsay_async with the given pool configuration."""
+
+    pool = RenderPool(workers, threshold)
+    tools.render_cache = RenderCache(max_entries=0)
+    tools._render_pool = pool
+    try:
+        if workers:
+            # start workers before measuring, as a long-running server would have
+            asyncio.run(pool.render("warm up"))
+        latencies = asyncio.run(_replay(traffic, interval))
+    finally:
+        pool.shutdown()
+        tools._render_pool = None
+    return {kind: latency_summary(values) for kind, values in latencies.items()}
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark inline versus pooled rendering under mixed traffic."
+    )
+    parser.add_argument("--small", type=int, default=400)
+    parser.add_argument("--large", type=int, default=8)
+    parser.add_argument("--large-size", type=int, default=512 * 1024)
+    parser.add_argument("--workers", type=int, default=tools.settings.pool_max_workers)
+    parser.add_argument(
+        "--threshold", type=int, default=tools.settings.offload_threshold
+    )
+    parser.add_argument(
+        "--interval-ms", type=float, default=0.5, help="gap between request arrivals"
+    )
+    args = parser.parse_args(argv)
+
+    traffic = build_traffic(args.small, args.large, args.large_size)
+    interval = args.interval_ms / 1000
+    report = {
+        "small_requests": args.small,
+        "large_requests": args.large,
+        "large_size": args.large_size,
+        "inline": run_mode(traffic, workers=0, threshold=0, interval=interval),
+        "offloaded": run_mode(
+            traffic, workers=args.workers, threshold=args.threshold, interval=interval
+        ),
+    }
+    report["offloaded"]["workers"] = args.workers
+    report["offloaded"]["threshold"] = args.threshold
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+"""Shared latency statistics for the benchmark scripts."""
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+
+    if not samples:
+        return 0.0
+    rank = min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def latency_summary(latencies: Sequence[float]) -> dict[str, float]:
+    """Summarise latencies given in seconds as rounded milliseconds."""
+
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def summarise(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    """Throughput and latency report for a load run."""
+
+    summary = latency_summary(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": summary["p50_ms"],
+        "p99_ms": summary["p99_ms"],
+        "max_ms": summary["max_ms"],
+    }
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Any, Callable, Sequence
+from unittest.mock import patch
+
+from .stats import percentile
+
+"""Benchmark suite covering the renderer, the stdin entry point, FastMCP and the demo's subprocess hop."""
+
+SCHEMA_VERSION = 1
+DEFAULT_DEMO_COMMAND = f"{shlex.quote(sys.executable)} -m cowsay_mcp.main"
+
+
+def _text_cases() -> dict[str, str]:
+    line = "The quick brown fox jumps over the lazy cow."
+    return {
+        "empty": "",
+        "1_line": line,
+        "100_lines": "\n".join(f"{i:03d} {line}" for i in range(100)),
+        "1_mb": (line + "\n") * (1024 * 1024 // (len(line) + 1)),
+        "unicode_emoji": "\n".join(
+            "🐄🌸 牛が言う：こんにちは！ 🚀✨ 한국어 텍스트 👩‍👩‍👧 ❤️" for _ in range(50)
+        ),
+    }
+
+
+@dataclass(frozen=True)
+class Budget:
+    """How long each measurement may run."""
+
+    min_time: float = 0.2
+    repeats: int = 5
+    max_number: int = 100_000
+
+
+QUICK = Budget(min_time=0.01, repeats=2, max_number=50)
+
+
+def measure(fn: Callable[[], Any], budget: Budget) -> dict[str, float]:
+    """Time `fn`, timeit-style: calibrate a loop count, then repeat the loop."""
+
+    number = 1
+    while number < budget.max_number:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= budget.min_time / budget.repeats:
+            break
+        number *= 2
+
+    per_call: list[float] = []
+    for _ in range(budget.repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - started) / number)
+
+    return _summary(per_call, loops=number)
+
+
+def _summary(per_call: list[float], loops: int = 1) -> dict[str, float]:
+    """Per-call statistics in microseconds; `loops` calls were timed per sample."""
+
+    ordered = sorted(per_call)
+    return {
+        "loops": loops,
+        "repeats": len(ordered),
+        "min_us": round(ordered[0] * 1e6, 3),
+        "median_us": round(statistics.median(ordered) * 1e6, 3),
+        "p99_us": round(percentile(ordered, 99) * 1e6, 3),
+        "ops_per_s": round(1 / ordered[0], 2) if ordered[0] else 0.0,
+    }
+
+
+def bench_render(budget: Budget) -> list[dict[str, Any]]:
+    """Layer 1: run_cowsay with the cache disabled, plus one warm-cache case."""
+
+    from cowsay_mcp import tools
+    from cowsay_mcp.cache import RenderCache
+
+    results = []
+    with patch.object(tools, "render_cache", RenderCache(max_entries=0)):
+        for case, text in _text_cases().items():
+            stats = measure(lambda text=text: tools.run_cowsay(text), budget)
+            results.append({"layer": "run_cowsay", "case": case, **stats})
+
+    text = _text_cases()["1_line"]
+    with patch.object(tools, "render_cache", RenderCache()):
+        stats = measure(lambda: tools.run_cowsay(text), budget)
+    results.append({"layer": "run_cowsay", "case": "1_line_cached", **stats})
+    return results
+
+
+class _PipeStdin(io.StringIO):
+    def isatty(self) -> bool:
+        return False
+
+
+def bench_stdin(budget: Budget) -> list[dict[str, Any]]:
+    """Layer 2: cowsay_mcp.main.main answering a piped tool call in-process."""
+
+    from cowsay_mcp.main import main
+
+    results = []
+    for case in ("1_line", "100_lines"):
+        payload = json.dumps(
+            {"tool": "cowsay-mcp", "args": {"text": _text_cases()[case]}}
+        )
+
+        def call(payload: str = payload) -> None:
+            with patch.object(sys, "stdin", _PipeStdin(payload)):
+                with redirect_stdout(io.StringIO()):
+                    main([])
+
+        results.append({"layer": "stdin_main", "case": case, **measure(call, budget)})
+    return results
+
+
+def bench_fastmcp(budget: Budget) -> list[dict[str, Any]]:
+    """Layer 3: FastMCP call_tool round trip through an in-memory client session."""
+
+    from fastmcp import Client
+
+    from cowsay_mcp.server import server
+
+    async def run() -> list[dict[str, Any]]:
+        results = []
+        async with Client(server) as client:
+            loop = asyncio.get_running_loop()
+            for case in ("1_line", "100_lines"):
+                args = {"text": _text_cases()[case]}
+                timings: list[float] = []
+                # the event loop is already running, so time each awaited call directly
+                deadline = loop.time() + budget.min_time
+                while len(timings) < budget.repeats or (
+                    loop.time() < deadline and len(timings) < budget.max_number
+                ):
+                    started = time.perf_counter()
+                    await client.call_tool("cowsay-mcp", args)
+                    timings.append(time.perf_counter() - started)
+                results.append(
+                    {"layer": "fastmcp_call_tool", "case": case, **_summary(timings)}
+                )
+        return results
+
+    return asyncio.run(run())
+
+
+def bench_demo_subprocess(budget: Budget, command: str) -> list[dict[str, Any]]:
+    """Layer 4: the demo's one-process-per-call pipe round trip."""
+
+    argv = shlex.split(command)
+    payload = json.dumps({"tool": "cowsay-mcp", "args": {"text": "Hello from demo"}})
+    timings: list[float] = []
+    deadline = time.perf_counter() + budget.min_time
+    while len(timings) < budget.repeats or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        proc = subprocess.run(argv, input=payload, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        if proc.returncode != 0 or "result" not in json.loads(proc.stdout or "{}"):
+            raise RuntimeError(f"demo subprocess failed: {proc.stderr.strip()}")
+    return [{"layer": "demo_subprocess", "case": "1_line", **_summary(timings)}]
+
+
+LAYERS: dict[str, Callable[..., list[dict[str, Any]]]] = {
+    "run_cowsay": bench_render,
+    "stdin_main": bench_stdin,
+    "fastmcp_call_tool": bench_fastmcp,
+    "demo_subprocess": bench_demo_subprocess,
+}
+
+
+def _metadata() -> dict[str, str]:
+    try:
+        version = metadata.version("cowsay-mcp")
+    except metadata.PackageNotFoundError:  # pragma: no cover - source checkout
+        version = "unknown"
+    return {
+        "cowsay_mcp": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_suite(
+    layers: Sequence[str] = tuple(LAYERS),
+    budget: Budget = Budget(),
+    demo_command: str = DEFAULT_DEMO_COMMAND,
+) -> dict[str, Any]:
+    """Run the selected layers and return the JSON-serialisable report."""
+
+    results: list[dict[str, Any]] = []
+    for layer in layers:
+        if layer == "demo_subprocess":
+            results.extend(LAYERS[layer](budget, demo_command))
+        else:
+            results.extend(LAYERS[layer](budget))
+    return {"schema": SCHEMA_VERSION, "metadata": _metadata(), "results": results}
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float
+) -> list[dict[str, Any]]:
+    """Return cases whose median slowed down by more than `tolerance` (a ratio)."""
+
+    previous = {(r["layer"], r["case"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["layer"], result["case"]))
+        if not before or not before["median_us"]:
+            continue
+        ratio = result["median_us"] / before["median_us"]
+        if ratio > tolerance:
+            regressions.append(
+                {
+                    "layer": result["layer"],
+                    "case": result["case"],
+                    "baseline_median_us": before["median_us"],
+                    "median_us": result["median_us"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark every layer of the cowsay-mcp tool path and print JSON."
+    )
+    parser.add_argument(
+        "--layer",
+        action="append",
+        choices=tuple(LAYERS),
+        help="layer to run (repeatable; default: all)",
+    )
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument(
+        "--quick", action="store_true", help="tiny time budget, for smoke tests"
+    )
+    parser.add_argument(
+        "--demo-command",
+        default=DEFAULT_DEMO_COMMAND,
+        help='pipe command for the demo layer, e.g. "uv run python -m cowsay_mcp.main"',
+    )
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="allowed median slowdown ratio when comparing (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        args.layer or tuple(LAYERS),
+        QUICK if args.quick else Budget(),
+        args.demo_command,
+    )
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            report["regressions"] = compare(json.load(handle), report, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    rendered = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(rendered + "\n")
+    print(rendered)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Any, Sequence
+
+"""Throughput of the full tool-calling loop on the scripted CPU backend, no GPU needed."""
+
+
+def bench_loop(
+    backend: str,
+    *,
+    samples: int,
+    batch_size: int,
+    seconds_per_token: float,
+) -> dict[str, Any]:
+    """Run every theme `samples` times through generate → parse → tool → explain."""
+
+    from demo.batch import plan_items, run_batch
+    from demo.client import open_client
+    from demo.llm import load_model
+    from demo.main import fetch_primary_tool
+    from demo.prompting import THEMES
+
+    bundle = load_model(
+        "scripted",
+        backend="scripted",
+        warmup=False,
+        seconds_per_token=seconds_per_token,
+    )
+
+    async def run() -> dict[str, Any]:
+        tool_spec = await fetch_primary_tool()
+        async with open_client(backend) as client:
+            await client.connect()
+            report = await run_batch(
+                bundle,
+                client,
+                tool_spec,
+                plan_items(THEMES, samples),
+                batch_size=batch_size,
+            )
+        return report.summary()
+
+    return asyncio.run(run())
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the demo's tool-calling loop with the scripted LLM backend."
+    )
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        action="append",
+        help="prompts per generation call (repeatable; default: 1 and 8)",
+    )
+    parser.add_argument(
+        "--seconds-per-token",
+        type=float,
+        default=0.0,
+        help="simulated decode time per generated token",
+    )
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=("inprocess", "stdio"),
+        help="tool backend to measure (repeatable; default: both)",
+    )
+    args = parser.parse_args(argv)
+    report = {
+        f"{backend}/batch_{batch_size}": bench_loop(
+            backend,
+            samples=args.samples,
+            batch_size=batch_size,
+            seconds_per_token=args.seconds_per_token,
+        )
+        for backend in args.backend or ("inprocess", "stdio")
+        for batch_size in args.batch_size or (1, 8)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
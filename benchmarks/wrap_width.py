@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+import unicodedata
+from typing import Any, Callable, Sequence
+
+from .suite import QUICK, Budget, measure
+
+"""Compare code-point wrapping with table-driven display-width wrapping on CJK and emoji corpora."""
+
+
+def corpora() -> dict[str, str]:
+    ascii_line = "The quick brown fox jumps over the lazy cow."
+    cjk_line = (
+        "牛が草原でのんびりと歌を歌っています。今日はいい天気ですね、한국어도 조금."
+    )
+    emoji_line = "🐄🌸 moo ✨🚀 👩‍👩‍👧 ❤️ 👍🏽 🇯🇵 1️⃣ 🎉🎉🎉 cows 🐮 say hi 🌈"
+    return {
+        "ascii": "\n".join([ascii_line] * 200),
+        "cjk_heavy": "\n".join([cjk_line] * 200),
+        "emoji_heavy": "\n".join([emoji_line] * 200),
+    }
+
+
+def unicodedata_wrap(text: str, width: int = 49) -> list[str]:
+    """Baseline cell wrapper calling `unicodedata` for every character."""
+
+    wrapped: list[str] = []
+    for raw_line in text.split("\n"):
+        line = raw_line.strip()
+        current: list[str] = []
+        used = 0
+        for char in line:
+            if unicodedata.combining(char) or unicodedata.category(char) == "Cf":
+                cells = 0
+            elif unicodedata.east_asian_width(char) in ("W", "F"):
+                cells = 2
+            else:
+                cells = 1
+            if current and used + cells > width:
+                wrapped.append("".join(current))
+                current, used = [], 0
+            current.append(char)
+            used += cells
+        if current:
+            wrapped.append("".join(current))
+    return wrapped
+
+
+def implementations() -> dict[str, Callable[[str], Any]]:
+    import cowsay
+
+    from cowsay_mcp.render import render, wrap_text
+    from cowsay_mcp.width import wrap_cells
+
+    return {
+        "cowsay_get_output_string": lambda text: cowsay.get_output_string("cow", text),
+        "render_codepoints": render,
+        "render_cells": lambda text: render(text, cells=True),
+        "wrap_codepoints": wrap_text,
+        "wrap_cells": lambda text: wrap_cells(text, 49),
+        "wrap_unicodedata": unicodedata_wrap,
+    }
+
+
+def run(budget: Budget) -> list[dict[str, Any]]:
+    results = []
+    for case, text in corpora().items():
+        for name, fn in implementations().items():
+            stats = measure(lambda fn=fn, text=text: fn(text), budget)
+            results.append({"impl": name, "case": case, "chars": len(text), **stats})
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark display-width wrapping against code-point wrapping."
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="tiny time budget, for smoke tests"
+    )
+    args = parser.parse_args(argv)
+    print(json.dumps(run(QUICK if args.quick else Budget()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from itertools import cycle
+from typing import Any, Callable, Iterator, Protocol, Sequence, Tuple
+
+from .constrained import CompiledToolCall, mlx_logits_processor
+from .models import ModelBundle
+from .prefix_cache import MlxPrefixBackend, PrefixBackend
+
+"""LLM backends for the demo: mlx-lm on Apple Silicon and a scripted CPU backend for anywhere else."""
+
+BACKEND_ENV = "COWSAY_DEMO_LLM_BACKEND"
+DEFAULT_BACKEND = "mlx"
+
+
+class LoadFn(Protocol):
+    def __call__(self, model_id: str, /, **options: object) -> ModelBundle:
+        """Return the loaded model/tokenizer pair."""
+
+
+class GenerateFn(Protocol):
+    def __call__(
+        self, model: object, tokenizer: object, prompt: str, /, **kwargs: object
+    ) -> str:
+        """Produce the assistant response for the supplied prompt."""
+
+
+class BatchGenerateFn(Protocol):
+    def __call__(
+        self,
+        model: object,
+        tokenizer: object,
+        prompts: Sequence[str] | Sequence[Sequence[int]],
+        /,
+        **kwargs: object,
+    ) -> list[str]:
+        """Produce one response per prompt in a single batched pass.
+
+        Prompts arrive as token ids, already tokenized through the prefix
+        cache, when the backend also has a `prefix_backend`.
+        """
+
+
+class StreamGenerateFn(Protocol):
+    def __call__(
+        self, model: object, tokenizer: object, prompt: str, /, **kwargs: object
+    ) -> Iterator[str]:
+        """Yield the response text piece by piece; closing the iterator stops generation."""
+
+
+@dataclass(frozen=True)
+class LLMBackend:
+    """How to load a model and generate text with it.
+
+    `batch_generate`, `stream_generate`, `prefix_backend` and `constrain` are
+    optional capabilities; callers fall back to one `generate` per prompt, to
+    a single chunk, to uncached prompts and to unconstrained output without them.
+    """
+
+    name: str
+    load: LoadFn
+    generate: GenerateFn
+    batch_generate: BatchGenerateFn | None = None
+    stream_generate: StreamGenerateFn | None = None
+    prefix_backend: Callable[[object, object], PrefixBackend] | None = None
+    # Turns a compiled tool-call constraint into generation keyword arguments.
+    constrain: Callable[[CompiledToolCall], dict[str, object]] | None = None
+
+
+_MLX_FUNCS: Tuple[LoadFn, GenerateFn] | None = None
+
+
+def _ensure_mlx_functions() -> Tuple[LoadFn, GenerateFn]:
+    """Locate and cache mlx-lm helpers, surfacing a clear error if unavailable."""
+    global _MLX_FUNCS
+    if _MLX_FUNCS is not None:
+        return _MLX_FUNCS
+
+    try:
+        from mlx_lm import generate as mlx_generate
+        from mlx_lm import load as mlx_load
+    except ImportError as exc:  # pragma: no cover - requires missing dependency
+        raise RuntimeError(
+            "mlx-lm is required for the demo. Install extras via `uv sync --group demo`,"
+            f" or set {BACKEND_ENV}=scripted to run without it."
+        ) from exc
+
+    _MLX_FUNCS = (mlx_load, mlx_generate)
+    return _MLX_FUNCS
+
+
+def _mlx_load(model_id: str, /, **options: object) -> ModelBundle:
+    load_fn, _ = _ensure_mlx_functions()
+    return load_fn(model_id, **options)
+
+
+def _mlx_generate(
+    model: object, tokenizer: object, prompt: str, /, **kwargs: object
+) -> str:
+    _, generate_fn = _ensure_mlx_functions()
+    return generate_fn(model, tokenizer, prompt, **_with_sampler(kwargs))
+
+
+def _with_sampler(kwargs: dict[str, object]) -> dict[str, object]:
+    """Turn a `temperature` keyword into the sampler newer mlx-lm APIs expect."""
+    temperature = kwargs.pop("temperature", None)
+    if temperature is not None:
+        try:
+            from mlx_lm.sample_utils import make_sampler
+        except ImportError:  # pragma: no cover - older mlx-lm without samplers
+            pass
+        else:
+            kwargs["sampler"] = make_sampler(temp=temperature)
+    return kwargs
+
+
+def _mlx_stream_generate(
+    model: object, tokenizer: object, prompt: str | Sequence[int], /, **kwargs: object
+) -> Iterator[str]:
+    from mlx_lm import stream_generate
+
+    for response in stream_generate(model, tokenizer, prompt, **_with_sampler(kwargs)):
+        yield response.text
+
+
+def _mlx_batch_generate() -> BatchGenerateFn | None:
+    try:
+        from mlx_lm import batch_generate
+    except ImportError:
+        return None
+
+    def generate_batch(
+        model: object,
+        tokenizer: Any,
+        prompts: Sequence[str] | Sequence[Sequence[int]],
+        /,
+        **kwargs: object,
+    ) -> list[str]:
+        _with_sampler(kwargs)
+        tokens = [
+            tokenizer.encode(prompt) if isinstance(prompt, str) else list(prompt)
+            for prompt in prompts
+        ]
+        return list(batch_generate(model, tokenizer, tokens, **kwargs).texts)
+
+    return generate_batch
+
+
+def _mlx_constrain(compiled: CompiledToolCall) -> dict[str, object]:
+    return {"logits_processors": [mlx_logits_processor(compiled)]}
+
+
+def mlx_backend() -> LLMBackend:
+    """The mlx-lm backend; mlx itself is imported on first load or generation."""
+
+    return LLMBackend(
+        name="mlx",
+        load=_mlx_load,
+        generate=_mlx_generate,
+        batch_generate=_mlx_batch_generate(),
+        stream_generate=_mlx_stream_generate,
+        constrain=_mlx_constrain,
+        prefix_backend=(
+            (
+                lambda model, tokenizer: MlxPrefixBackend(
+                    model, tokenizer, _mlx_generate, _mlx_stream_generate
+                )
+            )
+            if MlxPrefixBackend.available()
+            else None
+        ),
+    )
+
+
+_TOKEN = re.compile(r"\s+|[^\s]+")
+_TOOL_FORMAT = re.compile(r"^\s*Tool format: (\{.*\})\s*$", re.MULTILINE)
+# A catalog entry ("- name: summary Args: {...}"); the best-ranked tool comes first.
+_CATALOG_ENTRY = re.compile(r"^- (\S+): .* Args: (\{.*\})\s*$", re.MULTILINE)
+_THEME = re.compile(r"poem about (.+?),")
+_THEME_EMOJI = {
+    "nature": "🌿",
+    "technology": "💻",
+    "emotions": "💖",
+    "adventure": "🧭",
+    "creativity": "🎨",
+}
+
+
+class ScriptedTokenizer:
+    """Splits text into alternating runs of whitespace and non-whitespace."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._pieces: list[str] = []
+        self._lock = threading.Lock()
+
+    def tokenize(self, text: str) -> list[str]:
+        return _TOKEN.findall(text)
+
+    def encode(self, text: str) -> list[int]:
+        ids = self._ids
+        encoded = []
+        with self._lock:
+            for piece in self.tokenize(text):
+                token = ids.get(piece)
+                if token is None:
+                    token = ids[piece] = len(self._pieces)
+                    self._pieces.append(piece)
+                encoded.append(token)
+        return encoded
+
+    def decode(self, tokens: Sequence[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens)
+
+
+class ScriptedModel:
+    """A deterministic model that needs no weights.
+
+    With `replies` it replays them in order, wrapping around. Otherwise it
+    answers the demo's two prompts: a tool call carrying a short poem about
+    the requested theme, and a one-sentence explanation of a poem.
+    `seconds_per_token` sleeps for each generated token so that pipelines
+    can be exercised at a chosen decode speed.
+    """
+
+    def __init__(
+        self, replies: Sequence[str] = (), *, seconds_per_token: float = 0.0
+    ) -> None:
+        self._replies: Iterator[str] | None = cycle(list(replies)) if replies else None
+        self.seconds_per_token = seconds_per_token
+
+    def respond(self, prompt: str) -> str:
+        if self._replies is not None:
+            return next(self._replies)
+        entry = _CATALOG_ENTRY.search(prompt)
+        if entry is not None:
+            return self._tool_call(
+                prompt, {"tool": entry.group(1), "args": json.loads(entry.group(2))}
+            )
+        tool_format = _TOOL_FORMAT.search(prompt)
+        if tool_format is not None:
+            return self._tool_call(prompt, json.loads(tool_format.group(1)))
+        poem = prompt.rsplit("USER: ", 1)[-1].rsplit("\nASSISTANT: ", 1)[0]
+        first_line = poem.strip().splitlines()[0] if poem.strip() else "the poem"
+        return (
+            f'The poem opens with "{first_line}" and lingers on quiet, playful imagery, '
+            "leaving a light and warm feeling."
+        )
+
+    @staticmethod
+    def _tool_call(prompt: str, tool_format: dict[str, Any]) -> str:
+        match = _THEME.search(prompt)
+        theme = match.group(1).strip() if match else "the day"
+        emoji = _THEME_EMOJI.get(theme, "✨")
+        poem = (
+            f"{emoji} Softly the {theme} hums along,\n"
+            f"a small bright verse, a simple song,\n"
+            f"and every line of {theme} is where we belong."
+        )
+        example = tool_format.get("args") or {}
+        names = list(example)
+        # Optional arguments keep their defaults; only the text is filled in.
+        name = "text" if "text" in names or not names else names[0]
+        value: Any = poem.splitlines() if isinstance(example.get(name), list) else poem
+        args = {name: value}
+        return json.dumps(
+            {"tool": tool_format.get("tool"), "args": args}, ensure_ascii=False
+        )
+
+
+def _scripted_load(model_id: str, /, **options: object) -> ModelBundle:
+    """`model_id` may name a JSON file holding a list of replies to replay."""
+
+    replies: list[str] = []
+    if os.path.isfile(model_id):
+        with open(model_id, encoding="utf-8") as handle:
+            replies = [str(reply) for reply in json.load(handle)]
+    seconds_per_token = float(options.get("seconds_per_token", 0.0))  # type: ignore[arg-type]
+    return (
+        ScriptedModel(replies, seconds_per_token=seconds_per_token),
+        ScriptedTokenizer(),
+    )
+
+
+def _scripted_complete(
+    model: ScriptedModel, tokenizer: ScriptedTokenizer, prompt: str, max_tokens: int
+) -> tuple[str, int]:
+    pieces = tokenizer.tokenize(model.respond(prompt))
+    return "".join(pieces[:max_tokens]), min(len(pieces), max_tokens)
+
+
+def _scripted_generate(
+    model: Any, tokenizer: Any, prompt: str, /, **kwargs: object
+) -> str:
+    max_tokens = int(kwargs.get("max_tokens", 256))  # type: ignore[call-overload]
+    text, generated = _scripted_complete(model, tokenizer, prompt, max_tokens)
+    if model.seconds_per_token:
+        time.sleep(generated * model.seconds_per_token)
+    return text
+
+
+def _scripted_stream_generate(
+    model: Any, tokenizer: Any, prompt: str, /, **kwargs: object
+) -> Iterator[str]:
+    max_tokens = int(kwargs.get("max_tokens", 256))  # type: ignore[call-overload]
+    for piece in tokenizer.tokenize(model.respond(prompt))[:max_tokens]:
+        if model.seconds_per_token:
+            time.sleep(model.seconds_per_token)
+        yield piece
+
+
+def _scripted_batch_generate(
+    model: Any, tokenizer: Any, prompts: Sequence[str], /, **kwargs: object
+) -> list[str]:
+    # A batch decodes in lock step, so it takes as long as its longest reply.
+    max_tokens = int(kwargs.get("max_tokens", 256))  # type: ignore[call-overload]
+    results = [
+        _scripted_complete(model, tokenizer, prompt, max_tokens) for prompt in prompts
+    ]
+    if model.seconds_per_token and results:
+        time.sleep(max(generated for _, generated in results) * model.seconds_per_token)
+    return [text for text, _ in results]
+
+
+def scripted_backend() -> LLMBackend:
+    """The deterministic CPU backend."""
+
+    return LLMBackend(
+        name="scripted",
+        load=_scripted_load,
+        generate=_scripted_generate,
+        batch_generate=_scripted_batch_generate,
+        stream_generate=_scripted_stream_generate,
+    )
+
+
+_FACTORIES: dict[str, Callable[[], LLMBackend]] = {
+    "mlx": mlx_backend,
+    "scripted": scripted_backend,
+}
+_INSTANCES: dict[str, LLMBackend] = {}
+_active: str | None = None
+
+
+def register_backend(name: str, factory: Callable[[], LLMBackend]) -> None:
+    """Make another backend selectable by `name`."""
+
+    _FACTORIES[name] = factory
+    _INSTANCES.pop(name, None)
+
+
+def backend_names() -> list[str]:
+    return sorted(_FACTORIES)
+
+
+def get_backend(name: str | None = None) -> LLMBackend:
+    """Return the named backend, or the active one.
+
+    The active backend is the last one passed to `use_backend`, else the one
+    named by the `COWSAY_DEMO_LLM_BACKEND` environment variable, else mlx.
+    """
+    if name is None:
+        name = _active or os.environ.get(BACKEND_ENV, "").strip() or DEFAULT_BACKEND
+    backend = _INSTANCES.get(name)
+    if backend is None:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            raise ValueError(
+                f"Unknown LLM backend: {name!r} (expected one of {backend_names()})"
+            )
+        backend = _INSTANCES[name] = factory()
+    return backend
+
+
+def use_backend(name: str | None) -> LLMBackend:
+    """Make `name` the active backend (None goes back to the default)."""
+
+    global _active
+    backend = get_backend(name) if name is not None else None
+    _active = name
+    return backend or get_backend()
+
+
+__all__ = [
+    "BACKEND_ENV",
+    "DEFAULT_BACKEND",
+    "BatchGenerateFn",
+    "GenerateFn",
+    "LLMBackend",
+    "LoadFn",
+    "ScriptedModel",
+    "ScriptedTokenizer",
+    "StreamGenerateFn",
+    "backend_names",
+    "get_backend",
+    "mlx_backend",
+    "register_backend",
+    "scripted_backend",
+    "use_backend",
+]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+from .client import ToolCallError, ToolClient
+from .llm import ModelBundle, chat_batch, count_tokens
+from .prompting import (
+    POEM_ANALYST_PROMPT,
+    THEMES,
+    build_initial_messages,
+    compile_prompt,
+)
+from .repair import RepairStats, ToolCallRepairer
+
+"""Batch runner that pushes many themes through the demo chain and reports throughput."""
+
+STAGES: tuple[str, ...] = ("generate", "parse", "tool", "explain")
+
+
+@dataclass
+class BatchItem:
+    theme: str
+    sample: int
+    raw_response: str = ""
+    poem: str | None = None
+    result: Any = None
+    explanation: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class BatchReport:
+    """Aggregate counters for one batch run; stage times are summed seconds."""
+
+    items: list[BatchItem] = field(default_factory=list)
+    stage_seconds: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(STAGES, 0.0)
+    )
+    generated_tokens: int = 0
+    cached_responses: int = 0
+    wall_seconds: float = 0.0
+    repair: RepairStats | None = None
+
+    @property
+    def model_seconds(self) -> float:
+        return self.stage_seconds["generate"] + self.stage_seconds["explain"]
+
+    @property
+    def tokens_per_second(self) -> float:
+        seconds = self.model_seconds
+        return self.generated_tokens / seconds if seconds else 0.0
+
+    def summary(self) -> dict[str, object]:
+        failed = sum(1 for item in self.items if item.error is not None)
+        return {
+            "items": len(self.items),
+            "succeeded": len(self.items) - failed,
+            "failed": failed,
+            "repaired": self.repair.repaired if self.repair else 0,
+            "repair_tokens": self.repair.extra_tokens if self.repair else 0,
+            "generated_tokens": self.generated_tokens,
+            "cached_responses": self.cached_responses,
+            "tokens_per_s": round(self.tokens_per_second, 2),
+            "items_per_s": (
+                round(len(self.items) / self.wall_seconds, 3)
+                if self.wall_seconds
+                else 0.0
+            ),
+            "wall_s": round(self.wall_seconds, 4),
+            "stage_s": {
+                stage: round(seconds, 4)
+                for stage, seconds in self.stage_seconds.items()
+            },
+        }
+
+
+def plan_items(themes: Sequence[str] = THEMES, samples: int = 1) -> list[BatchItem]:
+    """Every theme `samples` times, grouped by sample so batches mix themes."""
+
+    if samples < 1:
+        raise ValueError("samples must be a positive integer")
+    return [BatchItem(theme, sample) for sample in range(samples) for theme in themes]
+
+
+async def run_batch(
+    bundle: ModelBundle,
+    client: ToolClient,
+    tool_spec: Any,
+    items: Sequence[BatchItem],
+    *,
+    batch_size: int = 8,
+    deterministic: bool = False,
+) -> BatchReport:
+    """Run generate → parse → tool → explain for `items`, `batch_size` prompts at a time.
+
+    Model calls stay on one worker thread, one batch after another. Tool calls
+    for a batch are started as soon as its responses are parsed, so they run
+    on the loop while the model explains that batch and generates the next.
+    Malformed tool calls are repaired locally where possible, and the rest
+    of the batch is re-prompted once with the error in a single extra call.
+    An item whose tool call is still invalid or fails is recorded, not fatal.
+    `deterministic` decodes greedily so responses can come from the response
+    cache.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    report = BatchReport(items=list(items))
+    stages = report.stage_seconds
+    tool_tasks: list[asyncio.Task[None]] = []
+    repairer = ToolCallRepairer(
+        tool_spec.name, count_tokens=lambda text: count_tokens(bundle, text)
+    )
+
+    async def model_call(
+        stage: str, conversations: list[Any], temperature: float
+    ) -> list[str]:
+        start = time.perf_counter()
+        cached: list[bool] = []
+        outputs = await asyncio.to_thread(
+            chat_batch,
+            bundle,
+            conversations,
+            temperature=temperature,
+            until_tool_call=stage == "generate",
+            tool=tool_spec if stage == "generate" else None,
+            cached=cached,
+        )
+        stages[stage] += time.perf_counter() - start
+        # Cached responses cost no decoding, so they stay out of tokens/s.
+        hits = cached or [False] * len(outputs)
+        report.cached_responses += sum(hits)
+        report.generated_tokens += sum(
+            count_tokens(bundle, text) for text, hit in zip(outputs, hits) if not hit
+        )
+        return outputs
+
+    async def execute(item: BatchItem) -> None:
+        start = time.perf_counter()
+        try:
+            item.result = await client.call_tool(tool_spec.name, {"text": item.poem})
+            if not item.result:
+                raise ToolCallError(f"MCP response missing 'result': {item.result!r}")
+        except ToolCallError as exc:
+            item.error = f"MCP Server Error: {exc}"
+        finally:
+            stages["tool"] += time.perf_counter() - start
+
+    prompt = compile_prompt(tool_spec)
+    started = time.perf_counter()
+    for offset in range(0, len(report.items), batch_size):
+        batch = report.items[offset : offset + batch_size]
+        conversations = [build_initial_messages(item.theme, prompt) for item in batch]
+        temperature = 0.0 if deterministic else 0.7
+        responses = await model_call("generate", conversations, temperature)
+
+        start = time.perf_counter()
+        parsed: list[BatchItem] = []
+        retries: list[tuple[BatchItem, list[Any]]] = []
+        for item, messages, raw_response in zip(batch, conversations, responses):
+            item.raw_response = raw_response
+            try:
+                item.poem = repairer.parse(raw_response).text
+            except ValueError as exc:
+                retries.append((item, repairer.feedback(messages, raw_response, exc)))
+            else:
+                parsed.append(item)
+        stages["parse"] += time.perf_counter() - start
+
+        if retries:
+            replies = await model_call(
+                "generate", [feedback for _, feedback in retries], temperature
+            )
+            start = time.perf_counter()
+            for (item, _), raw_response in zip(retries, replies):
+                item.raw_response = raw_response
+                try:
+                    item.poem = repairer.retry(raw_response).text
+                except ValueError as exc:
+                    item.error = f"Invalid tool call: {exc}"
+                else:
+                    parsed.append(item)
+            stages["parse"] += time.perf_counter() - start
+
+        tool_tasks.extend(asyncio.ensure_future(execute(item)) for item in parsed)
+        if parsed:
+            explanations = await model_call(
+                "explain",
+                [
+                    [
+                        {"role": "system", "content": POEM_ANALYST_PROMPT},
+                        {"role": "user", "content": item.poem},
+                    ]
+                    for item in parsed
+                ],
+                0.0 if deterministic else 0.3,
+            )
+            for item, explanation in zip(parsed, explanations):
+                item.explanation = explanation
+
+    await asyncio.gather(*tool_tasks)
+    report.repair = repairer.stats()
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def print_report(report: BatchReport) -> None:
+    """Print one status line per item to stderr and the JSON summary to stdout."""
+
+    for item in report.items:
+        status = item.error or "ok"
+        print(f"[{item.theme} #{item.sample}] {status}", file=sys.stderr)
+    print(json.dumps(report.summary(), indent=2))
+
+
+__all__ = [
+    "STAGES",
+    "BatchItem",
+    "BatchReport",
+    "plan_items",
+    "print_report",
+    "run_batch",
+]
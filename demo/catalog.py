@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator
+
+"""Catalog of the server's tools: a name index for dispatch and relevance-ranked selection."""
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def tool_terms(tool: Any) -> list[str]:
+    """Words a tool is matched on: its name, description, tags and argument names."""
+
+    parameters = getattr(tool, "parameters", None) or {}
+    parts = [
+        tool.name,
+        getattr(tool, "description", None) or "",
+        " ".join(sorted(getattr(tool, "tags", None) or ())),
+        " ".join(parameters.get("properties") or {}),
+    ]
+    return _words(" ".join(parts))
+
+
+def summary_line(tool: Any) -> str:
+    """First sentence of the tool's description, for a compact catalog entry."""
+
+    description = " ".join((getattr(tool, "description", None) or "").split())
+    return _SENTENCE_END.split(description, maxsplit=1)[0]
+
+
+class ToolCatalog(Mapping[str, Any]):
+    """Tools keyed on name, in registration order.
+
+    Membership and lookup are dict operations, so `parse_tool_call` can take
+    the catalog as its dispatch index. `select` ranks tools against a query
+    with BM25 over `tool_terms`, keeping registration order for ties, so a
+    prompt can describe only the few relevant tools however many are
+    registered.
+    """
+
+    def __init__(self, tools: Iterable[Any]) -> None:
+        self._tools: dict[str, Any] = {}
+        for tool in tools:
+            self._tools.setdefault(tool.name, tool)
+        self._terms = {
+            name: Counter(tool_terms(tool)) for name, tool in self._tools.items()
+        }
+        self._lengths = {
+            name: sum(terms.values()) for name, terms in self._terms.items()
+        }
+        self._average = (
+            sum(self._lengths.values()) / len(self._lengths) if self._lengths else 0.0
+        )
+        documents = Counter(term for terms in self._terms.values() for term in terms)
+        count = len(self._tools)
+        self._idf = {
+            term: math.log(1 + (count - seen + 0.5) / (seen + 0.5))
+            for term, seen in documents.items()
+        }
+
+    def __getitem__(self, name: str) -> Any:
+        return self._tools[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def score(self, name: str, query: str, k1: float = 1.2, b: float = 0.75) -> float:
+        """BM25 relevance of tool `name` to `query`."""
+
+        terms = self._terms[name]
+        average = self._average
+        norm = k1 * (1 - b + b * self._lengths[name] / average) if average else k1
+        total = 0.0
+        for word in set(_words(query)):
+            frequency = terms.get(word)
+            if frequency:
+                total += self._idf[word] * frequency * (k1 + 1) / (frequency + norm)
+        return total
+
+    def select(self, query: str, k: int | None = None) -> list[Any]:
+        """The `k` tools most relevant to `query`, best first (all when `k` is None)."""
+
+        if k is not None and k < 1:
+            raise ValueError("k must be a positive integer")
+        order = {name: index for index, name in enumerate(self._tools)}
+        ranked = sorted(
+            self._tools, key=lambda name: (-self.score(name, query), order[name])
+        )
+        return [self._tools[name] for name in ranked[:k]]
+
+
+__all__ = ["ToolCatalog", "summary_line", "tool_terms"]
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from typing import Any, Literal, Protocol, Sequence
+
+"""Tool-calling clients for the demo: in-process FastMCP, a persistent stdio worker, or HTTP."""
+
+FRAMINGS: tuple[str, ...] = ("lines", "json", "msgpack")
+
+Backend = Literal["inprocess", "stdio", "http"]
+BACKENDS: tuple[str, ...] = ("inprocess", "stdio", "http")
+
+DEFAULT_WORKER_COMMAND: tuple[str, ...] = (
+    sys.executable,
+    "-m",
+    "cowsay_mcp.main",
+    "--worker",
+)
+
+# Results of large renders arrive as one JSON line.
+_MAX_LINE = 64 * 1024 * 1024
+
+
+class ToolCallError(RuntimeError):
+    """Raised when the MCP server cannot be reached or returns no result."""
+
+
+class ToolClient(Protocol):
+    async def connect(self) -> None:
+        """Open the connection ahead of the first call."""
+
+    async def call_tool(self, name: str, args: dict[str, Any]) -> Any:
+        """Execute the tool and return its result."""
+
+    async def aclose(self) -> None:
+        """Release the connection."""
+
+
+class FastMCPToolClient:
+    """A `fastmcp.Client` session opened once and reused for every call.
+
+    `target` is anything `fastmcp.Client` accepts: a `FastMCP` server for an
+    in-memory session or a URL for the HTTP/SSE transports.
+    """
+
+    def __init__(self, target: Any) -> None:
+        self._target = target
+        self._client: Any = None
+        self._connecting = asyncio.Lock()
+
+    async def connect(self) -> None:
+        async with self._connecting:
+            if self._client is not None:
+                return
+            from fastmcp import Client
+
+            client = Client(self._target)
+            try:
+                await client.__aenter__()
+            except Exception as exc:
+                raise ToolCallError(f"Could not connect to MCP server: {exc}") from exc
+            self._client = client
+
+    async def call_tool(self, name: str, args: dict[str, Any]) -> Any:
+        await self.connect()
+        try:
+            result = await self._client.call_tool(name, args)
+        except Exception as exc:
+            raise ToolCallError(str(exc)) from exc
+        return result.data
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.__aexit__(None, None, None)
+
+    async def __aenter__(self) -> FastMCPToolClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+
+class StdioWorkerClient:
+    """A `cowsay_mcp.main --worker` child process kept alive across calls.
+
+    Requests and responses are newline-delimited JSON; each request carries
+    an `id` that the worker echoes back. The worker answers in order, so
+    calls share the pipe one at a time.
+    """
+
+    def __init__(self, command: Sequence[str] = DEFAULT_WORKER_COMMAND) -> None:
+        self.command = list(command)
+        self._proc: asyncio.subprocess.Process | None = None
+        self._next_id = 0
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        async with self._lock:
+            await self._process()
+
+    async def _process(self) -> asyncio.subprocess.Process:
+        if self._proc is None:
+            try:
+                self._proc = await asyncio.create_subprocess_exec(
+                    *self.command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    limit=_MAX_LINE,
+                )
+            except OSError as exc:
+                raise ToolCallError(f"Could not start MCP worker: {exc}") from exc
+        return self._proc
+
+    async def call_tool(self, name: str, args: dict[str, Any]) -> Any:
+        async with self._lock:
+            proc = await self._process()
+            assert proc.stdin is not None and proc.stdout is not None
+            self._next_id += 1
+            request_id = self._next_id
+            request = json.dumps({"id": request_id, "tool": name, "args": args})
+            try:
+                proc.stdin.write(request.encode() + b"\n")
+                await proc.stdin.drain()
+                line = (await proc.stdout.readline()).decode()
+            except (OSError, ValueError) as exc:
+                raise ToolCallError(f"MCP worker pipe failed: {exc}") from exc
+
+        if not line:
+            raise ToolCallError(f"MCP worker exited with code {proc.returncode}")
+        try:
+            response = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ToolCallError(f"Malformed MCP response: {line!r}") from exc
+        if not isinstance(response, dict) or "result" not in response:
+            error = response.get("error") if isinstance(response, dict) else None
+            raise ToolCallError(error or f"MCP response missing 'result': {line}")
+        if response.get("id") != request_id:
+            raise ToolCallError(f"MCP response for another request: {line}")
+        return response["result"]
+
+    async def aclose(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+
+    async def __aenter__(self) -> StdioWorkerClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+
+class FramedWorkerClient:
+    """A `cowsay_mcp.main --worker --framing <codec>` child with pipelined calls.
+
+    Every request and response is a length-prefixed frame, so calls do not
+    wait for each other: each is written as soon as it is made and a reader
+    task hands responses to their callers by `id`.
+    """
+
+    def __init__(
+        self, command: Sequence[str] = DEFAULT_WORKER_COMMAND, codec: str = "json"
+    ) -> None:
+        from cowsay_mcp.framing import codec_functions
+
+        self._encode, self._decode = codec_functions(codec)
+        self.command = [*command, "--framing", codec]
+        self._proc: asyncio.subprocess.Process | None = None
+        self._reader: asyncio.Task[None] | None = None
+        self._pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._next_id = 0
+        self._starting = asyncio.Lock()
+        self._writing = asyncio.Lock()
+
+    async def connect(self) -> None:
+        await self._process()
+
+    async def _process(self) -> asyncio.subprocess.Process:
+        async with self._starting:
+            if self._proc is None:
+                try:
+                    self._proc = await asyncio.create_subprocess_exec(
+                        *self.command,
+                        stdin=asyncio.subprocess.PIPE,
+                        stdout=asyncio.subprocess.PIPE,
+                    )
+                except OSError as exc:
+                    raise ToolCallError(f"Could not start MCP worker: {exc}") from exc
+                self._reader = asyncio.ensure_future(self._read_responses(self._proc))
+        return self._proc
+
+    async def _read_responses(self, proc: asyncio.subprocess.Process) -> None:
+        from cowsay_mcp.framing import HEADER
+
+        assert proc.stdout is not None
+        error: ToolCallError | None = None
+        try:
+            while True:
+                (size,) = HEADER.unpack(await proc.stdout.readexactly(HEADER.size))
+                response = self._decode(await proc.stdout.readexactly(size))
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except asyncio.IncompleteReadError:
+            await proc.wait()
+            error = ToolCallError(f"MCP worker exited with code {proc.returncode}")
+        except Exception as exc:  # undecodable frame: the stream is out of sync
+            error = ToolCallError(f"Malformed MCP response: {exc}")
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def call_tool(self, name: str, args: dict[str, Any]) -> Any:
+        from cowsay_mcp.framing import frame
+
+        proc = await self._process()
+        assert proc.stdin is not None
+        if self._reader is not None and self._reader.done():
+            raise ToolCallError(f"MCP worker exited with code {proc.returncode}")
+        self._next_id += 1
+        request_id = self._next_id
+        try:
+            payload = frame(
+                self._encode({"id": request_id, "tool": name, "args": args})
+            )
+        except ValueError as exc:  # FrameError: too large to send
+            raise ToolCallError(str(exc)) from exc
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            async with self._writing:
+                proc.stdin.write(payload)
+                await proc.stdin.drain()
+        except (OSError, ValueError) as exc:
+            self._pending.pop(request_id, None)
+            raise ToolCallError(f"MCP worker pipe failed: {exc}") from exc
+
+        response = await future
+        if "result" not in response:
+            raise ToolCallError(
+                response.get("error") or f"MCP response missing 'result': {response}"
+            )
+        return response["result"]
+
+    async def aclose(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+        if self._reader is not None:
+            await self._reader
+
+    async def __aenter__(self) -> FramedWorkerClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+
+def open_client(
+    backend: str = "inprocess",
+    *,
+    url: str | None = None,
+    command: Sequence[str] | None = None,
+    framing: str = "lines",
+) -> FastMCPToolClient | StdioWorkerClient | FramedWorkerClient:
+    """Create the client for `backend`; connections open on `connect` or the first call.
+
+    For the stdio backend, `framing` selects JSON lines or length-prefixed
+    `json`/`msgpack` frames.
+    """
+
+    if backend == "inprocess":
+        from cowsay_mcp.server import server
+
+        return FastMCPToolClient(server)
+    if backend == "stdio" and framing != "lines":
+        return FramedWorkerClient(command or DEFAULT_WORKER_COMMAND, codec=framing)
+    if backend == "stdio":
+        return StdioWorkerClient(command or DEFAULT_WORKER_COMMAND)
+    if backend == "http":
+        if not url:
+            raise ValueError("The http backend needs a server URL")
+        return FastMCPToolClient(url)
+    raise ValueError(f"Unknown backend: {backend!r} (expected one of {BACKENDS})")
+
+
+__all__ = [
+    "BACKENDS",
+    "FRAMINGS",
+    "Backend",
+    "DEFAULT_WORKER_COMMAND",
+    "FastMCPToolClient",
+    "FramedWorkerClient",
+    "StdioWorkerClient",
+    "ToolCallError",
+    "ToolClient",
+    "open_client",
+]
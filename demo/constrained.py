@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+import threading
+import weakref
+from typing import Any, Callable, Iterable, Mapping, Sequence, Tuple
+
+"""Schema-constrained decoding: token masks that only admit a valid tool-call JSON object."""
+
+LITERAL, STRING_START, STRING, ESCAPE, INT_START, INT_MORE = range(6)
+
+Node = Tuple[int, str]
+
+_JSON_ESCAPES = frozenset('"\\/bfnrt')
+_DIGITS = frozenset("0123456789")
+
+
+def tool_call_template(
+    name: str, parameters: Mapping[str, Any] | None
+) -> tuple[Node, ...]:
+    """Automaton nodes for `{"tool": <name>, "args": {...}}` as `json.dumps` writes it.
+
+    Only required arguments are emitted (all of them when the schema marks
+    none as required), so optional ones keep their server-side defaults.
+    String arguments accept any non-empty JSON string content; integer and
+    number arguments accept digits. Other types raise `ValueError`.
+    """
+    schema = parameters or {}
+    properties: Mapping[str, Any] = schema.get("properties") or {}
+    required = [prop for prop in schema.get("required") or () if prop in properties]
+    names = required or list(properties)
+
+    nodes: list[Node] = []
+
+    def literal(text: str) -> None:
+        nodes.extend((LITERAL, char) for char in text)
+
+    literal('{"tool": ' + json.dumps(name) + ', "args": {')
+    for index, prop in enumerate(names):
+        if index:
+            literal(", ")
+        literal(json.dumps(prop) + ": ")
+        kind = (properties[prop] or {}).get("type", "string")
+        if kind == "string":
+            literal('"')
+            nodes.extend([(STRING_START, ""), (STRING, ""), (ESCAPE, "")])
+        elif kind in ("integer", "number"):
+            nodes.extend([(INT_START, ""), (INT_MORE, "")])
+        else:
+            raise ValueError(f"Cannot constrain argument {prop!r} of type {kind!r}")
+    literal("}}")
+    return tuple(nodes)
+
+
+class ToolCallAutomaton:
+    """Character-level automaton over template nodes; states are node indices.
+
+    The state equal to `len(nodes)` is final: the object is complete and
+    nothing more may follow.
+    """
+
+    def __init__(self, nodes: Sequence[Node]) -> None:
+        self.nodes = tuple(nodes)
+        self.final = len(self.nodes)
+
+    def step(self, state: int, char: str) -> int | None:
+        nodes = self.nodes
+        while state < self.final:
+            kind, expected = nodes[state]
+            if kind == LITERAL:
+                return state + 1 if char == expected else None
+            if kind == STRING_START:
+                if char == '"':
+                    return None
+                if char == "\\":
+                    return state + 2
+                return state + 1 if char >= " " else None
+            if kind == STRING:
+                if char == '"':
+                    return state + 2
+                if char == "\\":
+                    return state + 1
+                return state if char >= " " else None
+            if kind == ESCAPE:
+                return state - 1 if char in _JSON_ESCAPES else None
+            if kind == INT_START:
+                return state + 1 if char in _DIGITS else None
+            # INT_MORE: more digits, or hand the character to what follows.
+            if char in _DIGITS:
+                return state
+            state += 1
+        return None
+
+    def advance(self, state: int, text: str) -> int | None:
+        """State after consuming `text`, or None if it breaks the template."""
+
+        step = self.step
+        for char in text:
+            next_state = step(state, char)
+            if next_state is None:
+                return None
+            state = next_state
+        return state
+
+
+class CompiledToolCall:
+    """Token masks for one tool-call template over one vocabulary.
+
+    The allowed token ids of a state are computed on first use and kept, so
+    decoding pays for each distinct state once; afterwards a step is a dict
+    lookup plus walking the chosen token's characters. In literal states only
+    tokens starting with the expected character are simulated. End-of-sequence
+    ids are allowed in the final state only.
+    """
+
+    def __init__(
+        self,
+        automaton: ToolCallAutomaton,
+        vocab: Sequence[str | None],
+        eos_ids: Iterable[int] = (),
+    ) -> None:
+        self.automaton = automaton
+        self.vocab = tuple(vocab)
+        self.eos_ids = tuple(sorted(set(eos_ids)))
+        self._allowed: dict[int, tuple[int, ...]] = {}
+        self._by_first_char: dict[str, list[int]] | None = None
+        self._lock = threading.Lock()
+        # Backend-specific mask arrays, filled in by processors such as the mlx one.
+        self.arrays: dict[int, Any] = {}
+
+    @property
+    def final(self) -> int:
+        return self.automaton.final
+
+    def allowed(self, state: int) -> tuple[int, ...]:
+        cached = self._allowed.get(state)
+        if cached is not None:
+            return cached
+        if state == self.final:
+            allowed = self.eos_ids
+        else:
+            advance = self.automaton.advance
+            vocab = self.vocab
+            allowed = tuple(
+                token
+                for token in self._candidates(state)
+                if vocab[token] and advance(state, vocab[token]) is not None
+            )
+        with self._lock:
+            self._allowed[state] = allowed
+        return allowed
+
+    def _candidates(self, state: int) -> Iterable[int]:
+        kind, expected = self.automaton.nodes[state]
+        if kind != LITERAL:
+            return range(len(self.vocab))
+        if self._by_first_char is None:
+            index: dict[str, list[int]] = {}
+            for token, text in enumerate(self.vocab):
+                if text:
+                    index.setdefault(text[0], []).append(token)
+            self._by_first_char = index
+        return self._by_first_char.get(expected, ())
+
+    def next_state(self, state: int, token: int) -> int | None:
+        if state == self.final:
+            return state if token in self.eos_ids else None
+        text = self.vocab[token] if 0 <= token < len(self.vocab) else None
+        return self.automaton.advance(state, text) if text else None
+
+
+class ConstraintCursor:
+    """Decoding position within a compiled constraint."""
+
+    def __init__(self, compiled: CompiledToolCall) -> None:
+        self.compiled = compiled
+        self.state = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state == self.compiled.final
+
+    def allowed(self) -> tuple[int, ...]:
+        return self.compiled.allowed(self.state)
+
+    def advance(self, token: int) -> None:
+        state = self.compiled.next_state(self.state, token)
+        if state is None:
+            raise ValueError(f"Token {token} is not allowed in state {self.state}")
+        self.state = state
+
+
+def vocabulary(tokenizer: Any) -> tuple[tuple[str | None, ...], tuple[int, ...]]:
+    """Decoded text of every token id and the end-of-sequence ids.
+
+    Special tokens map to None so they can never appear inside the object.
+    """
+    try:
+        size = len(tokenizer)
+    except TypeError:
+        size = int(tokenizer.vocab_size)
+    special = set(getattr(tokenizer, "all_special_ids", None) or ())
+    eos = getattr(tokenizer, "eos_token_ids", None)
+    if not eos:
+        eos_id = getattr(tokenizer, "eos_token_id", None)
+        eos = () if eos_id is None else (eos_id,)
+    vocab = tuple(
+        None if token in special else tokenizer.decode([token]) for token in range(size)
+    )
+    return vocab, tuple(eos)
+
+
+# Per tokenizer: its decoded vocabulary and the compiled template of each tool.
+_VOCABULARIES: weakref.WeakKeyDictionary[
+    Any, tuple[tuple[str | None, ...], tuple[int, ...]]
+] = weakref.WeakKeyDictionary()
+_COMPILED: weakref.WeakKeyDictionary[Any, dict[tuple[Node, ...], CompiledToolCall]] = (
+    weakref.WeakKeyDictionary()
+)
+_COMPILE_LOCK = threading.Lock()
+
+
+def compile_tool_call(tool: Any, tokenizer: Any) -> CompiledToolCall:
+    """The compiled constraint for `tool` and `tokenizer`, built once and cached.
+
+    Raises `ValueError` when the tool's schema has arguments that cannot be
+    constrained.
+    """
+    nodes = tool_call_template(tool.name, getattr(tool, "parameters", None))
+    with _COMPILE_LOCK:
+        try:
+            per_tokenizer = _COMPILED.setdefault(tokenizer, {})
+        except TypeError:  # not weak-referenceable: compile without caching
+            return CompiledToolCall(ToolCallAutomaton(nodes), *vocabulary(tokenizer))
+        compiled = per_tokenizer.get(nodes)
+        if compiled is None:
+            vocab = _VOCABULARIES.get(tokenizer)
+            if vocab is None:
+                vocab = _VOCABULARIES[tokenizer] = vocabulary(tokenizer)
+            compiled = CompiledToolCall(ToolCallAutomaton(nodes), *vocab)
+            per_tokenizer[nodes] = compiled
+    return compiled
+
+
+def mlx_logits_processor(compiled: CompiledToolCall) -> Callable[[Any, Any], Any]:
+    """An mlx-lm logits processor that masks every token the template forbids.
+
+    mlx-lm passes the tokens seen so far; the processor advances its cursor
+    over the ones sampled since the previous call.
+    """
+    import mlx.core as mx
+
+    cursor = ConstraintCursor(compiled)
+    seen: list[int] = []
+
+    def mask(size: int) -> Any:
+        key = cursor.state
+        array = compiled.arrays.get(key)
+        if array is None or array.shape[-1] != size:
+            values = [-float("inf")] * size
+            for token in cursor.allowed():
+                if token < size:
+                    values[token] = 0.0
+            array = compiled.arrays[key] = mx.array(values)
+        return array
+
+    def processor(tokens: Any, logits: Any) -> Any:
+        if not seen:
+            seen.append(len(tokens))
+        else:
+            for token in tokens[seen[0] :].tolist():
+                cursor.advance(int(token))
+            seen[0] = len(tokens)
+        return logits + mask(logits.shape[-1])
+
+    return processor
+
+
+__all__ = [
+    "CompiledToolCall",
+    "ConstraintCursor",
+    "ToolCallAutomaton",
+    "compile_tool_call",
+    "mlx_logits_processor",
+    "tool_call_template",
+    "vocabulary",
+]
@@ -1,22 +1,16 @@
 from __future__ import annotations
 
-from typing import Literal, Protocol, Sequence, Tuple, TypedDict
+import weakref
+from typing import Any, Callable, Iterator, Literal, Sequence, TypedDict
 
-"""Helpers for interacting with MLX local models framed as chat assistants."""
+from .backends import GenerateFn, LLMBackend, LoadFn, get_backend
+from .constrained import compile_tool_call
+from .models import ModelBundle, ModelRegistry, model_key
+from .prefix_cache import DEFAULT_MAX_PREFIXES, PrefixBackend, PromptPrefixCache
+from .response_cache import DEFAULT_MAX_BYTES, ResponseCache, response_key
+from .streaming import take_until_tool_call
 
-ModelBundle = Tuple[object, object]
-
-
-class LoadFn(Protocol):
-    def __call__(self, model_id: str) -> ModelBundle:
-        """Return the loaded model/tokenizer pair."""
-
-
-class GenerateFn(Protocol):
-    def __call__(
-        self, model: object, tokenizer: object, prompt: str, /, **kwargs: object
-    ) -> str:
-        """Produce the assistant response for the supplied prompt."""
+"""Helpers for interacting with local models framed as chat assistants."""
 
 
 class Message(TypedDict):
@@ -24,74 +18,412 @@ class Message(TypedDict):
     content: str
 
 
-_MLX_FUNCS: Tuple[LoadFn, GenerateFn] | None = None
+# One prefix cache per loaded model; entries go away with the model.
+_PREFIX_CACHES: weakref.WeakKeyDictionary[object, PromptPrefixCache] = (
+    weakref.WeakKeyDictionary()
+)
+# The backend that loaded each model, so bundles keep working after a switch.
+_MODEL_BACKENDS: weakref.WeakKeyDictionary[object, LLMBackend] = (
+    weakref.WeakKeyDictionary()
+)
+# "backend:model id:options" of each loaded model, for response cache keys.
+_MODEL_NAMES: weakref.WeakKeyDictionary[object, str] = weakref.WeakKeyDictionary()
+_RESPONSE_CACHE: ResponseCache | None = None
+
+RESPONSE_CACHE_ENV = "COWSAY_DEMO_RESPONSE_CACHE"
 
 
-def _ensure_mlx_functions() -> Tuple[LoadFn, GenerateFn]:
-    """Locate and cache mlx-lm helpers, surfacing a clear error if unavailable."""
-    global _MLX_FUNCS
-    if _MLX_FUNCS is not None:
-        return _MLX_FUNCS
+def _load_with_backend(
+    model_id: str, *, backend: str, **options: object
+) -> ModelBundle:
+    llm_backend = get_backend(backend)
+    bundle = llm_backend.load(model_id, **options)
+    model_name = ":".join((backend, *model_key(model_id, options)))
+    try:
+        _MODEL_BACKENDS[bundle[0]] = llm_backend
+        _MODEL_NAMES[bundle[0]] = model_name
+    except TypeError:  # not weak-referenceable; falls back to the active backend
+        pass
+    return bundle
+
 
+def backend_for(bundle: ModelBundle) -> LLMBackend:
+    """The backend that loaded `bundle`, or the active backend for foreign bundles."""
     try:
-        from mlx_lm import generate as mlx_generate
-        from mlx_lm import load as mlx_load
-    except ImportError as exc:  # pragma: no cover - requires missing dependency
-        raise RuntimeError(
-            "mlx-lm is required for the demo. Install extras via `uv sync --group demo`."
-        ) from exc
+        backend = _MODEL_BACKENDS.get(bundle[0])
+    except TypeError:
+        backend = None
+    return backend or get_backend()
+
 
-    _MLX_FUNCS = (mlx_load, mlx_generate)
-    return _MLX_FUNCS
+def _warm_up(bundle: ModelBundle) -> None:
+    """Generate one token so kernels are compiled before the first real request."""
+    chat_once(
+        bundle,
+        [{"role": "user", "content": "Hi"}],
+        max_tokens=1,
+        prefix_cache=False,
+        response_cache=False,
+    )
 
 
-def load_model(model_id: str) -> ModelBundle:
-    """Load the requested model and tokenizer."""
-    load_fn, _ = _ensure_mlx_functions()
-    return load_fn(model_id)
+# Shared by every caller in the process; set `memory_budget` (bytes) to bound it.
+model_registry = ModelRegistry(_load_with_backend, warmup=_warm_up)
+
+
+def load_model(
+    model_id: str,
+    *,
+    warmup: bool = True,
+    backend: str | None = None,
+    **options: object,
+) -> ModelBundle:
+    """Return the model and tokenizer, loading them only on first use.
+
+    Bundles are cached in `model_registry` keyed on the backend, `model_id`
+    and the load `options`; a fresh load is warmed up unless `warmup` is False.
+    """
+    name = get_backend(backend).name
+    return model_registry.get(model_id, warmup=warmup, backend=name, **options)
+
+
+def _render_message(message: Message) -> str:
+    return f"{message['role'].upper()}: {message['content']}\n"
 
 
 def render_messages(messages: Sequence[Message]) -> str:
     """Convert structured chat messages into a text prompt for mlx-lm."""
+    parts = [_render_message(message) for message in messages]
+    parts.append("ASSISTANT: ")  # steer the model toward a continuation
+    return "".join(parts)
+
+
+def system_prefix(messages: Sequence[Message]) -> str:
+    """The rendered leading system messages: the part of the prompt shared across calls."""
     parts: list[str] = []
     for message in messages:
-        role = message["role"].upper()
-        parts.append(f"{role}: {message['content']}\n")
-    parts.append("ASSISTANT: ")  # steer the model toward a continuation
+        if message["role"] != "system":
+            break
+        parts.append(_render_message(message))
     return "".join(parts)
 
 
+def attach_prefix_cache(
+    bundle: ModelBundle,
+    backend: PrefixBackend,
+    max_entries: int = DEFAULT_MAX_PREFIXES,
+) -> PromptPrefixCache:
+    """Use `backend` for prefix caching of `bundle`, replacing any existing cache."""
+    cache = PromptPrefixCache(backend, max_entries)
+    _PREFIX_CACHES[bundle[0]] = cache
+    return cache
+
+
+def prefix_cache_for(bundle: ModelBundle) -> PromptPrefixCache | None:
+    """Return the bundle's prefix cache, creating one on first use.
+
+    None when the model cannot be tracked or its backend has no prefix support.
+    """
+    model, tokenizer = bundle
+    try:
+        cache = _PREFIX_CACHES.get(model)
+    except TypeError:  # not weak-referenceable
+        return None
+    if cache is None:
+        make_backend = backend_for(bundle).prefix_backend
+        if make_backend is not None:
+            cache = attach_prefix_cache(bundle, make_backend(model, tokenizer))
+    return cache
+
+
+def use_response_cache(
+    path: str | None, max_bytes: int = DEFAULT_MAX_BYTES
+) -> ResponseCache | None:
+    """Store deterministic responses in the SQLite file at `path` (None turns it off)."""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is not None:
+        _RESPONSE_CACHE.close()
+    _RESPONSE_CACHE = ResponseCache(path, max_bytes) if path else None
+    return _RESPONSE_CACHE
+
+
+def _cache_key(
+    bundle: ModelBundle,
+    messages: Sequence[Message],
+    max_tokens: int,
+    temperature: float | None,
+    until_tool_call: bool,
+    tool: Any,
+) -> bytes | None:
+    """Key for a cacheable call: greedy decoding on a model loaded by `load_model`."""
+    if _RESPONSE_CACHE is None or temperature not in (None, 0):
+        return None
+    try:
+        model_name = _MODEL_NAMES.get(bundle[0])
+    except TypeError:
+        return None
+    if model_name is None:
+        return None
+    params = {
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "until_tool_call": until_tool_call,
+        "tool": (
+            None if tool is None else [tool.name, getattr(tool, "parameters", None)]
+        ),
+    }
+    return response_key(model_name, render_messages(messages), params)
+
+
+def _generation_kwargs(
+    bundle: ModelBundle, max_tokens: int, temperature: float | None, tool: Any
+) -> dict[str, object]:
+    kwargs: dict[str, object] = {"max_tokens": max_tokens}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    constrain = backend_for(bundle).constrain if tool is not None else None
+    if constrain is not None:
+        try:
+            compiled = compile_tool_call(tool, bundle[1])
+        except ValueError:
+            pass  # the schema cannot be expressed as a mask; decode freely
+        else:
+            kwargs.update(constrain(compiled))
+    return kwargs
+
+
 def chat_once(
     bundle: ModelBundle,
     messages: Sequence[Message],
     *,
     max_tokens: int = 256,
     temperature: float | None = 0.0,
+    prefix_cache: bool = True,
+    until_tool_call: bool = False,
+    tool: Any = None,
+    response_cache: bool = True,
 ) -> str:
-    """Generate a single assistant response using mlx-lm."""
+    """Generate a single assistant response with the bundle's backend.
+
+    With `prefix_cache`, the processed state of the leading system messages
+    is kept per model and reused by later calls with the same system prompt.
+    With `until_tool_call`, the response is streamed and generation stops as
+    soon as the first JSON object is closed, so trailing text costs nothing.
+    With `tool`, backends that support it decode under a mask that only
+    admits a JSON call of that tool. Greedy calls (temperature 0 or None) are
+    answered from the response cache when one is enabled and `response_cache`
+    is left on.
+    """
+    key = (
+        _cache_key(bundle, messages, max_tokens, temperature, until_tool_call, tool)
+        if response_cache
+        else None
+    )
+    if key is not None:
+        cached = _RESPONSE_CACHE.get(key)  # type: ignore[union-attr]
+        if cached is not None:
+            return cached
+    response = _generate(
+        bundle, messages, max_tokens, temperature, prefix_cache, until_tool_call, tool
+    )
+    if key is not None:
+        _RESPONSE_CACHE.put(key, response)  # type: ignore[union-attr]
+    return response
+
+
+def _generate(
+    bundle: ModelBundle,
+    messages: Sequence[Message],
+    max_tokens: int,
+    temperature: float | None,
+    prefix_cache: bool,
+    until_tool_call: bool,
+    tool: Any,
+) -> str:
+    if until_tool_call:
+        chunks = stream_chat(
+            bundle,
+            messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            prefix_cache=prefix_cache,
+            tool=tool,
+        )
+        return take_until_tool_call(chunks).strip()
+
     model, tokenizer = bundle
-    _, generate_fn = _ensure_mlx_functions()
     prompt = render_messages(messages)
+    prefix = system_prefix(messages) if prefix_cache else ""
+    cache = prefix_cache_for(bundle) if prefix else None
 
-    kwargs: dict[str, object] = {"max_tokens": max_tokens}
-    if temperature is not None:
-        kwargs["temperature"] = temperature
+    generate: Callable[..., str]
+    if cache is not None:
+
+        def generate(**kwargs: object) -> str:
+            return cache.generate(prefix, prompt, **kwargs)
+
+    else:
+        generate_fn = backend_for(bundle).generate
 
+        def generate(**kwargs: object) -> str:
+            return generate_fn(model, tokenizer, prompt, **kwargs)
+
+    kwargs = _generation_kwargs(bundle, max_tokens, temperature, tool)
     try:
-        raw_output = generate_fn(model, tokenizer, prompt, **kwargs)
+        raw_output = generate(**kwargs)
     except TypeError as exc:
         if "temperature" in str(exc) and "temperature" in kwargs:
             kwargs.pop("temperature", None)
-            raw_output = generate_fn(model, tokenizer, prompt, **kwargs)
+            raw_output = generate(**kwargs)
         else:  # pragma: no cover - defensive passthrough for unexpected signatures
             raise
 
     return raw_output.strip()
 
 
+def stream_chat(
+    bundle: ModelBundle,
+    messages: Sequence[Message],
+    *,
+    max_tokens: int = 256,
+    temperature: float | None = 0.0,
+    prefix_cache: bool = True,
+    tool: Any = None,
+) -> Iterator[str]:
+    """Yield the assistant response piece by piece as the backend generates it.
+
+    Closing the iterator, or breaking out of a loop over it, stops generation.
+    Backends without streaming yield the whole response as one piece.
+    """
+    prefix = system_prefix(messages) if prefix_cache else ""
+    cache = prefix_cache_for(bundle) if prefix else None
+    stream_fn = backend_for(bundle).stream_generate
+    if cache is None and stream_fn is None:
+        return iter(
+            [
+                chat_once(
+                    bundle,
+                    messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    prefix_cache=False,
+                    tool=tool,
+                )
+            ]
+        )
+
+    kwargs = _generation_kwargs(bundle, max_tokens, temperature, tool)
+    prompt = render_messages(messages)
+    if cache is not None:
+        return cache.stream(prefix, prompt, **kwargs)
+    model, tokenizer = bundle
+    return stream_fn(model, tokenizer, prompt, **kwargs)  # type: ignore[misc]
+
+
+def chat_batch(
+    bundle: ModelBundle,
+    conversations: Sequence[Sequence[Message]],
+    *,
+    max_tokens: int = 256,
+    temperature: float | None = 0.0,
+    until_tool_call: bool = False,
+    tool: Any = None,
+    cached: list[bool] | None = None,
+) -> list[str]:
+    """Generate one assistant response per conversation.
+
+    Greedy conversations already in the response cache are answered from it;
+    the rest use the backend's batched generation (`mlx_lm.batch_generate`
+    for mlx) when it has one and sequential `chat_once` calls otherwise.
+    A `tool` constraint needs per-sequence decoding state that batched
+    generation cannot carry, so constrained calls on a backend that
+    supports constraints are always sequential. With `until_tool_call`,
+    batched responses are cut after the first JSON object, as a streamed
+    call would be. When `cached` is given, it is filled with one flag per
+    conversation telling whether its response came from the cache.
+    """
+    keys = [
+        _cache_key(bundle, messages, max_tokens, temperature, until_tool_call, tool)
+        for messages in conversations
+    ]
+    responses: list[str | None] = [
+        None if key is None else _RESPONSE_CACHE.get(key)  # type: ignore[union-attr]
+        for key in keys
+    ]
+    if cached is not None:
+        cached[:] = [response is not None for response in responses]
+    pending = [index for index, response in enumerate(responses) if response is None]
+    if not pending:
+        return [response or "" for response in responses]
+
+    backend = backend_for(bundle)
+    batch_fn = backend.batch_generate
+    constrained = tool is not None and backend.constrain is not None
+    texts: list[str]
+    if batch_fn is None or constrained or len(pending) < 2:
+        texts = [
+            chat_once(
+                bundle,
+                conversations[index],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                until_tool_call=until_tool_call,
+                tool=tool,
+                response_cache=False,
+            )
+            for index in pending
+        ]
+    else:
+        model, tokenizer = bundle
+        prompts: list[str] | list[list[int]] = [
+            render_messages(conversations[index]) for index in pending
+        ]
+        cache = prefix_cache_for(bundle)
+        if cache is not None:
+            # Reuse the tokens of the shared system prompt; only each
+            # conversation's own messages are tokenized.
+            prompts = [
+                cache.encode(system_prefix(conversations[index]), prompt)
+                for index, prompt in zip(pending, prompts)
+            ]
+        kwargs: dict[str, object] = {"max_tokens": max_tokens}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        texts = [
+            (take_until_tool_call((text,)) if until_tool_call else text).strip()
+            for text in batch_fn(model, tokenizer, prompts, **kwargs)
+        ]
+    for index, text in zip(pending, texts):
+        responses[index] = text
+        key = keys[index]
+        if key is not None:
+            _RESPONSE_CACHE.put(key, text)  # type: ignore[union-attr]
+    return [response or "" for response in responses]
+
+
+def count_tokens(bundle: ModelBundle, text: str) -> int:
+    """Number of tokens in `text`, by the bundle's tokenizer when it has one."""
+    encode = getattr(bundle[1], "encode", None)
+    if callable(encode):
+        return len(encode(text))
+    return len(text.split())
+
+
 __all__ = [
+    "GenerateFn",
+    "LoadFn",
     "ModelBundle",
     "Message",
+    "RESPONSE_CACHE_ENV",
+    "attach_prefix_cache",
+    "backend_for",
+    "chat_batch",
     "chat_once",
+    "count_tokens",
     "load_model",
+    "model_registry",
+    "prefix_cache_for",
+    "stream_chat",
+    "system_prefix",
+    "use_response_cache",
 ]
@@ -1,108 +1,342 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import json
+import os
 import random
-import subprocess
+import shlex
 import sys
-from typing import Any
+from typing import Any, Sequence
 
 from cowsay_mcp.server import server
 
-from .llm import chat_once, load_model
-from .prompting import POEM_ANALYST_PROMPT, THEMES, build_initial_messages
+from .backends import BACKEND_ENV, backend_names, use_backend
+from .batch import plan_items, print_report, run_batch
+from .catalog import ToolCatalog
+from .client import BACKENDS, FRAMINGS, ToolCallError, ToolClient, open_client
+from .llm import (
+    RESPONSE_CACHE_ENV,
+    chat_once,
+    count_tokens,
+    load_model,
+    use_response_cache,
+)
+from .prompting import (
+    POEM_ANALYST_PROMPT,
+    THEMES,
+    build_initial_messages,
+    task_prompt,
+)
+from .repair import ToolCallRepairer
+from .toolcall import ToolCall
+from .toolcall import parse_tool_call as parse_tool_call
 
 """CLI entrypoint for running the cowsay tool-calling demo."""
 
+MODEL_ID = "mlx-community/Llama-3.2-3B-Instruct-4bit"
 
-def parse_tool_call(raw_response: str, expected_tool: str) -> str:
-    """Extract the poem text from the assistant's JSON tool call."""
 
-    start = raw_response.find("{")
-    if start == -1:
-        raise ValueError("No JSON found in LLM response")
-
-    data, _ = json.JSONDecoder().raw_decode(raw_response[start:])
-    if data.get("tool") != expected_tool:
-        raise ValueError(f"Unexpected tool requested: {data.get('tool')}")
-
-    text = data.get("args", {}).get("text", "").strip()
-    if not text:
-        raise ValueError("Tool call did not include text")
-    return text
-
-
-def fetch_primary_tool() -> Any:
+async def fetch_primary_tool() -> Any:
     """Return the first registered tool from the FastMCP server."""
 
-    tools = asyncio.run(server.get_tools())
+    tools = await server.get_tools()
     try:
         return next(iter(tools.values()))
     except StopIteration as exc:  # pragma: no cover - defensive guard
         raise RuntimeError("No tools registered on the cowsay MCP server.") from exc
 
 
-def main() -> None:
+async def fetch_tool_catalog() -> ToolCatalog:
+    """Return every registered tool, indexed by name."""
+
+    return ToolCatalog((await server.get_tools()).values())
+
+
+async def offer_tools(theme: str, count: int | None = None) -> list[Any]:
+    """The tools to describe in the prompt for `theme`.
+
+    By default only the primary tool; with `count`, that many registered
+    tools ranked by relevance to the task, so the prompt stays short however
+    many tools the server has.
+    """
+    if count is None:
+        return [await fetch_primary_tool()]
+    tools = (await fetch_tool_catalog()).select(task_prompt(theme, "a tool"), count)
+    if not tools:
+        raise RuntimeError("No tools registered on the cowsay MCP server.")
+    return tools
+
+
+def _tool_arguments(call: ToolCall, tool: Any) -> dict[str, Any]:
+    """The call's arguments that `tool` declares, with the displayed text trimmed."""
+
+    properties = (getattr(tool, "parameters", None) or {}).get("properties")
+    args = dict(call.args)
+    if isinstance(properties, dict):
+        args = {name: value for name, value in args.items() if name in properties}
+    if "text" in args:
+        args["text"] = call.text
+    return args
+
+
+def _tool_output(result: Any) -> str:
+    """Printable tool result; batch items show their art or their error."""
+
+    if not isinstance(result, list):
+        return str(result)
+    return "\n".join(
+        (
+            item["result"]
+            if item.get("result") is not None
+            else f"error: {item.get('error')}"
+        )
+        for item in result
+    )
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m demo.main",
+        description="Let a local LLM pick and call the cowsay MCP tool.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="inprocess",
+        help="how to reach the MCP server (default: %(default)s)",
+    )
+    parser.add_argument("--url", help="server URL for the http backend")
+    parser.add_argument(
+        "--framing",
+        choices=FRAMINGS,
+        default="lines",
+        help="stdio worker protocol: JSON lines or length-prefixed json/msgpack frames",
+    )
+    parser.add_argument(
+        "--server-command",
+        type=shlex.split,
+        help='worker command for the stdio backend, e.g. "uv run python -m cowsay_mcp.main --worker"',
+    )
+    parser.add_argument(
+        "--llm-backend",
+        choices=backend_names(),
+        help=f"model runtime (default: ${BACKEND_ENV} or mlx); scripted runs on any CPU",
+    )
+    parser.add_argument(
+        "--model",
+        default=MODEL_ID,
+        help="model id, or for the scripted backend a JSON file of replies to replay",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="run every theme through the chain and report throughput",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=1,
+        help="with --batch, how many times to run each theme (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="with --batch, prompts per generation call (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="decode greedily (temperature 0) so runs are repeatable and cacheable",
+    )
+    parser.add_argument(
+        "--response-cache",
+        metavar="PATH",
+        default=os.environ.get(RESPONSE_CACHE_ENV),
+        help=f"SQLite file caching greedy responses (default: ${RESPONSE_CACHE_ENV})",
+    )
+    parser.add_argument(
+        "--tools",
+        type=int,
+        metavar="N",
+        help="offer the N registered tools most relevant to the task (default: only the primary tool)",
+    )
+    options = parser.parse_args([] if argv is None else argv)
+    if options.tools is not None and options.tools < 1:
+        parser.error("--tools must be a positive integer")
+    if options.samples < 1 or options.batch_size < 1:
+        parser.error("--samples and --batch-size must be positive integers")
+    if options.backend == "http" and not options.url:
+        parser.error("--url is required with --backend http")
+    return options
+
+
+def main(argv: Sequence[str] | None = None) -> None:
     """LLM selects and executes a tool via MCP."""
 
-    bundle = load_model("mlx-community/Llama-3.2-3B-Instruct-4bit")
-    tool_spec = fetch_primary_tool()
+    options = _parse_args(argv)
+    if options.llm_backend:
+        use_backend(options.llm_backend)
+    cache = use_response_cache(options.response_cache)
+    try:
+        asyncio.run(run_session(options))
+    finally:
+        if cache is not None:
+            stats = cache.stats()
+            print(
+                f"Response cache: {stats.hits} hits, {stats.misses} misses",
+                file=sys.stderr,
+            )
+            use_response_cache(None)
+
+
+async def run_session(options: argparse.Namespace) -> None:
+    """Run the whole demo on one event loop with one MCP connection."""
 
+    async with open_client(
+        options.backend,
+        url=options.url,
+        command=options.server_command,
+        framing=options.framing,
+    ) as client:
+        if options.batch:
+            await run_batch_session(
+                client,
+                options.samples,
+                options.batch_size,
+                options.model,
+                deterministic=options.deterministic,
+            )
+        else:
+            await run_pipeline(
+                client,
+                options.model,
+                deterministic=options.deterministic,
+                tools=options.tools,
+            )
+
+
+async def run_batch_session(
+    client: ToolClient,
+    samples: int = 1,
+    batch_size: int = 8,
+    model_id: str = MODEL_ID,
+    *,
+    deterministic: bool = False,
+) -> None:
+    """Run every theme `samples` times and print aggregate throughput."""
+
+    connecting = asyncio.ensure_future(client.connect())
+    bundle, tool_spec = await asyncio.gather(
+        asyncio.to_thread(load_model, model_id), fetch_primary_tool()
+    )
+    try:
+        await connecting
+    except ToolCallError as exc:
+        print(f"MCP Server Error: {exc}", file=sys.stderr)
+        sys.exit("MCP communication error")
+    report = await run_batch(
+        bundle,
+        client,
+        tool_spec,
+        plan_items(THEMES, samples),
+        batch_size=batch_size,
+        deterministic=deterministic,
+    )
+    print_report(report)
+
+
+async def run_pipeline(
+    client: ToolClient,
+    model_id: str = MODEL_ID,
+    *,
+    deterministic: bool = False,
+    tools: int | None = None,
+) -> None:
+    """Generate a tool call, execute it and explain the poem.
+
+    Model calls are blocking, so they run in a worker thread; the MCP
+    connection and tool discovery proceed on the loop in the meantime.
+    `deterministic` decodes greedily, which lets the response cache answer.
+    With `tools`, the model chooses among that many relevant tools and the
+    call is dispatched to the one it names.
+    """
+    connecting = asyncio.ensure_future(client.connect())
     theme = random.choice(THEMES)
-    messages = build_initial_messages(theme, tool_spec)
-    raw_response = chat_once(bundle, messages, temperature=0.7)
+    bundle, offered = await asyncio.gather(
+        asyncio.to_thread(load_model, model_id), offer_tools(theme, tools)
+    )
+    index = {tool.name: tool for tool in offered}
+    messages = build_initial_messages(
+        theme, offered[0] if len(offered) == 1 else offered
+    )
+    # Token masks describe a single tool; several are decoded freely.
+    constraint = offered[0] if len(offered) == 1 else None
+
+    def generate_call(conversation: list[Any]) -> str:
+        # Stop generating at the end of the tool call instead of waiting for max_tokens.
+        return chat_once(
+            bundle,
+            conversation,
+            temperature=0.0 if deterministic else 0.7,
+            until_tool_call=True,
+            tool=constraint,
+        )
+
+    raw_response = await asyncio.to_thread(generate_call, messages)
 
     print(f"LLM raw response: {raw_response!r}", file=sys.stderr)
 
+    repairer = ToolCallRepairer(
+        index, count_tokens=lambda text: count_tokens(bundle, text)
+    )
     try:
-        poem_text = parse_tool_call(raw_response, tool_spec.name)
+        call = await asyncio.to_thread(
+            repairer.repair, raw_response, messages, generate_call
+        )
     except ValueError as exc:
+        connecting.cancel()
         print(f"LLM output: {raw_response!r}", file=sys.stderr)
         sys.exit(f"Invalid tool call: {exc}")
+    stats = repairer.stats()
+    if stats.repaired:
+        how = "locally" if stats.local_fixes else "by re-prompting"
+        print(
+            f"Repaired tool call {how} ({stats.extra_tokens} extra tokens)",
+            file=sys.stderr,
+        )
 
-    tool_call_json = json.dumps({"tool": tool_spec.name, "args": {"text": poem_text}})
+    poem_text = call.text
+    tool_args = _tool_arguments(call, index[call.tool])
+    tool_call_json = json.dumps({"tool": call.tool, "args": tool_args})
 
     print("LLM selected tool:", tool_call_json, file=sys.stderr)
 
-    proc = subprocess.Popen(
-        ["uv", "run", "python", "-m", "cowsay_mcp.main"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-
-    # Write the tool call JSON generated by LLM to stdin.
-    # Read the server's JSON-RPC response from stdout.
-    stdout_data, stderr_data = proc.communicate(tool_call_json)
-
-    if stderr_data:
-        print(f"MCP Server Error: {stderr_data}", file=sys.stderr)
-
-    # FastMCP returns a JSON-RPC response, so parse it.
     try:
-        response_data = json.loads(stdout_data)
-        result = response_data.get("result")
+        await connecting
+        result = await client.call_tool(call.tool, tool_args)
         if not result:
-            raise ValueError(f"MCP response missing 'result': {stdout_data}")
-    except (json.JSONDecodeError, ValueError):
-        print(f"Failed to parse MCP response: {stdout_data!r}", file=sys.stderr)
+            raise ToolCallError(f"MCP response missing 'result': {result!r}")
+    except ToolCallError as exc:
+        print(f"MCP Server Error: {exc}", file=sys.stderr)
         sys.exit("MCP communication error")
 
     print("\nTool executed result:")
-    print(result)
+    print(_tool_output(result))
 
-    explanation = chat_once(
+    explanation = await asyncio.to_thread(
+        chat_once,
         bundle,
         [
             {"role": "system", "content": POEM_ANALYST_PROMPT},
             {"role": "user", "content": poem_text},
         ],
-        temperature=0.3,
+        temperature=0.0 if deterministic else 0.3,
     )
     print("\nPoem explanation:")
     print(explanation)
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Tuple
+
+"""Process-wide registry of loaded model bundles with warm-up, a memory budget and load metrics."""
+
+ModelBundle = Tuple[object, object]
+ModelKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class ModelStats:
+    """Counters for one loaded model."""
+
+    model_id: str
+    options: str
+    bytes: int
+    load_seconds: float
+    warmup_seconds: float
+    hits: int
+
+
+@dataclass(frozen=True)
+class RegistryStats:
+    """Snapshot of registry counters; `models` is ordered least recently used first."""
+
+    loads: int
+    hits: int
+    evictions: int
+    bytes: int
+    load_seconds: float
+    models: tuple[ModelStats, ...]
+
+
+class _Loaded:
+    __slots__ = ("bundle", "bytes", "load_seconds", "warmup_seconds", "hits")
+
+    def __init__(
+        self, bundle: ModelBundle, size: int, load_seconds: float, warmup: float
+    ) -> None:
+        self.bundle = bundle
+        self.bytes = size
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup
+        self.hits = 0
+
+
+def parameter_bytes(bundle: ModelBundle) -> int:
+    """Bytes held by an mlx model's parameters, or 0 when they cannot be measured."""
+
+    parameters = getattr(bundle[0], "parameters", None)
+    if not callable(parameters):
+        return 0
+    try:
+        from mlx.utils import tree_flatten
+    except ImportError:
+        return 0
+    return sum(int(array.nbytes) for _, array in tree_flatten(parameters()))
+
+
+def model_key(model_id: str, options: Mapping[str, Any]) -> ModelKey:
+    """Registry key: the model id plus its load options in a canonical form."""
+
+    return model_id, json.dumps(options, sort_keys=True, default=repr)
+
+
+class ModelRegistry:
+    """Loaded models keyed on (model id, load options), shared by the whole process.
+
+    The first `get` for a key loads the model and, unless disabled, warms it
+    up with a short generation so kernels are compiled before real traffic.
+    Concurrent requests for the same key wait for that single load. With a
+    `memory_budget` in bytes, least recently used models are dropped until
+    the loaded total fits again; the most recently requested model is always
+    kept, even when it alone exceeds the budget.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[..., ModelBundle],
+        *,
+        warmup: Callable[[ModelBundle], object] | None = None,
+        memory_budget: int | None = None,
+        size_of: Callable[[ModelBundle], int] = parameter_bytes,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._loader = loader
+        self._warmup = warmup
+        self.memory_budget = memory_budget
+        self._size_of = size_of
+        self._clock = clock
+        self._models: OrderedDict[ModelKey, _Loaded] = OrderedDict()
+        self._loading: dict[ModelKey, threading.Lock] = {}
+        self._loads = 0
+        self._hits = 0
+        self._evictions = 0
+        self._load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str, *, warmup: bool = True, **options: Any) -> ModelBundle:
+        """Return the loaded bundle, loading (and warming up) it on first use."""
+
+        key = model_key(model_id, options)
+        loaded = self._lookup(key)
+        if loaded is not None:
+            return loaded.bundle
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            loaded = self._lookup(key)
+            if loaded is not None:
+                return loaded.bundle
+            try:
+                loaded = self._load(model_id, options, warmup)
+                # Publish before dropping the key lock, so a caller arriving
+                # after the `_loading` entry is gone finds the model loaded.
+                with self._lock:
+                    self._models[key] = loaded
+                    self._loads += 1
+                    self._load_seconds += loaded.load_seconds + loaded.warmup_seconds
+                    self._enforce_budget()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return loaded.bundle
+
+    def _lookup(self, key: ModelKey) -> _Loaded | None:
+        with self._lock:
+            loaded = self._models.get(key)
+            if loaded is not None:
+                self._models.move_to_end(key)
+                loaded.hits += 1
+                self._hits += 1
+            return loaded
+
+    def _load(self, model_id: str, options: Mapping[str, Any], warmup: bool) -> _Loaded:
+        start = self._clock()
+        bundle = self._loader(model_id, **options)
+        loaded_at = self._clock()
+        if warmup and self._warmup is not None:
+            self._warmup(bundle)
+        warmed_at = self._clock()
+        return _Loaded(
+            bundle, self._size_of(bundle), loaded_at - start, warmed_at - loaded_at
+        )
+
+    def _enforce_budget(self) -> None:
+        budget = self.memory_budget
+        if budget is None:
+            return
+        total = sum(loaded.bytes for loaded in self._models.values())
+        while total > budget and len(self._models) > 1:
+            _, evicted = self._models.popitem(last=False)
+            total -= evicted.bytes
+            self._evictions += 1
+
+    def evict(self, model_id: str, **options: Any) -> bool:
+        """Drop a loaded model; returns whether it was loaded."""
+
+        with self._lock:
+            return self._models.pop(model_key(model_id, options), None) is not None
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            models = tuple(
+                ModelStats(
+                    model_id=model_id,
+                    options=options,
+                    bytes=loaded.bytes,
+                    load_seconds=loaded.load_seconds,
+                    warmup_seconds=loaded.warmup_seconds,
+                    hits=loaded.hits,
+                )
+                for (model_id, options), loaded in self._models.items()
+            )
+            return RegistryStats(
+                loads=self._loads,
+                hits=self._hits,
+                evictions=self._evictions,
+                bytes=sum(model.bytes for model in models),
+                load_seconds=self._load_seconds,
+                models=models,
+            )
+
+    def clear(self) -> None:
+        """Drop every loaded model and reset the counters."""
+
+        with self._lock:
+            self._models.clear()
+            self._loads = self._hits = self._evictions = 0
+            self._load_seconds = 0.0
+
+
+__all__ = [
+    "ModelRegistry",
+    "ModelStats",
+    "RegistryStats",
+    "model_key",
+    "parameter_bytes",
+]
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import copy
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Protocol, Sequence
+
+"""LRU cache of processed prompt prefixes so a shared system prompt is prefilled once per model."""
+
+DEFAULT_MAX_PREFIXES = 8
+
+
+class PrefixBackend(Protocol):
+    """What the cache needs from a model: tokenize, prefill, copy state and generate."""
+
+    def encode(self, text: str) -> list[int]:
+        """Tokenize `text` exactly as a full prompt would be tokenized."""
+
+    def encode_suffix(self, text: str) -> list[int]:
+        """Tokenize `text` as the continuation of a prompt, without leading special tokens."""
+
+    def prefill(self, tokens: Sequence[int]) -> Any:
+        """Run the model over `tokens` and return the processed (KV) state."""
+
+    def fork(self, state: Any) -> Any:
+        """Return a copy of `state` that generation may extend without touching the original."""
+
+    def generate(self, state: Any, tokens: Sequence[int], **kwargs: object) -> str:
+        """Continue from `state` (None for an empty one) with `tokens` and decode a response."""
+
+    def stream(
+        self, state: Any, tokens: Sequence[int], **kwargs: object
+    ) -> Iterator[str]:
+        """Like `generate`, but yield the response piece by piece."""
+
+
+class _Prefix:
+    __slots__ = ("tokens", "boundary", "state", "prefilled")
+
+    def __init__(self, tokens: tuple[int, ...]) -> None:
+        self.tokens = tokens
+        # Whether prompts tokenize as these tokens plus their own suffix;
+        # None until checked against the first full prompt.
+        self.boundary: bool | None = None
+        self.state: Any = None
+        self.prefilled = False
+
+
+@dataclass(frozen=True)
+class PrefixCacheStats:
+    """Snapshot of prefix cache counters."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    reused_tokens: int
+
+
+class PromptPrefixCache:
+    """Processed prompt prefixes for one model, bounded to `max_entries` by LRU.
+
+    A prompt is split into a cacheable prefix (the rendered system messages)
+    and the rest. The prefix is tokenized and prefilled once; later prompts
+    that start with the same tokens fork that state and only process their
+    own suffix. If the full prompt does not tokenize with the prefix tokens
+    at its start, the prompt is generated from scratch rather than risk a
+    wrong continuation.
+    """
+
+    def __init__(
+        self, backend: PrefixBackend, max_entries: int = DEFAULT_MAX_PREFIXES
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+        self.backend = backend
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Prefix] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reused_tokens = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prefix: str, prompt: str, **kwargs: object) -> str:
+        """Generate a response to `prompt`, reusing the processed state of `prefix`."""
+
+        state, tokens = self._resume(prefix, prompt)
+        return self.backend.generate(state, tokens, **kwargs)
+
+    def stream(self, prefix: str, prompt: str, **kwargs: object) -> Iterator[str]:
+        """Stream a response to `prompt`, reusing the processed state of `prefix`."""
+
+        state, tokens = self._resume(prefix, prompt)
+        return self.backend.stream(state, tokens, **kwargs)
+
+    def encode(self, prefix: str, prompt: str) -> list[int]:
+        """Tokens of `prompt`, reusing the cached tokens of its leading `prefix`.
+
+        The first prompt seen with a prefix is encoded in full and compared
+        with the prefix tokens followed by its encoded suffix. When they
+        agree, the prefix ends on a token boundary and later prompts only
+        encode the text after it; otherwise every prompt is encoded whole.
+        Prompts are rendered chat messages, so the text after a prefix
+        always starts with the next role label.
+        """
+        if not prefix or not prompt.startswith(prefix):
+            return self.backend.encode(prompt)
+        entry = self._entry(prefix)
+        suffix = prompt[len(prefix) :]
+        if entry.boundary:
+            return [*entry.tokens, *self.backend.encode_suffix(suffix)]
+        tokens = self.backend.encode(prompt)
+        if entry.boundary is None:
+            entry.boundary = tokens == [
+                *entry.tokens,
+                *self.backend.encode_suffix(suffix),
+            ]
+        return tokens
+
+    def _resume(self, prefix: str, prompt: str) -> tuple[Any, Sequence[int]]:
+        """The state to continue from and the prompt tokens it has not seen yet."""
+
+        tokens = self.encode(prefix, prompt)
+        if not prefix or not prompt.startswith(prefix):
+            return None, tokens
+        cached = self._prefix(prefix)
+        size = len(cached.tokens)
+        if not size or size >= len(tokens) or tuple(tokens[:size]) != cached.tokens:
+            return None, tokens
+        with self._lock:
+            self._reused_tokens += size
+        return self.backend.fork(cached.state), tokens[size:]
+
+    def _entry(self, prefix: str) -> _Prefix:
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is not None:
+                self._entries.move_to_end(prefix)
+                return entry
+
+        entry = _Prefix(tuple(self.backend.encode(prefix)))
+        with self._lock:
+            entry = self._entries.setdefault(prefix, entry)
+            self._entries.move_to_end(prefix)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return entry
+
+    def _prefix(self, prefix: str) -> _Prefix:
+        entry = self._entry(prefix)
+        with self._lock:
+            if entry.prefilled:
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        state = self.backend.prefill(entry.tokens) if entry.tokens else None
+        with self._lock:
+            entry.state, entry.prefilled = state, True
+        return entry
+
+    def stats(self) -> PrefixCacheStats:
+        with self._lock:
+            return PrefixCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                reused_tokens=self._reused_tokens,
+            )
+
+    def clear(self) -> None:
+        """Drop all prefixes and reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._reused_tokens = 0
+
+
+class MlxPrefixBackend:
+    """Prefix backend on top of mlx-lm's prompt (KV) cache."""
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        generate_fn: Callable[..., str],
+        stream_fn: Callable[..., Iterator[str]] | None = None,
+    ) -> None:
+        self.model = model
+        self.tokenizer = tokenizer
+        self.generate_fn = generate_fn
+        self.stream_fn = stream_fn
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            from mlx_lm.models.cache import make_prompt_cache  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def encode(self, text: str) -> list[int]:
+        return list(self.tokenizer.encode(text))
+
+    def encode_suffix(self, text: str) -> list[int]:
+        try:
+            return list(self.tokenizer.encode(text, add_special_tokens=False))
+        except TypeError:  # tokenizer without special-token options
+            return self.encode(text)
+
+    def prefill(self, tokens: Sequence[int]) -> Any:
+        import mlx.core as mx
+        from mlx_lm.models.cache import make_prompt_cache
+
+        cache = make_prompt_cache(self.model)
+        self.model(mx.array(tokens)[None], cache=cache)
+        mx.eval([entry.state for entry in cache])
+        return cache
+
+    def fork(self, state: Any) -> Any:
+        return copy.deepcopy(state)
+
+    def generate(self, state: Any, tokens: Sequence[int], **kwargs: object) -> str:
+        if state is not None:
+            kwargs["prompt_cache"] = state
+        return self.generate_fn(self.model, self.tokenizer, list(tokens), **kwargs)
+
+    def stream(
+        self, state: Any, tokens: Sequence[int], **kwargs: object
+    ) -> Iterator[str]:
+        if self.stream_fn is None:
+            return iter([self.generate(state, tokens, **kwargs)])
+        if state is not None:
+            kwargs["prompt_cache"] = state
+        return self.stream_fn(self.model, self.tokenizer, list(tokens), **kwargs)
+
+
+class FakePrefixBackend:
+    """Deterministic stand-in for tests: one token per character, state is the token tuple.
+
+    `encoded`, `prefilled` and `processed` count the characters tokenized and
+    the tokens run through prefill and generation, so tests can check how
+    much work the cache saved.
+    """
+
+    def __init__(self, reply: str = "ok") -> None:
+        self.reply = reply
+        self.encoded = 0
+        self.prefilled = 0
+        self.processed = 0
+        self.calls: list[tuple[int, int]] = []
+
+    def encode(self, text: str) -> list[int]:
+        self.encoded += len(text)
+        return [ord(char) for char in text]
+
+    def encode_suffix(self, text: str) -> list[int]:
+        return self.encode(text)
+
+    def prefill(self, tokens: Sequence[int]) -> tuple[int, ...]:
+        self.prefilled += len(tokens)
+        return tuple(tokens)
+
+    def fork(self, state: tuple[int, ...]) -> tuple[int, ...]:
+        return state
+
+    def generate(self, state: Any, tokens: Sequence[int], **kwargs: object) -> str:
+        self.processed += len(tokens)
+        self.calls.append((len(state or ()), len(tokens)))
+        return self.reply
+
+    def stream(
+        self, state: Any, tokens: Sequence[int], **kwargs: object
+    ) -> Iterator[str]:
+        yield from self.generate(state, tokens, **kwargs)
+
+
+__all__ = [
+    "DEFAULT_MAX_PREFIXES",
+    "FakePrefixBackend",
+    "MlxPrefixBackend",
+    "PrefixBackend",
+    "PrefixCacheStats",
+    "PromptPrefixCache",
+]
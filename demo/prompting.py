@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import textwrap
-from typing import Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from .catalog import summary_line
 
 """Helper utilities for prompts, parsing, and explanations in the demo."""
 
 THEMES = ["nature", "technology", "emotions", "adventure", "creativity"]
 
+MAX_COMPILED_PROMPTS = 32
+
 POEM_ANALYST_PROMPT = textwrap.dedent(
     """
     You are a poem analyst. Based on the poem provided by the user, summarize the theme, imagery, and emotional resonance in 3 sentences or fewer using natural English.
@@ -46,7 +54,7 @@ def summarise_parameters(schema: dict[str, Any] | None) -> str:
     return "; ".join(parts)
 
 
-def build_system_prompt(tool: Any) -> str:
+def render_system_prompt(tool: Any) -> str:
     """Create the system prompt that reflects the actual tool metadata."""
 
     tags = summarise_tags(tool)
@@ -74,14 +82,152 @@ def build_system_prompt(tool: Any) -> str:
     return textwrap.dedent(prompt).strip()
 
 
-def build_initial_messages(theme: str, tool: Any) -> list[dict[str, str]]:
-    """Assemble the conversation history for the first LLM turn."""
+def _placeholder(spec: Any) -> Any:
+    kind = (spec or {}).get("type") if isinstance(spec, dict) else None
+    if kind == "array":
+        return ["..."]
+    if kind in ("integer", "number"):
+        return 0
+    return "..."
+
+
+def render_catalog_prompt(tools: Sequence[Any]) -> str:
+    """A compact system prompt offering several tools, one line each.
+
+    Each entry is the first sentence of the description plus the required
+    arguments, so the prompt grows by one short line per offered tool.
+    """
+    lines = []
+    for tool in tools:
+        schema = getattr(tool, "parameters", None) or {}
+        properties = schema.get("properties") or {}
+        required = [name for name in schema.get("required") or () if name in properties]
+        example_args = {
+            name: _placeholder(properties[name]) for name in required or properties
+        }
+        lines.append(
+            f"- {tool.name}: {summary_line(tool)} "
+            f"Args: {json.dumps(example_args, ensure_ascii=False)}"
+        )
+    catalog = "\n".join(lines)
+    return (
+        "You are an AI assistant that can use tools to enhance your responses.\n\n"
+        f"Available tools:\n{catalog}\n"
+        'Tool format: {"tool": "<name>", "args": {...}}\n\n'
+        "Use the tool that best makes the user's message more playful or expressive.\n\n"
+        "IMPORTANT: Respond ONLY with one JSON object in the exact format above.\n"
+        "Do not write explanations or any other text. Just JSON."
+    )
+
+
+def tool_fingerprint(tool: Any) -> str:
+    """Hash of everything the system prompt is built from.
+
+    Re-registering a tool with another description, tags or schema changes
+    the fingerprint, so prompts compiled for the old registration are not
+    reused.
+    """
+    tags = getattr(tool, "tags", None)
+    payload = json.dumps(
+        [
+            tool.name,
+            getattr(tool, "description", None),
+            sorted(tags) if tags else None,
+            getattr(tool, "parameters", None),
+        ],
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """The static system prompt of a tool spec (or catalog).
+
+    Its tokens are cached per model by the prefix cache (`demo.prefix_cache`),
+    which keys on the rendered system messages.
+    """
+
+    fingerprint: str
+    tool_names: tuple[str, ...]
+    system_prompt: str
+
 
-    system_prompt = build_system_prompt(tool)
-    user_prompt = (
+_COMPILED: OrderedDict[str, CompiledPrompt] = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+
+
+def compile_prompt(tool: Any | Sequence[Any]) -> CompiledPrompt:
+    """The compiled prompt for `tool`, rendered once per fingerprint.
+
+    A sequence of several tools compiles to a catalog prompt keyed on all of
+    their fingerprints. The most recently used `MAX_COMPILED_PROMPTS`
+    fingerprints are kept.
+    """
+    tools = list(tool) if isinstance(tool, (list, tuple)) else [tool]
+    if len(tools) == 1:
+        fingerprint = tool_fingerprint(tools[0])
+    else:
+        fingerprint = "catalog:" + ",".join(map(tool_fingerprint, tools))
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(fingerprint)
+        if compiled is not None:
+            _COMPILED.move_to_end(fingerprint)
+            return compiled
+    compiled = CompiledPrompt(
+        fingerprint,
+        tuple(item.name for item in tools),
+        (
+            render_system_prompt(tools[0])
+            if len(tools) == 1
+            else render_catalog_prompt(tools)
+        ),
+    )
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.setdefault(fingerprint, compiled)
+        _COMPILED.move_to_end(fingerprint)
+        while len(_COMPILED) > MAX_COMPILED_PROMPTS:
+            _COMPILED.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_prompts() -> None:
+    """Forget every compiled prompt."""
+
+    with _COMPILED_LOCK:
+        _COMPILED.clear()
+
+
+def build_system_prompt(tool: Any) -> str:
+    """The system prompt for `tool`, from the compiled prompt cache."""
+
+    return compile_prompt(tool).system_prompt
+
+
+def task_prompt(theme: str, tool_choice: str) -> str:
+    """The user's request for a poem about `theme`, shown with `tool_choice`."""
+
+    return (
         f"Write exactly one short poem about {theme}, add an appropriate emoji at the beginning, "
-        f"and display it using {tool.name}."
+        f"and display it using {tool_choice}."
     )
+
+
+def build_initial_messages(
+    theme: str, tool: Any | CompiledPrompt
+) -> list[dict[str, str]]:
+    """Assemble the conversation history for the first LLM turn.
+
+    `tool` may also be a list of tools to offer, or a `CompiledPrompt`, which
+    skips fingerprinting the tools for every theme.
+    """
+
+    compiled = tool if isinstance(tool, CompiledPrompt) else compile_prompt(tool)
+    system_prompt = compiled.system_prompt
+    names = compiled.tool_names
+    tool_choice = names[0] if len(names) == 1 else "the most suitable tool"
+    user_prompt = task_prompt(theme, tool_choice)
     return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt},
@@ -89,6 +235,15 @@ def build_initial_messages(theme: str, tool: Any) -> list[dict[str, str]]:
 
 
 __all__ = [
+    "MAX_COMPILED_PROMPTS",
     "THEMES",
+    "CompiledPrompt",
     "build_initial_messages",
+    "build_system_prompt",
+    "clear_compiled_prompts",
+    "compile_prompt",
+    "render_catalog_prompt",
+    "render_system_prompt",
+    "task_prompt",
+    "tool_fingerprint",
 ]
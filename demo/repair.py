@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Iterator, Sequence
+
+from .llm import Message
+from .toolcall import ToolCall, decode_tool_call
+
+"""Repair of malformed tool calls: cheap local fixes first, then one re-prompt with the error."""
+
+_FENCE = re.compile(r"```[\w-]*\s*(.*?)```", re.DOTALL)
+# A JSON string (left alone) or a comma directly before a closing bracket.
+_TRAILING_COMMA = re.compile(r'"(?:\\.|[^"\\])*"|,(\s*[}\]])')
+
+_TOOL_KEYS = ("tool", "name", "tool_name")
+_ARGS_KEYS = ("args", "arguments", "parameters", "input")
+
+FEEDBACK_TEMPLATE = (
+    "That was not a valid tool call ({error}). Reply again with only the JSON "
+    "object, in the tool format from the system prompt."
+)
+
+
+@dataclass(frozen=True)
+class RepairStats:
+    """Snapshot of repair counters; `extra_tokens` counts feedback plus re-prompt replies."""
+
+    calls: int
+    clean: int
+    local_fixes: int
+    reprompt_fixes: int
+    failures: int
+    extra_tokens: int
+
+    @property
+    def repaired(self) -> int:
+        return self.local_fixes + self.reprompt_fixes
+
+    @property
+    def success_rate(self) -> float:
+        """Share of malformed calls that were repaired."""
+
+        attempts = self.repaired + self.failures
+        return self.repaired / attempts if attempts else 0.0
+
+
+def _strip_trailing_commas(text: str) -> str:
+    return _TRAILING_COMMA.sub(lambda match: match.group(1) or match.group(0), text)
+
+
+def _candidates(raw: str) -> Iterator[str]:
+    """Texts that may hold the tool call: fenced blocks first, then the whole response."""
+
+    for match in _FENCE.finditer(raw):
+        yield match.group(1)
+    yield raw
+
+
+def _decode_object(text: str) -> dict[str, Any] | None:
+    start = text.find("{")
+    if start == -1:
+        return None
+    decoder = json.JSONDecoder()
+    for attempt in (text[start:], _strip_trailing_commas(text[start:])):
+        try:
+            data, _ = decoder.raw_decode(attempt)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def normalise_tool_call(data: dict[str, Any]) -> dict[str, Any]:
+    """Map common alias layouts onto `{"tool": ..., "args": {...}}`.
+
+    Handles `{"name", "arguments"}`, OpenAI-style `{"function": {...}}`
+    wrappers and arguments given as a JSON-encoded string.
+    """
+    function = data.get("function")
+    if isinstance(function, dict) and "tool" not in data:
+        data = function
+    name = next((data[key] for key in _TOOL_KEYS if key in data), None)
+    args = next((data[key] for key in _ARGS_KEYS if key in data), {})
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            args = {"text": args}
+    return {"tool": name, "args": args if isinstance(args, dict) else {}}
+
+
+def repair_locally(raw_response: str, tools: str | Collection[str]) -> ToolCall:
+    """The call in a malformed response, or `ValueError` if no local fix helps.
+
+    Tries fenced code blocks, trailing-comma removal and alias keys. A call
+    that names a tool outside `tools` is never rewritten, so its error is
+    kept.
+    """
+    error: ValueError | None = None
+    for text in _candidates(raw_response):
+        data = _decode_object(text)
+        if data is None:
+            continue
+        try:
+            return decode_tool_call(json.dumps(normalise_tool_call(data)), tools)
+        except ValueError as exc:
+            error = error or exc
+    raise error or ValueError("No JSON found in LLM response")
+
+
+class ToolCallRepairer:
+    """Parses calls of `tools` (a name or a name index), repairing them and counting the cost.
+
+    `parse` accepts a well-formed call or one fixed locally. When it fails,
+    `feedback` builds the re-prompt (the original conversation plus the bad
+    reply and the error, so the system prompt prefix stays cached) and
+    `retry` parses the model's answer to it. `repair` runs that loop with a
+    blocking `chat` function.
+    """
+
+    def __init__(
+        self,
+        tools: str | Collection[str],
+        *,
+        count_tokens: Callable[[str], int] = lambda text: len(text.split()),
+        max_reprompts: int = 1,
+    ) -> None:
+        if max_reprompts < 0:
+            raise ValueError("max_reprompts must not be negative")
+        self.tools = tools
+        self.max_reprompts = max_reprompts
+        self._count_tokens = count_tokens
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._clean = 0
+        self._local = 0
+        self._reprompted = 0
+        self._failures = 0
+        self._extra_tokens = 0
+
+    def _parse(self, raw_response: str) -> tuple[ToolCall, bool]:
+        try:
+            return decode_tool_call(raw_response, self.tools), True
+        except ValueError as exc:
+            try:
+                return repair_locally(raw_response, self.tools), False
+            except ValueError:
+                raise exc from None
+
+    def parse(self, raw_response: str) -> ToolCall:
+        """A clean or locally repaired call; `ValueError` otherwise."""
+
+        with self._lock:
+            self._calls += 1
+        call, clean = self._parse(raw_response)
+        with self._lock:
+            if clean:
+                self._clean += 1
+            else:
+                self._local += 1
+        return call
+
+    def feedback(
+        self, messages: Sequence[Message], raw_response: str, error: Exception
+    ) -> list[Message]:
+        """The conversation to re-prompt with after `raw_response` failed with `error`."""
+
+        note = FEEDBACK_TEMPLATE.format(error=error)
+        with self._lock:
+            self._extra_tokens += self._count_tokens(note)
+        return [
+            *messages,
+            {"role": "assistant", "content": raw_response},
+            {"role": "user", "content": note},
+        ]
+
+    def retry(self, raw_response: str, *, final: bool = True) -> ToolCall:
+        """Parse a reply to `feedback`; a failure on the `final` attempt is counted."""
+
+        with self._lock:
+            self._extra_tokens += self._count_tokens(raw_response)
+        try:
+            call, _ = self._parse(raw_response)
+        except ValueError:
+            if final:
+                with self._lock:
+                    self._failures += 1
+            raise
+        with self._lock:
+            self._reprompted += 1
+        return call
+
+    def repair(
+        self,
+        raw_response: str,
+        messages: Sequence[Message],
+        chat: Callable[[list[Message]], str],
+    ) -> ToolCall:
+        """The decoded call, re-prompting through `chat` up to `max_reprompts` times.
+
+        Raises the last `ValueError` when every attempt fails.
+        """
+        try:
+            return self.parse(raw_response)
+        except ValueError as exc:
+            error = exc
+        if not self.max_reprompts:
+            with self._lock:
+                self._failures += 1
+            raise error
+        for attempt in range(1, self.max_reprompts + 1):
+            messages = self.feedback(messages, raw_response, error)
+            raw_response = chat(messages)
+            try:
+                return self.retry(raw_response, final=attempt == self.max_reprompts)
+            except ValueError as exc:
+                error = exc
+        raise error
+
+    def stats(self) -> RepairStats:
+        with self._lock:
+            return RepairStats(
+                calls=self._calls,
+                clean=self._clean,
+                local_fixes=self._local,
+                reprompt_fixes=self._reprompted,
+                failures=self._failures,
+                extra_tokens=self._extra_tokens,
+            )
+
+
+__all__ = [
+    "FEEDBACK_TEMPLATE",
+    "RepairStats",
+    "ToolCallRepairer",
+    "normalise_tool_call",
+    "repair_locally",
+]
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+"""On-disk cache of deterministic model responses, stored as an append-only SQLite log."""
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key BLOB NOT NULL UNIQUE,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class ResponseCacheStats:
+    """Snapshot of response cache counters."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def response_key(model: str, prompt: str, params: Mapping[str, Any]) -> bytes:
+    """Digest of everything that determines a deterministic response."""
+
+    payload = json.dumps([model, prompt, params], sort_keys=True, default=repr)
+    return hashlib.blake2b(
+        payload.encode("utf-8", "surrogatepass"), digest_size=20
+    ).digest()
+
+
+class ResponseCache:
+    """Responses keyed on `response_key`, bounded to `max_bytes` of stored text.
+
+    Rows are only ever appended or deleted: lookups do not write, and when the
+    stored text exceeds `max_bytes` the oldest rows are dropped first. The
+    database uses WAL mode so concurrent demo runs can share one file; the
+    stored total is summed inside each write transaction rather than kept
+    in memory, so the bound holds for writes from every process.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return row[0]
+
+    def put(self, key: bytes, value: str) -> None:
+        size = len(value.encode("utf-8", "surrogatepass"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Take the write lock up front so no other process changes the
+            # total between the insert and the eviction below.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO responses (key, value, size) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, size),
+                )
+                if cursor.rowcount:
+                    self._evict()
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+
+    def _totals(self) -> tuple[int, int]:
+        entries, stored = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return int(entries), int(stored)
+
+    def _evict(self) -> None:
+        _, stored = self._totals()
+        excess = stored - self.max_bytes
+        if excess <= 0:
+            return
+        rows = self._db.execute("SELECT seq, size FROM responses ORDER BY seq")
+        last_seq, freed, dropped = 0, 0, 0
+        for seq, size in rows:
+            if freed >= excess:
+                break
+            last_seq, freed, dropped = seq, freed + size, dropped + 1
+        self._db.execute("DELETE FROM responses WHERE seq <= ?", (last_seq,))
+        self._evictions += dropped
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            entries, stored = self._totals()
+            return ResponseCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=entries,
+                bytes=stored,
+            )
+
+    def clear(self) -> None:
+        """Delete every stored response and reset the counters."""
+
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._hits = self._misses = self._evictions = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+__all__ = [
+    "DEFAULT_MAX_BYTES",
+    "ResponseCache",
+    "ResponseCacheStats",
+    "response_key",
+]
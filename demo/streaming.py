@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+"""Incremental detection of the tool-call JSON object in a streamed model response."""
+
+_OBJECT_SPECIAL = re.compile(r'[{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class ToolCallScanner:
+    """Finds where the first top-level JSON object in a stream of chunks ends.
+
+    Chunks are scanned once, jumping between braces and quotes, so feeding a
+    response costs O(length) in total regardless of how it is split. Braces
+    inside strings (including escaped quotes) do not count.
+    """
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> int | None:
+        """Consume `chunk`; return the offset just past the closing brace once the object is complete."""
+
+        if self.complete:
+            return 0
+        pos, size = 0, len(chunk)
+        if self.escape and size:
+            self.escape = False
+            pos = 1
+        while pos < size:
+            if self.depth == 0:
+                pos = chunk.find("{", pos)
+                if pos == -1:
+                    return None
+                self.depth = 1
+                pos += 1
+            elif self.in_string:
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                if match.group() == '"':
+                    self.in_string = False
+                elif pos == size:
+                    self.escape = True
+                else:
+                    pos += 1
+            else:
+                match = _OBJECT_SPECIAL.search(chunk, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                token = match.group()
+                if token == '"':
+                    self.in_string = True
+                elif token == "{":
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.complete = True
+                        return pos
+        return None
+
+
+def take_until_tool_call(chunks: Iterable[str]) -> str:
+    """Join streamed chunks up to the end of the first JSON object, then stop the stream.
+
+    Whatever the model would have generated after the closing brace is never
+    requested; if the stream ends first, the whole response is returned.
+    """
+    scanner = ToolCallScanner()
+    parts: list[str] = []
+    stream = iter(chunks)
+    try:
+        for chunk in stream:
+            end = scanner.feed(chunk)
+            if end is not None:
+                parts.append(chunk[:end])
+                break
+            parts.append(chunk)
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return "".join(parts)
+
+
+__all__ = ["ToolCallScanner", "take_until_tool_call"]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Collection, NamedTuple
+
+"""Parsing of the JSON tool call the model answers with."""
+
+
+class ToolCall(NamedTuple):
+    """A decoded call: the tool name, its arguments and the text they carry."""
+
+    tool: str
+    args: dict[str, Any]
+    text: str
+
+
+def tool_text(args: dict[str, Any]) -> str:
+    """The text a call displays: `text`, or the lines of a batch call's `texts`."""
+
+    text = args.get("text", "")
+    if not text and isinstance(args.get("texts"), list):
+        text = "\n".join(str(line) for line in args["texts"])
+    text = text.strip() if isinstance(text, str) else ""
+    if not text:
+        raise ValueError("Tool call did not include text")
+    return text
+
+
+def decode_tool_call(raw_response: str, tools: str | Collection[str]) -> ToolCall:
+    """Decode the first JSON object in `raw_response` as a call of one of `tools`.
+
+    `tools` is one tool name or a name index such as a `ToolCatalog`; the
+    requested name is dispatched with a single membership lookup.
+    """
+    start = raw_response.find("{")
+    if start == -1:
+        raise ValueError("No JSON found in LLM response")
+
+    data, _ = json.JSONDecoder().raw_decode(raw_response[start:])
+    names = (tools,) if isinstance(tools, str) else tools
+    name = data.get("tool")
+    if not isinstance(name, str) or name not in names:
+        raise ValueError(f"Unexpected tool requested: {name}")
+
+    args = data.get("args", {})
+    if not isinstance(args, dict):
+        raise ValueError("Tool call args must be a JSON object")
+    return ToolCall(name, args, tool_text(args))
+
+
+def parse_tool_call(raw_response: str, expected_tool: str | Collection[str]) -> str:
+    """Extract the poem text from the assistant's JSON tool call."""
+
+    return decode_tool_call(raw_response, expected_tool).text
+
+
+__all__ = ["ToolCall", "decode_tool_call", "parse_tool_call", "tool_text"]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import unicodedata
+from pathlib import Path
+
+"""Generate `cowsay_mcp/_width_table.py` from the running interpreter's Unicode database."""
+
+
+OUTPUT = Path(__file__).resolve().parents[1] / "src" / "cowsay_mcp" / "_width_table.py"
+
+# Hangul Jamo medial vowels and final consonants combine into the preceding syllable.
+_JAMO_COMBINING = ((0x1160, 0x11FF), (0xD7B0, 0xD7FF))
+
+
+def cell_width(codepoint: int) -> int:
+    """Terminal cells taken by a single code point, ignoring sequences."""
+
+    char = chr(codepoint)
+    category = unicodedata.category(char)
+    if category in ("Mn", "Me") or (category == "Cf" and codepoint != 0x00AD):
+        return 0
+    if any(lo <= codepoint <= hi for lo, hi in _JAMO_COMBINING):
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+    return 1
+
+
+def ranges(width: int) -> list[tuple[int, int]]:
+    """Collapse every code point of the given width into inclusive ranges."""
+
+    result: list[tuple[int, int]] = []
+    start = None
+    for codepoint in range(sys.maxunicode + 2):
+        matches = codepoint <= sys.maxunicode and cell_width(codepoint) == width
+        if matches and start is None:
+            start = codepoint
+        elif not matches and start is not None:
+            result.append((start, codepoint - 1))
+            start = None
+    return result
+
+
+def _format(name: str, spans: list[tuple[int, int]]) -> str:
+    rows = "".join(f"    (0x{lo:05X}, 0x{hi:05X}),\n" for lo, hi in spans)
+    return f"{name}: Final[tuple[tuple[int, int], ...]] = (\n{rows})\n"
+
+
+def generate() -> str:
+    return (
+        "from __future__ import annotations\n\n"
+        "from typing import Final\n\n"
+        '"""Display-width ranges generated by scripts/gen_width_table.py; do not edit."""\n\n'
+        f'UNICODE_VERSION: Final[str] = "{unicodedata.unidata_version}"\n\n'
+        + _format("ZERO_WIDTH", ranges(0))
+        + "\n"
+        + _format("WIDE", ranges(2))
+        + '\n__all__ = ["UNICODE_VERSION", "WIDE", "ZERO_WIDTH"]\n'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Regenerate the display-width lookup table."
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT)
+    args = parser.parse_args()
+    args.output.write_text(generate(), encoding="utf-8")
+    print(f"wrote {args.output} (Unicode {unicodedata.unidata_version})")
+
+
+if __name__ == "__main__":
+    main()
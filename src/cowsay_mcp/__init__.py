@@ -1,7 +1,23 @@
 from __future__ import annotations
 
-from .server import run_cowsay
+from .render import render
+from .tools import (
+    run_cowsay,
+    run_cowsay_async,
+    run_cowsay_batch,
+    run_cowsay_batch_async,
+)
 
-"""cowsay_mcp package exposing reusable helpers for the cowsay MCP tool."""
+"""cowsay_mcp package exposing reusable helpers for the cowsay MCP tool.
 
-__all__ = ["run_cowsay"]
+The FastMCP server lives in `cowsay_mcp.server` and is only imported on demand
+so that the stdin pipe path stays cheap to start.
+"""
+
+__all__ = [
+    "render",
+    "run_cowsay",
+    "run_cowsay_async",
+    "run_cowsay_batch",
+    "run_cowsay_batch_async",
+]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+"""Content-addressed LRU cache for rendered speech bubbles, bounded by entry count and total bytes."""
+
+
+class CacheKey(NamedTuple):
+    character: str
+    width: int
+    digest: bytes
+
+
+class _Entry(NamedTuple):
+    value: str
+    size: int
+    expires_at: float | None
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of cache counters."""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(
+        text.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+
+
+def _size_of(value: str) -> int:
+    return (
+        len(value) if value.isascii() else len(value.encode("utf-8", "surrogatepass"))
+    )
+
+
+class RenderCache:
+    """Thread-safe LRU cache keyed on (character, text digest, wrap width).
+
+    Entries larger than `max_entry_bytes` are never stored so that a handful of
+    huge bubbles cannot push out many small, frequently repeated ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        *,
+        ttl: float | None = None,
+        max_entry_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 0 or max_bytes < 0:
+            raise ValueError("cache limits must not be negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = (
+            max_bytes // 16 if max_entry_bytes is None else max_entry_bytes
+        )
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def key(character: str, text: str, width: int) -> CacheKey:
+        return CacheKey(character, width, _digest(text))
+
+    def get(self, character: str, text: str, width: int) -> str | None:
+        """Return the cached render, or None on a miss."""
+
+        if not self.enabled:
+            return None
+        key = self.key(character, text, width)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self._clock():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, character: str, text: str, width: int, value: str) -> None:
+        """Store a render, evicting least recently used entries to stay in bounds."""
+
+        if not self.enabled:
+            return
+        size = _size_of(value)
+        if size > self.max_entry_bytes:
+            return
+        key = self.key(character, text, width)
+        expires_at = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def get_or_render(
+        self, character: str, text: str, width: int, render_fn: Callable[[], str]
+    ) -> str:
+        """Return the cached render or compute, store and return it."""
+
+        cached = self.get(character, text, width)
+        if cached is not None:
+            return cached
+        value = render_fn()
+        self.put(character, text, width, value)
+        return value
+
+    def discard_character(self, character: str) -> int:
+        """Drop every entry rendered with `character` and return how many were dropped."""
+
+        with self._lock:
+            stale = [key for key in self._entries if key.character == character]
+            for key in stale:
+                self._remove(key)
+        return len(stale)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+__all__ = ["CacheKey", "CacheStats", "RenderCache"]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Final, Mapping
+
+from cowsay import CHARS, CowsayError
+
+"""Registry of pre-parsed character templates: the `cowsay` built-ins plus an optional watched directory."""
+
+
+CHARACTER_SUFFIX: Final[str] = ".cow"
+
+
+@dataclass(frozen=True)
+class CompiledCharacter:
+    """A character template parsed once into the lines drawn under the bubble."""
+
+    name: str
+    lines: tuple[str, ...]
+    _tails: dict[int, str] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def tail(self, indent: int) -> str:
+        """Return the character block indented to sit under a bubble of `indent` columns."""
+
+        cached = self._tails.get(indent)
+        if cached is None:
+            pad = " " * indent
+            cached = pad + ("\n" + pad).join(self.lines) if self.lines else ""
+            self._tails[indent] = cached
+        return cached
+
+
+def compile_character(name: str, template: str) -> CompiledCharacter:
+    """Parse a raw cowsay template into its non-empty lines."""
+
+    return CompiledCharacter(
+        name=name, lines=tuple(line for line in template.split("\n") if line)
+    )
+
+
+@dataclass(frozen=True)
+class _CustomFile:
+    path: str
+    signature: tuple[int, int]
+    character: CompiledCharacter
+
+
+class CharacterRegistry:
+    """Name-indexed characters, compiled once and looked up in O(1).
+
+    Built-in templates are compiled when the registry is created. A custom
+    directory of `<name>.cow` files can be watched: at most once per
+    `poll_interval` seconds a lookup rescans the directory and recompiles only
+    files whose size or modification time changed. Custom characters shadow
+    built-ins of the same name; deleting the file restores the built-in.
+    Listeners are called with the name of every character that changed so
+    that caches of rendered output can drop stale entries.
+    """
+
+    def __init__(
+        self,
+        templates: Mapping[str, str] = CHARS,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._builtins: dict[str, CompiledCharacter] = {
+            name: compile_character(name, template)
+            for name, template in sorted(templates.items())
+        }
+        self._characters = dict(self._builtins)
+        self._custom: dict[str, _CustomFile] = {}
+        self._directory: str | None = None
+        self._poll_interval = 0.0
+        self._next_poll = 0.0
+        self._clock = clock
+        self._listeners: list[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CompiledCharacter:
+        """Return the compiled character, raising `CowsayError` like `cowsay` does."""
+
+        if self._directory is not None and self._clock() >= self._next_poll:
+            self.refresh()
+        character = self._characters.get(name)
+        if character is None:
+            raise CowsayError(f"Available Characters: {self.names()}")
+        return character
+
+    def names(self) -> list[str]:
+        return sorted(self._characters)
+
+    def describe(self) -> list[dict[str, str]]:
+        """Name and origin (`builtin` or the custom file path) of every character."""
+
+        if self._directory is not None and self._clock() >= self._next_poll:
+            self.refresh()
+        custom = self._custom
+        return [
+            {
+                "name": name,
+                "source": custom[name].path if name in custom else "builtin",
+            }
+            for name in self.names()
+        ]
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    def watch(self, directory: str, poll_interval: float = 2.0) -> set[str]:
+        """Load custom characters from `directory` and keep them up to date."""
+
+        self._directory = os.fspath(directory)
+        self._poll_interval = poll_interval
+        return self.refresh()
+
+    def refresh(self) -> set[str]:
+        """Rescan the watched directory and return the names that changed."""
+
+        directory = self._directory
+        if directory is None:
+            return set()
+        with self._lock:
+            self._next_poll = self._clock() + self._poll_interval
+            seen: dict[str, tuple[str, tuple[int, int]]] = {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith(CHARACTER_SUFFIX):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        name = entry.name[: -len(CHARACTER_SUFFIX)]
+                        seen[name] = (entry.path, (stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                pass
+
+            changed: set[str] = set()
+            for name in list(self._custom):
+                if name not in seen:
+                    del self._custom[name]
+                    self._restore(name)
+                    changed.add(name)
+            for name, (path, signature) in seen.items():
+                current = self._custom.get(name)
+                if current is not None and current.signature == signature:
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as handle:
+                        template = handle.read()
+                except OSError:
+                    continue
+                compiled = compile_character(name, template)
+                self._custom[name] = _CustomFile(path, signature, compiled)
+                self._characters[name] = compiled
+                changed.add(name)
+
+        for name in sorted(changed):
+            for listener in self._listeners:
+                listener(name)
+        return changed
+
+    def _restore(self, name: str) -> None:
+        builtin = self._builtins.get(name)
+        if builtin is None:
+            self._characters.pop(name, None)
+        else:
+            self._characters[name] = builtin
+
+
+registry = CharacterRegistry()
+
+
+__all__ = [
+    "CHARACTER_SUFFIX",
+    "CharacterRegistry",
+    "CompiledCharacter",
+    "compile_character",
+    "registry",
+]
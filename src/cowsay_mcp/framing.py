@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, BinaryIO, Callable
+
+"""Length-prefixed framing for the worker pipe, with JSON or msgpack payloads."""
+
+CODECS: tuple[str, ...] = ("json", "msgpack")
+
+# Every frame starts with its payload length as a 4-byte big-endian integer.
+HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+class FrameError(ValueError):
+    """Raised for a truncated, oversized or undecodable frame."""
+
+
+def _msgpack() -> Any:
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise RuntimeError(
+            "The msgpack codec needs the msgpack package (pip install msgpack)"
+        ) from exc
+    return msgpack
+
+
+def codec_functions(
+    codec: str,
+) -> tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """`(encode, decode)` for `codec`; msgpack is imported only when requested."""
+
+    if codec == "json":
+        return (
+            lambda message: json.dumps(message, ensure_ascii=False).encode("utf-8"),
+            json.loads,
+        )
+    if codec == "msgpack":
+        msgpack = _msgpack()
+        return (
+            lambda message: msgpack.packb(message, use_bin_type=True),
+            lambda payload: msgpack.unpackb(payload, raw=False),
+        )
+    raise ValueError(f"Unknown codec: {codec!r} (expected one of {CODECS})")
+
+
+def frame(payload: bytes) -> bytes:
+    """`payload` with its length header."""
+
+    if len(payload) > MAX_FRAME:
+        raise FrameError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME}")
+    return HEADER.pack(len(payload)) + payload
+
+
+def read_frame(stream: BinaryIO) -> bytes | None:
+    """The next payload from `stream`, or None at a clean end of stream.
+
+    An oversized frame is read past before `FrameError` is raised, so the
+    stream stays in step with the sender.
+    """
+
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise FrameError("Truncated frame header")
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME:
+        # Skip the payload so the next frame can still be read.
+        while size and (skipped := len(stream.read(min(size, 1 << 20)))):
+            size -= skipped
+        raise FrameError(f"Frame exceeds {MAX_FRAME} bytes")
+    payload = stream.read(size)
+    if len(payload) < size:
+        raise FrameError("Truncated frame payload")
+    return payload
+
+
+def serve_frames(stdin: BinaryIO, stdout: BinaryIO, codec: str = "json") -> int:
+    """Answer length-prefixed tool calls until EOF.
+
+    Requests and responses carry the same `{"tool", "args"}` /
+    `{"result"}` / `{"error"}` objects as the line protocol, including the
+    echoed `id`. Since every frame states its length, a client can write
+    many requests before reading any response; they are answered in order.
+    A request that cannot be read or a result too large to frame gets an
+    error response instead of stopping the loop, so calls still in flight
+    are answered. Returns the number of requests served.
+    """
+    from cowsay_mcp.main import handle_tool_call
+
+    encode, decode = codec_functions(codec)
+    served = 0
+    while True:
+        request_id = None
+        try:
+            payload = read_frame(stdin)
+            if payload is None:
+                return served
+            tool_call = decode(payload)
+            if isinstance(tool_call, dict):
+                request_id = tool_call.get("id")
+            response = {"id": request_id, "result": handle_tool_call(tool_call)}
+            data = frame(encode(response))
+        except Exception as e:
+            data = frame(encode({"id": request_id, "error": str(e)}))
+
+        stdout.write(data)
+        stdout.flush()
+        served += 1
+
+
+__all__ = [
+    "CODECS",
+    "HEADER",
+    "MAX_FRAME",
+    "FrameError",
+    "codec_functions",
+    "frame",
+    "read_frame",
+    "serve_frames",
+]
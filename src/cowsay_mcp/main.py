@@ -1,12 +1,216 @@
+import argparse
 import json
 import sys
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Sequence, TextIO
 
-from cowsay_mcp.server import server
+from cowsay_mcp.settings import TRANSPORTS, Settings
 
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
 
-def main() -> None:
+
+def __getattr__(name: str) -> Any:
+    # The FastMCP server is imported lazily so the pipe paths never pay for it.
+    if name == "server":
+        from cowsay_mcp.server import server
+
+        return server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _load_server() -> "FastMCP":
+    from cowsay_mcp.server import server
+
+    return server
+
+
+def handle_tool_call(tool_call: Any) -> Any:
+    """Execute a `{"tool", "args"}` tool call and return the tool output."""
+    if not isinstance(tool_call, dict):
+        raise ValueError("Tool call must be a JSON object")
+
+    tool_name = tool_call.get("tool")
+    args = tool_call.get("args", {})
+
+    if tool_name == "cowsay-mcp":
+        from cowsay_mcp.render import DEFAULT_CHARACTER
+        from cowsay_mcp.tools import render_cowsay
+
+        # Fail like the MCP tool does rather than answer with an error string.
+        try:
+            return render_cowsay(
+                args.get("text", ""), args.get("character", DEFAULT_CHARACTER)
+            )
+        except Exception as exc:
+            raise ValueError(f"cowsay error: {exc}") from exc
+    if tool_name == "cowsay-mcp-batch":
+        from cowsay_mcp.tools import run_cowsay_batch
+
+        return run_cowsay_batch(args.get("texts", []), args.get("characters"))
+    raise LookupError(f"Unknown tool: {tool_name}")
+
+
+def stream_tool_call(tool_call: Any) -> Iterator[str] | None:
+    """Return output lines for a large `cowsay-mcp` call, or None to answer it whole.
+
+    Invalid input raises here, before anything is written, like `handle_tool_call`.
+    """
+    if not isinstance(tool_call, dict) or tool_call.get("tool") != "cowsay-mcp":
+        return None
+    args = tool_call.get("args") or {}
+    text = args.get("text", "")
+
+    from cowsay_mcp.render import DEFAULT_CHARACTER
+    from cowsay_mcp.tools import settings, stream_cowsay
+
+    if not isinstance(text, str) or len(text) < settings.stream_threshold:
+        return None
+    try:
+        return stream_cowsay(text, args.get("character", DEFAULT_CHARACTER))
+    except Exception as exc:
+        raise ValueError(f"cowsay error: {exc}") from exc
+
+
+def write_streamed_result(
+    stdout: TextIO, head: dict[str, Any], lines: Iterable[str]
+) -> None:
+    """Write `{**head, "result": "\n".join(lines)}` as one JSON line, a line at a time.
+
+    The bytes match `json.dumps` of the complete response, so readers cannot
+    tell a streamed response from a buffered one.
+    """
+    stdout.write(json.dumps(head)[:-1] + (", " if head else "") + '"result": "')
+    for index, line in enumerate(lines):
+        if index:
+            stdout.write("\\n")
+        stdout.write(json.dumps(line)[1:-1])
+    stdout.write('"}\n')
+    stdout.flush()
+
+
+def serve_lines(stdin: TextIO, stdout: TextIO) -> int:
+    """Answer newline-delimited JSON tool calls until EOF.
+
+    Each request may carry an `id` which is echoed back so that callers can
+    match responses; every request produces exactly one response line.
+    Large `cowsay-mcp` results are written as they are rendered.
+    Returns the number of requests served.
+    """
+    served = 0
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        streamed = None
+        try:
+            tool_call = json.loads(line)
+            if isinstance(tool_call, dict):
+                request_id = tool_call.get("id")
+            streamed = stream_tool_call(tool_call)
+            if streamed is None:
+                response = {"id": request_id, "result": handle_tool_call(tool_call)}
+        except Exception as e:
+            streamed = None
+            response = {"id": request_id, "error": str(e)}
+
+        if streamed is not None:
+            write_streamed_result(stdout, {"id": request_id}, streamed)
+        else:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+        served += 1
+    return served
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    settings = Settings.from_env()
+    parser = argparse.ArgumentParser(
+        prog="python -m cowsay_mcp.main",
+        description="Run the cowsay MCP server or answer tool calls piped on stdin.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="serve newline-delimited JSON tool calls from stdin until EOF",
+    )
+    parser.add_argument(
+        "--framing",
+        choices=("lines", "json", "msgpack"),
+        default="lines",
+        help="worker protocol: JSON lines, or length-prefixed json/msgpack frames",
+    )
+    network = parser.add_argument_group(
+        "network transport", "defaults come from COWSAY_MCP_* environment variables"
+    )
+    network.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=settings.transport,
+        help="MCP transport to serve (default: %(default)s)",
+    )
+    network.add_argument("--host", default=settings.host, help="bind address")
+    network.add_argument("--port", type=int, default=settings.port, help="bind port")
+    network.add_argument(
+        "--path", default=settings.http_path, help="endpoint path (default: /mcp)"
+    )
+    network.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=settings.http_limit_concurrency,
+        help="maximum concurrent connections before answering 503",
+    )
+    network.add_argument(
+        "--keep-alive",
+        type=int,
+        default=settings.http_keep_alive,
+        help="seconds to keep idle HTTP connections open (default: %(default)s)",
+    )
+    network.add_argument(
+        "--stateless",
+        action=argparse.BooleanOptionalAction,
+        default=settings.http_stateless,
+        help="serve streamable HTTP without per-client sessions",
+    )
+    return parser.parse_args([] if argv is None else argv)
+
+
+def _run_network_server(options: argparse.Namespace) -> None:
+    uvicorn_config: dict[str, Any] = {"timeout_keep_alive": options.keep_alive}
+    if options.limit_concurrency:
+        uvicorn_config["limit_concurrency"] = options.limit_concurrency
+
+    transport_kwargs: dict[str, Any] = {
+        "host": options.host,
+        "port": options.port,
+        "path": options.path,
+        "uvicorn_config": uvicorn_config,
+    }
+    if options.transport == "http":
+        transport_kwargs["stateless_http"] = options.stateless
+    _load_server().run(transport=options.transport, **transport_kwargs)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
     """Start the FastMCP server or handle stdin tool call."""
-    if not sys.stdin.isatty():
+    options = _parse_args(argv)
+
+    if options.worker and options.framing != "lines":
+        # Long-lived worker speaking length-prefixed frames over binary stdio
+        from cowsay_mcp.framing import serve_frames
+
+        try:
+            serve_frames(sys.stdin.buffer, sys.stdout.buffer, options.framing)
+        except RuntimeError as exc:  # codec dependency missing
+            sys.exit(str(exc))
+    elif options.worker:
+        # Long-lived worker, one JSON response line per request line
+        serve_lines(sys.stdin, sys.stdout)
+    elif options.transport != "stdio":
+        # Network transport, stdin is not used for tool calls
+        _run_network_server(options)
+    elif not sys.stdin.isatty():
         # Input from pipe, handle as tool call
         try:
             input_data = sys.stdin.read().strip()
@@ -14,27 +218,20 @@ def main() -> None:
                 raise ValueError("No input data")
 
             tool_call = json.loads(input_data)
-            tool_name = tool_call.get("tool")
-            args = tool_call.get("args", {})
-
-            if tool_name == "cowsay-mcp":
-                from cowsay_mcp.server import run_cowsay
-
-                result = run_cowsay(args.get("text", ""))
-                response = {"result": result}
-                print(json.dumps(response))
-            else:
-                response = {"error": f"Unknown tool: {tool_name}"}
-                print(json.dumps(response), file=sys.stderr)
-                sys.exit(1)
+            streamed = stream_tool_call(tool_call)
+            if streamed is not None:
+                write_streamed_result(sys.stdout, {}, streamed)
+                return
+            response = {"result": handle_tool_call(tool_call)}
+            print(json.dumps(response))
         except Exception as e:
             response = {"error": str(e)}
             print(json.dumps(response), file=sys.stderr)
             sys.exit(1)
     else:
         # No pipe input, run as MCP server
-        server.run()
+        _load_server().run()
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
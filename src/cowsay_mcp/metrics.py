@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Final, Iterator
+
+"""Low-overhead per-tool call counters and HDR-style latency histograms."""
+
+
+SUB_BUCKET_BITS: Final[int] = 4
+_SUB_BUCKETS: Final[int] = 1 << SUB_BUCKET_BITS
+# Prometheus bucket bounds in seconds, derived from the histogram on export.
+PROMETHEUS_BOUNDS: Final[tuple[float, ...]] = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def bucket_index(value: int) -> int:
+    """Map a non-negative integer to its log-linear bucket.
+
+    Values below 2 * 2**SUB_BUCKET_BITS get exact buckets; above that every
+    power of two is split into 2**SUB_BUCKET_BITS equal sub-buckets, which
+    bounds the relative error to about 1/16.
+    """
+    length = value.bit_length()
+    if length <= SUB_BUCKET_BITS + 1:
+        return value
+    shift = length - SUB_BUCKET_BITS - 1
+    return (shift + 1) * _SUB_BUCKETS + (value >> shift) - _SUB_BUCKETS
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Largest value that falls into bucket `index`."""
+
+    if index < 2 * _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    mantissa = index % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations recorded in nanoseconds."""
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.minimum = 0
+        self.maximum = 0
+
+    def record(self, duration_ns: int) -> None:
+        duration_ns = max(0, duration_ns)
+        index = bucket_index(duration_ns)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or duration_ns < self.minimum:
+            self.minimum = duration_ns
+        if duration_ns > self.maximum:
+            self.maximum = duration_ns
+        self.count += 1
+        self.total += duration_ns
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound, in nanoseconds, of the bucket holding the pct-th value."""
+
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_upper_bound(index), self.maximum)
+        return self.maximum
+
+    def cumulative(self, bounds_ns: tuple[int, ...]) -> list[int]:
+        """Counts of values at or below each bound (bucket resolution)."""
+
+        ordered = sorted(self.counts.items())
+        result: list[int] = []
+        seen = 0
+        position = 0
+        for bound in bounds_ns:
+            while (
+                position < len(ordered)
+                and bucket_upper_bound(ordered[position][0]) <= bound
+            ):
+                seen += ordered[position][1]
+                position += 1
+            result.append(seen)
+        return result
+
+
+@dataclass
+class ToolStats:
+    """Counters for a single tool."""
+
+    calls: int = 0
+    errors: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def snapshot(self) -> dict[str, Any]:
+        latency = self.latency
+        mean = latency.total / latency.count if latency.count else 0.0
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency_ms": {
+                "mean": round(mean / 1e6, 4),
+                "min": round(latency.minimum / 1e6, 4),
+                "p50": round(latency.percentile(50) / 1e6, 4),
+                "p90": round(latency.percentile(90) / 1e6, 4),
+                "p99": round(latency.percentile(99) / 1e6, 4),
+                "max": round(latency.maximum / 1e6, 4),
+            },
+        }
+
+
+def payload_size(value: Any) -> int:
+    """Approximate UTF-8 size of a JSON-like payload without serialising it."""
+
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode("utf-8", "replace"))
+    if isinstance(value, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    if value is None:
+        return 0
+    return len(str(value))
+
+
+class MetricsRegistry:
+    """Thread-safe collection of `ToolStats` keyed by tool name."""
+
+    def __init__(self) -> None:
+        self._tools: dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        tool: str,
+        duration_ns: int,
+        *,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._tools.get(tool)
+            if stats is None:
+                stats = self._tools[tool] = ToolStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.latency.record(duration_ns)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                name: stats.snapshot() for name, stats in sorted(self._tools.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tools.clear()
+
+    def prometheus_lines(self, prefix: str = "cowsay_mcp") -> Iterator[str]:
+        """Yield the registry in the Prometheus text exposition format."""
+
+        with self._lock:
+            items = sorted(self._tools.items())
+            counters = [
+                (name, stats.calls, stats.errors, stats.bytes_in, stats.bytes_out)
+                for name, stats in items
+            ]
+            bounds_ns = tuple(int(bound * 1e9) for bound in PROMETHEUS_BOUNDS)
+            histograms = [
+                (
+                    name,
+                    stats.latency.cumulative(bounds_ns),
+                    stats.latency.count,
+                    stats.latency.total,
+                )
+                for name, stats in items
+            ]
+
+        for metric, index, kind, help_text in (
+            ("tool_calls_total", 1, "counter", "Tool calls handled."),
+            ("tool_errors_total", 2, "counter", "Tool calls that failed."),
+            ("tool_input_bytes_total", 3, "counter", "Bytes of tool arguments."),
+            ("tool_output_bytes_total", 4, "counter", "Bytes of tool results."),
+        ):
+            yield f"# HELP {prefix}_{metric} {help_text}"
+            yield f"# TYPE {prefix}_{metric} {kind}"
+            for row in counters:
+                yield f'{prefix}_{metric}{{tool="{_escape(row[0])}"}} {row[index]}'
+
+        name = f"{prefix}_tool_latency_seconds"
+        yield f"# HELP {name} Tool call latency."
+        yield f"# TYPE {name} histogram"
+        for tool, cumulative, count, total in histograms:
+            label = f'tool="{_escape(tool)}"'
+            for bound, seen in zip(PROMETHEUS_BOUNDS, cumulative):
+                yield f'{name}_bucket{{{label},le="{bound:g}"}} {seen}'
+            yield f'{name}_bucket{{{label},le="+Inf"}} {count}'
+            yield f"{name}_sum{{{label}}} {total / 1e9:.9f}"
+            yield f"{name}_count{{{label}}} {count}"
+
+    def render_prometheus(self, prefix: str = "cowsay_mcp") -> str:
+        return "\n".join(self.prometheus_lines(prefix)) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+__all__ = [
+    "LatencyHistogram",
+    "MetricsRegistry",
+    "ToolStats",
+    "bucket_index",
+    "bucket_upper_bound",
+    "payload_size",
+]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable, Sequence
+
+from .characters import CompiledCharacter
+from .render import DEFAULT_CHARACTER, DEFAULT_WIDTH, render
+
+"""Executor that moves large renders off the event loop while keeping small ones inline."""
+
+
+def gil_disabled() -> bool:
+    """Return True on free-threaded builds running without the GIL."""
+
+    is_gil_enabled: Callable[[], bool] | None = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _default_executor(max_workers: int) -> Executor:
+    if gil_disabled():
+        from concurrent.futures import ThreadPoolExecutor
+
+        return ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cowsay-render"
+        )
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # spawn avoids forking a process that already runs event-loop threads
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def render_items(
+    items: Sequence[tuple[str, str | CompiledCharacter]], width: int, cells: bool
+) -> list[tuple[str | None, str | None]]:
+    """`(result, None)` or `(None, error message)` for each `(text, character)` item."""
+
+    rendered: list[tuple[str | None, str | None]] = []
+    for text, character in items:
+        try:
+            rendered.append((render(text, character, width=width, cells=cells), None))
+        except Exception as exc:
+            rendered.append((None, str(exc)))
+    return rendered
+
+
+class RenderPool:
+    """Render texts of at least `threshold` characters on a worker pool.
+
+    The executor is created on first use, so processes that never see a large
+    input never pay for starting workers. A `max_workers` of 0 disables
+    offloading entirely.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        threshold: int,
+        *,
+        executor_factory: Callable[[int], Executor] = _default_executor,
+    ) -> None:
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self._executor_factory = executor_factory
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def should_offload(self, text: str) -> bool:
+        return self.max_workers > 0 and len(text) >= self.threshold
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory(self.max_workers)
+            return self._executor
+
+    async def render(
+        self,
+        text: str,
+        character: str | CompiledCharacter = DEFAULT_CHARACTER,
+        width: int = DEFAULT_WIDTH,
+        *,
+        cells: bool = False,
+    ) -> str:
+        """Render on the pool; callers decide beforehand whether to offload.
+
+        Pass a `CompiledCharacter` for characters that worker processes may
+        not know about, such as ones loaded from a custom directory.
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            partial(render, text, character, width=width, cells=cells),
+        )
+
+    async def render_many(
+        self,
+        items: Sequence[tuple[str, str | CompiledCharacter]],
+        width: int = DEFAULT_WIDTH,
+        *,
+        cells: bool = False,
+    ) -> list[tuple[str | None, str | None]]:
+        """Render several texts as one pool task, see `render_items`.
+
+        One item failing does not fail the others, so a batch costs a single
+        round trip to the worker however many of its items are bad.
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), partial(render_items, list(items), width, cells)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+__all__ = ["RenderPool", "gil_disabled", "render_items"]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Final, Iterator
+
+from cowsay import CowsayError
+
+from .characters import CompiledCharacter, compile_character, registry
+from .width import wrap_cells, wrap_line_cells, wrap_line_spans
+
+"""Native speech-bubble renderer that is byte-for-byte compatible with the `cowsay` package."""
+
+
+DEFAULT_CHARACTER: Final[str] = "cow"
+DEFAULT_WIDTH: Final[int] = 49
+
+
+def get_character(name: str | CompiledCharacter) -> CompiledCharacter:
+    """Return the registered character, raising `CowsayError` like `cowsay` does."""
+
+    if isinstance(name, CompiledCharacter):
+        return name
+    return registry.get(name)
+
+
+@lru_cache(maxsize=256)
+def _borders(text_width: int) -> tuple[str, str, str, str]:
+    """Return the top, opening, closing and bottom bubble borders for a width."""
+
+    return (
+        "  " + "_" * text_width,
+        " /" + " " * text_width + "\\",
+        " \\" + " " * text_width + "/",
+        "  " + "=" * text_width,
+    )
+
+
+def wrap_text(text: str, width: int = DEFAULT_WIDTH) -> list[str]:
+    """Split text into stripped, non-empty lines of at most `width` code points."""
+
+    wrapped: list[str] = []
+    for raw_line in text.split("\n"):
+        line = raw_line.strip()
+        if not line:
+            continue
+        if len(line) <= width:
+            wrapped.append(line)
+        else:
+            wrapped.extend(line[i : i + width] for i in range(0, len(line), width))
+    return wrapped
+
+
+def _line_spans(text: str) -> Iterator[tuple[int, int]]:
+    """Yield (start, end) offsets of each stripped, non-empty line without copying it."""
+
+    length = len(text)
+    pos = 0
+    while pos <= length:
+        end = text.find("\n", pos)
+        if end == -1:
+            end = length
+        lo, hi = pos, end
+        while lo < hi and text[lo].isspace():
+            lo += 1
+        while hi > lo and text[hi - 1].isspace():
+            hi -= 1
+        if lo < hi:
+            yield lo, hi
+        pos = end + 1
+
+
+def _stream_lines(
+    text: str,
+    compiled: CompiledCharacter,
+    width: int,
+    text_width: int,
+    multiline: bool,
+    cells: bool,
+) -> Iterator[str]:
+    top, opening, closing, bottom = _borders(text_width)
+    yield top
+    if multiline:
+        yield opening
+    for lo, hi in _line_spans(text):
+        if cells:
+            for chunk, used in wrap_line_cells(text[lo:hi], width):
+                yield "| " + chunk + " " * (text_width - used) + " |"
+            continue
+        for start in range(lo, hi, width):
+            yield "| " + text[start : min(start + width, hi)].ljust(text_width) + " |"
+    if multiline:
+        yield closing
+    yield bottom
+    pad = " " * text_width
+    for line in compiled.lines:
+        yield pad + line
+
+
+def iter_render(
+    text: str,
+    character: str | CompiledCharacter = DEFAULT_CHARACTER,
+    *,
+    width: int = DEFAULT_WIDTH,
+    cells: bool = False,
+) -> Iterator[str]:
+    """Yield the rendered output line by line, bubble first and character last.
+
+    Joining the lines with "\n" gives exactly `render(text, character, ...)`.
+    Arguments are validated before this returns, so errors surface before the
+    first line is produced. Apart from the input itself, memory stays bounded
+    by a single wrapped line.
+    """
+    if width < 1:
+        raise ValueError("width must be a positive integer")
+    compiled = get_character(character)
+    if not text or text.isspace():
+        raise CowsayError("Pass something meaningful to cowsay")
+
+    # First pass sizes the bubble; the second pass slices lines on demand.
+    wrapped_lines = 0
+    text_width = 0
+    for lo, hi in _line_spans(text):
+        if cells:
+            for _, _, used in wrap_line_spans(text[lo:hi], width):
+                wrapped_lines += 1
+                text_width = max(text_width, used)
+            continue
+        wrapped_lines += -(-(hi - lo) // width)
+        text_width = max(text_width, min(hi - lo, width))
+    return _stream_lines(text, compiled, width, text_width, wrapped_lines > 1, cells)
+
+
+def render(
+    text: str,
+    character: str | CompiledCharacter = DEFAULT_CHARACTER,
+    *,
+    width: int = DEFAULT_WIDTH,
+    cells: bool = False,
+) -> str:
+    """Render `text` in a speech bubble spoken by `character`.
+
+    Args:
+        text: The message to place inside the bubble
+        character: Name (or compiled form) of the character drawn under the bubble
+        width: Maximum number of code points (or cells) per bubble line
+        cells: Measure lines in terminal cells rather than code points
+
+    Returns:
+        The same string `cowsay.get_output_string(character, text)` produces,
+        or with `cells` a bubble whose borders line up in a terminal
+    """
+    if width < 1:
+        raise ValueError("width must be a positive integer")
+    compiled = get_character(character)
+    if not text or text.isspace():
+        raise CowsayError("Pass something meaningful to cowsay")
+
+    if cells:
+        wrapped = wrap_cells(text, width)
+        text_width = max(used for _, used in wrapped)
+        rows = [
+            "| " + line + " " * (text_width - used) + " |" for line, used in wrapped
+        ]
+    else:
+        lines = wrap_text(text, width)
+        text_width = max(map(len, lines))
+        rows = ["| " + line.ljust(text_width) + " |" for line in lines]
+    top, opening, closing, bottom = _borders(text_width)
+
+    parts = [top]
+    if len(rows) > 1:
+        parts.append(opening)
+        parts.extend(rows)
+        parts.append(closing)
+    else:
+        parts.append(rows[0])
+    parts.append(bottom)
+
+    tail = compiled.tail(text_width)
+    if tail:
+        parts.append(tail)
+    return "\n".join(parts)
+
+
+__all__ = [
+    "DEFAULT_CHARACTER",
+    "DEFAULT_WIDTH",
+    "CompiledCharacter",
+    "CowsayError",
+    "compile_character",
+    "get_character",
+    "iter_render",
+    "render",
+    "wrap_text",
+]
@@ -1,11 +1,31 @@
 from __future__ import annotations
 
+import json
+import time
+from dataclasses import asdict
 from typing import Final
 
-import cowsay
+import mcp.types as mt
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
-"""This MCP server exposes a single tool `cowsay-mcp` backed by the Python `cowsay` package so that local LLMs can request ASCII-art speech bubbles."""
+from . import tools
+from .metrics import MetricsRegistry, payload_size
+from .render import DEFAULT_CHARACTER
+from .tools import (
+    list_characters,
+    render_cowsay_async,
+    run_cowsay,
+    run_cowsay_async,
+    run_cowsay_batch,
+    run_cowsay_batch_async,
+)
+
+"""This MCP server exposes the `cowsay-mcp` tool (plus a batch variant) backed by a native renderer compatible with the Python `cowsay` package so that local LLMs can request ASCII-art speech bubbles."""
 
 
 SERVER_NAME: Final[str] = "cowsay-mcp"
@@ -13,28 +33,149 @@ SERVER_NAME: Final[str] = "cowsay-mcp"
 
 server = FastMCP(SERVER_NAME)
 
+metrics = MetricsRegistry()
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Record calls, errors, payload bytes and latency for every tool call."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.registry = registry
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mt.CallToolRequestParams],
+        call_next: CallNext[mt.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        params = context.message
+        started = time.perf_counter_ns()
+        try:
+            result = await call_next(context)
+        except Exception:
+            self.registry.record(
+                params.name,
+                time.perf_counter_ns() - started,
+                bytes_in=payload_size(params.arguments),
+                error=True,
+            )
+            raise
+        self.registry.record(
+            params.name,
+            time.perf_counter_ns() - started,
+            bytes_in=payload_size(params.arguments),
+            bytes_out=sum(
+                payload_size(getattr(block, "text", None)) for block in result.content
+            ),
+        )
+        return result
+
+
+if tools.settings.metrics_enabled:
+    server.add_middleware(ToolMetricsMiddleware(metrics))
 
-def run_cowsay(text: str) -> str:
-    """Generate ASCII art speech bubble with a cow using the provided text.
 
-    This tool creates fun ASCII art where a cow appears to be speaking
-    the given text in a speech bubble. Perfect for adding humor and
-    personality to messages.
+def tool_metrics() -> str:
+    """Per-tool call counts, errors, byte totals and latency percentiles as JSON."""
+    return json.dumps(
+        {
+            "tools": metrics.snapshot(),
+            "render_cache": asdict(tools.render_cache.stats()),
+        }
+    )
 
-    Args:
-        text: The message to display in the cow's speech bubble
 
-    Returns:
-        ASCII art string containing the speech bubble and cow
+def prometheus_metrics() -> str:
+    """Tool and render-cache metrics in the Prometheus text exposition format."""
+    stats = tools.render_cache.stats()
+    lines = [metrics.render_prometheus().rstrip("\n")]
+    for name, kind, value in (
+        ("hits_total", "counter", stats.hits),
+        ("misses_total", "counter", stats.misses),
+        ("evictions_total", "counter", stats.evictions),
+        ("entries", "gauge", stats.entries),
+        ("bytes", "gauge", stats.bytes),
+    ):
+        lines.append(f"# TYPE cowsay_mcp_render_cache_{name} {kind}")
+        lines.append(f"cowsay_mcp_render_cache_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        prometheus_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
+async def cowsay_tool(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    """`run_cowsay_async` for MCP clients: invalid input fails the call.
+
+    Raising `ToolError` marks the result as an error for the client and lets
+    `ToolMetricsMiddleware` count it, where an error string would be
+    recorded as a successful call.
     """
     try:
-        return cowsay.get_output_string("cow", text)
-    except Exception as exc:  # pragma: no cover - defensive catch for library errors
-        return f"cowsay error: {exc}"
+        return await render_cowsay_async(text, character)
+    except Exception as exc:
+        raise ToolError(f"cowsay error: {exc}") from exc
 
 
 server.tool(
     name="cowsay-mcp",
-    description="Generate fun ASCII art speech bubbles with a cow. Use this tool when you want to make messages more engaging and humorous by displaying them as if a cow is speaking.",
+    description="Generate fun ASCII art speech bubbles with a cow. Use this tool when you want to make messages more engaging and humorous by displaying them as if a cow is speaking. Pass `character` to choose another speaker from the characters://list resource.",
     tags={"text", "art", "fun", "ascii"},
-)(run_cowsay)
+)(cowsay_tool)
+
+
+server.tool(
+    name="cowsay-mcp-batch",
+    description="Generate many cowsay ASCII art speech bubbles in one call. Use this tool instead of repeated cowsay-mcp calls when displaying a list of lines or several stanzas; pass an optional character per text.",
+    tags={"text", "art", "fun", "ascii", "batch"},
+)(run_cowsay_batch_async)
+
+
+def characters_resource() -> str:
+    """Characters accepted by the `character` argument, as JSON."""
+    return json.dumps(list_characters())
+
+
+server.resource(
+    "characters://list",
+    name="characters",
+    description="Names of the built-in and custom characters that can speak in the bubble.",
+    mime_type="application/json",
+)(characters_resource)
+
+
+server.resource(
+    "metrics://tools",
+    name="tool-metrics",
+    description="Call counts, error counts, byte totals and latency percentiles for each tool.",
+    mime_type="application/json",
+)(tool_metrics)
+
+
+server.resource(
+    "metrics://prometheus",
+    name="prometheus-metrics",
+    description="Tool and cache metrics in the Prometheus text format.",
+    mime_type="text/plain",
+)(prometheus_metrics)
+
+
+# Only served by the HTTP/SSE transports, for Prometheus scrapers.
+server.custom_route("/metrics", methods=["GET"], include_in_schema=False)(
+    metrics_endpoint
+)
+
+
+__all__ = [
+    "SERVER_NAME",
+    "ToolMetricsMiddleware",
+    "cowsay_tool",
+    "metrics",
+    "run_cowsay",
+    "run_cowsay_async",
+    "run_cowsay_batch",
+    "run_cowsay_batch_async",
+    "server",
+]
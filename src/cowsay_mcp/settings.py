@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Final, Literal, Mapping
+
+"""Runtime configuration for the cowsay MCP server, read from `COWSAY_MCP_*` environment variables."""
+
+
+ENV_PREFIX: Final[str] = "COWSAY_MCP_"
+
+Transport = Literal["stdio", "http", "sse"]
+TRANSPORTS: Final[tuple[str, ...]] = ("stdio", "http", "sse")
+
+WrapMode = Literal["cells", "codepoints"]
+WRAP_MODES: Final[tuple[str, ...]] = ("cells", "codepoints")
+
+
+def _read(env: Mapping[str, str], name: str) -> str | None:
+    value = env.get(ENV_PREFIX + name)
+    if value is None or not value.strip():
+        return None
+    return value.strip()
+
+
+def _env_int(env: Mapping[str, str], name: str, default: int) -> int:
+    value = _read(env, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(
+            f"{ENV_PREFIX}{name} must be an integer, got {value!r}"
+        ) from exc
+
+
+def _env_float(
+    env: Mapping[str, str], name: str, default: float | None
+) -> float | None:
+    value = _read(env, name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise ValueError(f"{ENV_PREFIX}{name} must be a number, got {value!r}") from exc
+
+
+def _env_bool(env: Mapping[str, str], name: str, default: bool) -> bool:
+    value = _read(env, name)
+    if value is None:
+        return default
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes", "on"):
+        return True
+    if lowered in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{ENV_PREFIX}{name} must be a boolean, got {value!r}")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Tunables for the renderer, its caches, worker pools and the transports."""
+
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 16 * 1024 * 1024
+    cache_ttl: float | None = None
+    batch_parallel_threshold: int = 64
+    batch_max_workers: int = min(8, os.cpu_count() or 1)
+    offload_threshold: int = 8192
+    stream_threshold: int = 64 * 1024
+    pool_max_workers: int = min(4, os.cpu_count() or 1)
+    wrap: WrapMode = "cells"
+    characters_dir: str | None = None
+    characters_poll_interval: float = 2.0
+    metrics_enabled: bool = True
+    transport: Transport = "stdio"
+    host: str = "127.0.0.1"
+    port: int = 8000
+    http_path: str | None = None
+    http_limit_concurrency: int | None = None
+    http_keep_alive: int = 5
+    http_stateless: bool = False
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] | None = None) -> Settings:
+        """Build settings from the environment, falling back to the defaults."""
+
+        env = os.environ if env is None else env
+        ttl = _env_float(env, "CACHE_TTL", cls.cache_ttl)
+        transport = (_read(env, "TRANSPORT") or cls.transport).lower()
+        if transport not in TRANSPORTS:
+            raise ValueError(
+                f"{ENV_PREFIX}TRANSPORT must be one of {', '.join(TRANSPORTS)}, got {transport!r}"
+            )
+        wrap = (_read(env, "WRAP") or cls.wrap).lower()
+        if wrap not in WRAP_MODES:
+            raise ValueError(
+                f"{ENV_PREFIX}WRAP must be one of {', '.join(WRAP_MODES)}, got {wrap!r}"
+            )
+        limit = _env_int(env, "HTTP_LIMIT_CONCURRENCY", 0)
+        return cls(
+            cache_max_entries=_env_int(env, "CACHE_MAX_ENTRIES", cls.cache_max_entries),
+            cache_max_bytes=_env_int(env, "CACHE_MAX_BYTES", cls.cache_max_bytes),
+            cache_ttl=ttl if ttl and ttl > 0 else None,
+            batch_parallel_threshold=_env_int(
+                env, "BATCH_PARALLEL_THRESHOLD", cls.batch_parallel_threshold
+            ),
+            batch_max_workers=max(
+                1, _env_int(env, "BATCH_MAX_WORKERS", cls.batch_max_workers)
+            ),
+            offload_threshold=_env_int(env, "OFFLOAD_THRESHOLD", cls.offload_threshold),
+            stream_threshold=_env_int(env, "STREAM_THRESHOLD", cls.stream_threshold),
+            pool_max_workers=max(
+                0, _env_int(env, "POOL_MAX_WORKERS", cls.pool_max_workers)
+            ),
+            wrap=wrap,  # type: ignore[arg-type]
+            characters_dir=_read(env, "CHARACTERS_DIR"),
+            characters_poll_interval=max(
+                0.0,
+                _env_float(
+                    env, "CHARACTERS_POLL_INTERVAL", cls.characters_poll_interval
+                )
+                or 0.0,
+            ),
+            metrics_enabled=_env_bool(env, "METRICS", cls.metrics_enabled),
+            transport=transport,  # type: ignore[arg-type]
+            host=_read(env, "HOST") or cls.host,
+            port=_env_int(env, "PORT", cls.port),
+            http_path=_read(env, "HTTP_PATH"),
+            http_limit_concurrency=limit if limit > 0 else None,
+            http_keep_alive=_env_int(env, "HTTP_KEEP_ALIVE", cls.http_keep_alive),
+            http_stateless=_env_bool(env, "HTTP_STATELESS", cls.http_stateless),
+        )
+
+
+__all__ = [
+    "ENV_PREFIX",
+    "TRANSPORTS",
+    "WRAP_MODES",
+    "Settings",
+    "Transport",
+    "WrapMode",
+]
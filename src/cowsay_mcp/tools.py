@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Iterator, TypedDict
+
+from .cache import RenderCache
+from .characters import registry
+from .render import DEFAULT_CHARACTER, DEFAULT_WIDTH, get_character, iter_render, render
+from .settings import Settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .characters import CompiledCharacter
+    from .pool import RenderPool
+
+"""Tool implementations shared by the MCP server and the stdin pipe path, free of FastMCP imports."""
+
+
+settings = Settings.from_env()
+
+render_cache = RenderCache(
+    settings.cache_max_entries, settings.cache_max_bytes, ttl=settings.cache_ttl
+)
+
+
+def _on_character_changed(name: str) -> None:
+    render_cache.discard_character(name)
+
+
+registry.add_listener(_on_character_changed)
+if settings.characters_dir:
+    registry.watch(settings.characters_dir, settings.characters_poll_interval)
+
+
+class BatchItem(TypedDict):
+    """One batch entry: the rendered art, or the reason its text failed."""
+
+    result: str | None
+    error: str | None
+
+
+_batch_executor: ThreadPoolExecutor | None = None
+_render_pool: RenderPool | None = None
+
+
+def _render_cached(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    return render_cache.get_or_render(
+        character,
+        text,
+        DEFAULT_WIDTH,
+        lambda: render(text, character, cells=settings.wrap == "cells"),
+    )
+
+
+def render_cowsay(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    """Render like `run_cowsay`, raising on invalid input instead."""
+    return _render_cached(text, character)
+
+
+def run_cowsay(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    """Generate ASCII art speech bubble with a cow using the provided text.
+
+    This tool creates fun ASCII art where a cow appears to be speaking
+    the given text in a speech bubble. Perfect for adding humor and
+    personality to messages.
+
+    Args:
+        text: The message to display in the cow's speech bubble
+        character: Who speaks, e.g. "cow", "tux" or "dragon"; see list_characters
+
+    Returns:
+        ASCII art string containing the speech bubble and cow
+    """
+    try:
+        return _render_cached(text, character)
+    except Exception as exc:  # pragma: no cover - defensive catch for library errors
+        return f"cowsay error: {exc}"
+
+
+def stream_cowsay(text: str, character: str = DEFAULT_CHARACTER) -> Iterator[str]:
+    """Yield the output of `render_cowsay` line by line without building it in memory.
+
+    Streamed renders bypass the cache; invalid input raises before the first
+    line, as it does for `render_cowsay`.
+    """
+    return iter_render(text, character, cells=settings.wrap == "cells")
+
+
+def _get_render_pool() -> RenderPool:
+    global _render_pool
+    if _render_pool is None:
+        import atexit
+
+        from .pool import RenderPool
+
+        _render_pool = RenderPool(settings.pool_max_workers, settings.offload_threshold)
+        # Stop the workers before interpreter teardown reaches the executor.
+        atexit.register(_render_pool.shutdown)
+    return _render_pool
+
+
+async def render_cowsay_async(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    """Render like `run_cowsay_async`, raising on invalid input instead.
+
+    Texts of at least `offload_threshold` characters are rendered on a
+    worker pool so that a few very large inputs do not stall other
+    requests sharing the event loop. Smaller texts are still rendered
+    inline, where a pool round trip would cost more than the render itself.
+    """
+    pool = _get_render_pool()
+    if not pool.should_offload(text):
+        return _render_cached(text, character)
+
+    cached = render_cache.get(character, text, DEFAULT_WIDTH)
+    if cached is None:
+        # Workers get the compiled character, so custom ones work there too.
+        cached = await pool.render(
+            text, get_character(character), cells=settings.wrap == "cells"
+        )
+        render_cache.put(character, text, DEFAULT_WIDTH, cached)
+    return cached
+
+
+async def run_cowsay_async(text: str, character: str = DEFAULT_CHARACTER) -> str:
+    """Generate ASCII art speech bubble with a cow using the provided text.
+
+    Behaves like `render_cowsay_async`, but returns invalid input as a
+    `cowsay error: ...` string, as `run_cowsay` does.
+
+    Args:
+        text: The message to display in the cow's speech bubble
+        character: Who speaks, e.g. "cow", "tux" or "dragon"; see list_characters
+
+    Returns:
+        ASCII art string containing the speech bubble and cow
+    """
+    try:
+        return await render_cowsay_async(text, character)
+    except Exception as exc:
+        return f"cowsay error: {exc}"
+
+
+def list_characters() -> list[dict[str, str]]:
+    """List the characters `run_cowsay` accepts, built-in and custom.
+
+    Returns:
+        One `{"name", "source"}` object per character, sorted by name
+    """
+    return registry.describe()
+
+
+def _render_item(text: str, character: str | None) -> BatchItem:
+    try:
+        result = _render_cached(text, character or DEFAULT_CHARACTER)
+    except Exception as exc:
+        return BatchItem(result=None, error=str(exc))
+    return BatchItem(result=result, error=None)
+
+
+def _render_chunk(items: list[tuple[str, str | None]]) -> list[BatchItem]:
+    return [_render_item(text, character) for text, character in items]
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        _batch_executor = ThreadPoolExecutor(
+            max_workers=settings.batch_max_workers,
+            thread_name_prefix="cowsay-batch",
+        )
+    return _batch_executor
+
+
+def _batch_items(
+    texts: list[str], characters: list[str | None] | None
+) -> list[tuple[str, str]]:
+    # The stdin and worker paths pass JSON through unchecked; hold them to
+    # the same contract the MCP schema enforces.
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        raise ValueError("texts must be a list of strings")
+    if characters is None:
+        characters = [None] * len(texts)
+    elif not isinstance(characters, list) or not all(
+        character is None or isinstance(character, str) for character in characters
+    ):
+        raise ValueError("characters must be a list of character names")
+    elif len(characters) != len(texts):
+        raise ValueError("characters must have the same length as texts")
+    return [
+        (text, character or DEFAULT_CHARACTER)
+        for text, character in zip(texts, characters)
+    ]
+
+
+def _chunks(items: list, count: int) -> list[list]:
+    size = -(-len(items) // count)
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def run_cowsay_batch(
+    texts: list[str], characters: list[str | None] | None = None
+) -> list[BatchItem]:
+    """Generate many ASCII art speech bubbles in a single call.
+
+    Each item is rendered independently: a failing item gets its `error`
+    set while the others still carry their `result`; the other field of
+    each item is None.
+    Batches of at least `batch_parallel_threshold` items are split into
+    chunks and rendered on a worker pool.
+
+    Args:
+        texts: The messages to display, one speech bubble per entry
+        characters: Optional character name per text (defaults to the cow)
+
+    Returns:
+        One result or error object per input text, in input order
+    """
+    items = _batch_items(texts, characters)
+    workers = settings.batch_max_workers
+    if len(items) < settings.batch_parallel_threshold or workers < 2:
+        return _render_chunk(items)
+
+    results: list[BatchItem] = []
+    for chunk_results in _get_batch_executor().map(
+        _render_chunk, _chunks(items, workers)
+    ):
+        results.extend(chunk_results)
+    return results
+
+
+def _pool_character(name: str) -> str | CompiledCharacter:
+    try:
+        return get_character(name)
+    except Exception:
+        return name  # the worker reports the same error for this item
+
+
+async def _render_batch_on_pool(
+    pool: RenderPool, items: list[tuple[str, str]]
+) -> list[BatchItem]:
+    results = [BatchItem(result=None, error=None) for _ in items]
+    misses: list[int] = []
+    for index, (text, character) in enumerate(items):
+        cached = render_cache.get(character, text, DEFAULT_WIDTH)
+        if cached is None:
+            misses.append(index)
+        else:
+            results[index]["result"] = cached
+    if not misses:
+        return results
+
+    compiled = {name: _pool_character(name) for _, name in items}
+    chunks = _chunks(misses, pool.max_workers)
+    rendered = await asyncio.gather(
+        *(
+            pool.render_many(
+                [(items[i][0], compiled[items[i][1]]) for i in chunk],
+                cells=settings.wrap == "cells",
+            )
+            for chunk in chunks
+        )
+    )
+    for chunk, chunk_rendered in zip(chunks, rendered):
+        for index, (result, error) in zip(chunk, chunk_rendered):
+            if result is None:
+                results[index]["error"] = error or "render failed"
+                continue
+            text, character = items[index]
+            render_cache.put(character, text, DEFAULT_WIDTH, result)
+            results[index]["result"] = result
+    return results
+
+
+async def run_cowsay_batch_async(
+    texts: list[str], characters: list[str | None] | None = None
+) -> list[BatchItem]:
+    """Generate many ASCII art speech bubbles in a single call.
+
+    Behaves like `run_cowsay_batch` without blocking the event loop on
+    large batches. Batches of at least `batch_parallel_threshold` items, or
+    with at least `offload_threshold` characters in total, are split into
+    chunks rendered on the render worker pool; with offloading disabled,
+    large batches use the batch thread pool instead. Small batches are
+    rendered inline.
+
+    Args:
+        texts: The messages to display, one speech bubble per entry
+        characters: Optional character name per text (defaults to the cow)
+
+    Returns:
+        One result or error object per input text, in input order
+    """
+    items = _batch_items(texts, characters)
+    large = len(items) >= settings.batch_parallel_threshold
+    pool = _get_render_pool()
+    if pool.max_workers > 0 and (
+        large or sum(len(text) for text, _ in items) >= pool.threshold
+    ):
+        return await _render_batch_on_pool(pool, items)
+
+    workers = settings.batch_max_workers
+    if not large or workers < 2:
+        return _render_chunk(items)
+    loop = asyncio.get_running_loop()
+    executor = _get_batch_executor()
+    chunk_results = await asyncio.gather(
+        *(
+            loop.run_in_executor(executor, _render_chunk, chunk)
+            for chunk in _chunks(items, workers)
+        )
+    )
+    return [result for chunk in chunk_results for result in chunk]
+
+
+__all__ = [
+    "BatchItem",
+    "list_characters",
+    "render_cache",
+    "render_cowsay",
+    "render_cowsay_async",
+    "run_cowsay",
+    "run_cowsay_async",
+    "run_cowsay_batch",
+    "run_cowsay_batch_async",
+    "settings",
+    "stream_cowsay",
+]
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import sys
+from bisect import bisect_right
+from functools import cache
+from itertools import accumulate
+from typing import Final, Iterator
+
+from ._width_table import WIDE, ZERO_WIDTH
+
+"""Terminal display widths from a precomputed per-code-point table."""
+
+
+ZWJ: Final[str] = "\u200d"
+VS16: Final[str] = "\ufe0f"
+# Skin-tone modifiers are wide on their own but merge into a preceding emoji.
+_MODIFIERS: Final[tuple[int, int]] = (0x1F3FB, 0x1F3FF)
+_MODIFIER: Final[int] = 3
+# The only ASCII characters with an emoji presentation are the keycap bases.
+_KEYCAP_BASES: Final[str] = "#*0123456789"
+
+
+@cache
+def _table() -> bytes:
+    """One byte per code point: 0, 1 or 2 cells, or the skin-tone marker.
+
+    Built on the first non-ASCII line rather than at import, since ASCII
+    text never needs it.
+    """
+    table = bytearray(b"\x01") * (sys.maxunicode + 1)
+    for lo, hi in ZERO_WIDTH:
+        table[lo : hi + 1] = bytes(hi - lo + 1)
+    for lo, hi in WIDE:
+        table[lo : hi + 1] = b"\x02" * (hi - lo + 1)
+    lo, hi = _MODIFIERS
+    table[lo : hi + 1] = bytes([_MODIFIER]) * (hi - lo + 1)
+    return bytes(table)
+
+
+# Code points measured at a time when wrapping a long line.
+_WINDOW: Final[int] = 16384
+
+
+def _cluster_base(widths: bytearray, index: int) -> int:
+    """Index of the nearest visible code point before `index`, or -1."""
+
+    index -= 1
+    while index >= 0 and not widths[index]:
+        index -= 1
+    return index
+
+
+def _join_sequences(line: str, widths: bytearray) -> None:
+    """Fold ZWJ sequences and skin tones into one cluster; widen bases before VS16.
+
+    Only the joiner, selector and modifier positions are visited, so lines
+    with a few emoji do not pay a Python-level pass over every character.
+    """
+    positions: list[int] = []
+    for marker in (ZWJ, VS16):
+        index = line.find(marker) if marker in line else -1
+        while index != -1:
+            positions.append(index)
+            index = line.find(marker, index + 1)
+    index = widths.find(_MODIFIER)
+    while index != -1:
+        positions.append(index)
+        index = widths.find(_MODIFIER, index + 1)
+
+    for index in sorted(positions):
+        base = _cluster_base(widths, index)
+        char = line[index]
+        if widths[index] == _MODIFIER:
+            widths[index] = 0 if base >= 0 and widths[base] == 2 else 2
+        elif char == ZWJ:
+            joined = index + 1
+            if (
+                base >= 0
+                and widths[base] == 2
+                and joined < len(line)
+                and widths[joined] in (1, 2)
+                and line[joined] >= "\u2000"
+            ):
+                widths[joined] = 0
+        elif base >= 0 and widths[base] == 1:
+            if not line[base].isascii() or line[base] in _KEYCAP_BASES:
+                widths[base] = 2
+
+
+def _widths(line: str) -> bytes | bytearray:
+    # str.translate looks every code point up in the table in C; the result
+    # holds one width per code point, as bytes.
+    widths = line.translate(_table()).encode("latin-1")
+    if _MODIFIER in widths or ZWJ in line or VS16 in line:
+        widths = bytearray(widths)
+        _join_sequences(line, widths)
+    return widths
+
+
+def char_widths(line: str) -> list[int]:
+    """Cells taken by each code point of `line`, with emoji sequences folded in.
+
+    Zero-width joiners, skin-tone modifiers and emoji variation selectors
+    attach to the preceding character, so a whole emoji sequence counts as a
+    single wide glyph.
+    """
+    return list(_widths(line))
+
+
+def display_width(text: str) -> int:
+    """Number of terminal cells `text` occupies on a single line."""
+
+    if text.isascii():
+        return len(text)
+    return sum(_widths(text))
+
+
+def _width_windows(line: str) -> Iterator[tuple[int, bytes | bytearray]]:
+    """Yield `(start, widths)` for consecutive slices of `line`.
+
+    Slices hold about `_WINDOW` code points and never end just before a
+    zero-width character, a skin tone or a joined character, so every
+    cluster is measured within one slice exactly as in the whole line.
+    """
+    table = _table()
+    length = len(line)
+    start = 0
+    while start < length:
+        end = min(start + _WINDOW, length)
+        while end < length and (
+            table[ord(line[end])] in (0, _MODIFIER) or line[end - 1] == ZWJ
+        ):
+            end += 1
+        yield start, _widths(line[start:end])
+        start = end
+
+
+def wrap_line_spans(line: str, width: int) -> Iterator[tuple[int, int, int]]:
+    """Yield `(start, end, cells)` for each piece `wrap_line_cells` cuts `line` into.
+
+    Widths are walked one bounded slice at a time, so memory stays
+    proportional to `_WINDOW` rather than to the line.
+    """
+    if line.isascii():
+        for i in range(0, len(line), width):
+            yield i, min(i + width, len(line)), min(width, len(line) - i)
+        return
+
+    piece = 0  # start of the piece being filled
+    used = 0  # cells already in it
+    for window, widths in _width_windows(line):
+        offsets = list(accumulate(widths))
+        pos = 0
+        while pos < len(offsets):
+            base = offsets[pos - 1] if pos else 0
+            end = bisect_right(offsets, base + width - used, lo=pos)
+            if end == len(offsets):
+                used += offsets[-1] - base
+                break
+            if end == pos:
+                if piece < window + pos:
+                    yield piece, window + pos, used
+                    piece, used = window + pos, 0
+                    continue
+                # A single cluster wider than `width` gets a piece of its own.
+                end = bisect_right(offsets, offsets[pos], lo=pos)
+            yield piece, window + end, used + offsets[end - 1] - base
+            piece, used = window + end, 0
+            pos = end
+    if piece < len(line):
+        yield piece, len(line), used
+
+
+def wrap_line_cells(line: str, width: int) -> Iterator[tuple[str, int]]:
+    """Cut one stripped line into `(chunk, cells)` pieces of at most `width` cells.
+
+    Cuts fall between clusters, so combining marks and ZWJ sequences stay
+    whole; a single cluster wider than `width` gets a piece of its own.
+    """
+    for start, end, cells in wrap_line_spans(line, width):
+        yield line[start:end], cells
+
+
+def wrap_cells(text: str, width: int) -> list[tuple[str, int]]:
+    """Split text into stripped, non-empty `(line, cells)` pairs of at most `width` cells."""
+
+    wrapped: list[tuple[str, int]] = []
+    ascii_text = text.isascii()
+    for raw_line in text.split("\n"):
+        line = raw_line.strip()
+        if not line:
+            continue
+        if ascii_text and len(line) <= width:
+            wrapped.append((line, len(line)))
+        else:
+            wrapped.extend(wrap_line_cells(line, width))
+    return wrapped
+
+
+__all__ = [
+    "char_widths",
+    "display_width",
+    "wrap_cells",
+    "wrap_line_cells",
+    "wrap_line_spans",
+]
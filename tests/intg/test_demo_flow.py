@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -47,6 +47,34 @@ def test_demo_main_happy_path(monkeypatch, capsys):
     assert "Poem explanation:" in stdout_output
 
 
+def test_demo_main_stdio_backend(monkeypatch, capsys):
+    """Test the demo against a persistent `--worker` child process."""
+
+    def fake_chat_once(bundle, messages, **kwargs):
+        return '{"tool": "cowsay-mcp", "args": {"text": "Hello worker"}}'
+
+    monkeypatch.setattr("demo.main.load_model", lambda model_id: (object(), object()))
+    monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
+    monkeypatch.setattr("demo.main.random.choice", lambda x: "nature")
+
+    demo_main.main(["--backend", "stdio"])
+
+    stdout_output = capsys.readouterr().out
+    assert "| Hello worker |" in stdout_output
+    assert "Poem explanation:" in stdout_output
+
+
+def fake_worker(stdout: str) -> MagicMock:
+    """A stand-in for the stdio worker process that answers with `stdout`."""
+
+    proc = MagicMock()
+    proc.stdin.drain = AsyncMock()
+    proc.stdout.readline = AsyncMock(return_value=stdout.encode())
+    proc.returncode = 1
+    proc.wait = AsyncMock(return_value=1)
+    return proc
+
+
 def test_demo_main_invalid_tool_call(monkeypatch, capsys):
     """Test demo handles invalid tool calls gracefully."""
     dummy_bundle = (object(), object())
@@ -70,6 +98,34 @@ def test_demo_main_invalid_tool_call(monkeypatch, capsys):
     assert "Invalid tool call" in str(exc_info.value)
 
 
+def test_demo_main_repairs_invalid_tool_call(monkeypatch, capsys):
+    """Test a malformed tool call is re-prompted instead of ending the run."""
+    replies = iter(
+        [
+            "Sure! Here is the poem you asked for.",
+            '{"tool": "cowsay-mcp", "args": {"text": "Second try"}}',
+            "An explanation.",
+        ]
+    )
+    prompts = []
+
+    def fake_chat_once(bundle, messages, **kwargs):
+        prompts.append(messages)
+        return next(replies)
+
+    monkeypatch.setattr("demo.main.load_model", lambda model_id: (object(), object()))
+    monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
+    monkeypatch.setattr("demo.main.random.choice", lambda x: "nature")
+
+    demo_main.main()
+
+    captured = capsys.readouterr()
+    assert "| Second try |" in captured.out
+    assert "Repaired tool call by re-prompting" in captured.err
+    assert prompts[1][-1]["role"] == "user"
+    assert "No JSON found" in prompts[1][-1]["content"]
+
+
 def test_demo_main_wrong_tool_name(monkeypatch, capsys):
     """Test demo handles calls to non-existent tools."""
     dummy_bundle = (object(), object())
@@ -103,19 +159,19 @@ def test_demo_main_mcp_communication_failure(monkeypatch, capsys):
     def fake_chat_once(bundle, messages, **kwargs):
         return '{"tool": "cowsay-mcp", "args": {"text": "test"}}'
 
-    # Mock subprocess to simulate server failure
-    mock_proc = MagicMock()
-    mock_proc.communicate.return_value = ("", "MCP server error")
-    mock_proc.stderr = "error"
+    # The worker exits without answering
+    mock_proc = fake_worker("")
 
     monkeypatch.setattr("demo.main.load_model", fake_load_model)
     monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.llm.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.main.random.choice", lambda x: "nature")
-    monkeypatch.setattr("demo.main.subprocess.Popen", lambda *args, **kwargs: mock_proc)
+    monkeypatch.setattr(
+        "demo.client.asyncio.create_subprocess_exec", AsyncMock(return_value=mock_proc)
+    )
 
     with pytest.raises(SystemExit) as exc_info:
-        demo_main.main()
+        demo_main.main(["--backend", "stdio"])
 
     assert "MCP communication error" in str(exc_info.value)
 
@@ -133,18 +189,19 @@ def test_demo_main_malformed_mcp_response(monkeypatch, capsys):
     def fake_chat_once(bundle, messages, **kwargs):
         return '{"tool": "cowsay-mcp", "args": {"text": "test"}}'
 
-    # Mock subprocess to return invalid JSON
-    mock_proc = MagicMock()
-    mock_proc.communicate.return_value = ("invalid json response", "")
+    # The worker answers with invalid JSON
+    mock_proc = fake_worker("invalid json response\n")
 
     monkeypatch.setattr("demo.main.load_model", fake_load_model)
     monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.llm.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.main.random.choice", lambda x: "nature")
-    monkeypatch.setattr("demo.main.subprocess.Popen", lambda *args, **kwargs: mock_proc)
+    monkeypatch.setattr(
+        "demo.client.asyncio.create_subprocess_exec", AsyncMock(return_value=mock_proc)
+    )
 
     with pytest.raises(SystemExit) as exc_info:
-        demo_main.main()
+        demo_main.main(["--backend", "stdio"])
 
     assert "MCP communication error" in str(exc_info.value)
 
@@ -159,17 +216,31 @@ def test_demo_main_mcp_response_missing_result(monkeypatch, capsys):
     def fake_chat_once(bundle, messages, **kwargs):
         return '{"tool": "cowsay-mcp", "args": {"text": "test"}}'
 
-    # Mock subprocess to return valid JSON but without 'result' key
-    mock_proc = MagicMock()
-    mock_proc.communicate.return_value = ('{"error": "some error"}', "")
+    # The worker answers with valid JSON but without a 'result' key
+    mock_proc = fake_worker('{"id": 1, "error": "some error"}\n')
 
     monkeypatch.setattr("demo.main.load_model", fake_load_model)
     monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.llm.chat_once", fake_chat_once)
     monkeypatch.setattr("demo.main.random.choice", lambda x: "nature")
-    monkeypatch.setattr("demo.main.subprocess.Popen", lambda *args, **kwargs: mock_proc)
+    monkeypatch.setattr(
+        "demo.client.asyncio.create_subprocess_exec", AsyncMock(return_value=mock_proc)
+    )
 
     with pytest.raises(SystemExit) as exc_info:
-        demo_main.main()
+        demo_main.main(["--backend", "stdio"])
 
     assert "MCP communication error" in str(exc_info.value)
+
+
+def test_demo_main_scripted_llm_backend(monkeypatch, capsys):
+    """Run the whole chain on the scripted CPU backend, with no model mocks."""
+    monkeypatch.setattr("demo.backends._active", None)
+    monkeypatch.setattr("demo.main.random.choice", lambda x: "technology")
+
+    demo_main.main(["--llm-backend", "scripted"])
+
+    captured = capsys.readouterr()
+    assert '"tool": "cowsay-mcp"' in captured.err
+    assert "Softly the technology hums along" in captured.out
+    assert "Poem explanation:" in captured.out
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+import urllib.request
+from urllib.parse import urljoin
+
+import cowsay
+import pytest
+
+from benchmarks.http_load import run_load, spawn_server
+from benchmarks.stats import percentile
+
+
+@pytest.mark.parametrize("transport", ["http", "sse"])
+def test_network_transport_serves_concurrent_clients(transport):
+    """The server answers many concurrent clients over HTTP and SSE."""
+    from fastmcp import Client
+
+    async def call(url: str) -> str:
+        async with Client(url) as client:
+            result = await client.call_tool("cowsay-mcp", {"text": "over the wire"})
+            return result.data
+
+    with spawn_server(transport, ["--limit-concurrency", "64"]) as url:
+        assert asyncio.run(call(url)) == cowsay.get_output_string(
+            "cow", "over the wire"
+        )
+        report = asyncio.run(run_load(url, clients=4, requests=5, text="load"))
+        with urllib.request.urlopen(urljoin(url, "/metrics"), timeout=5) as response:
+            exposition = response.read().decode()
+
+    assert 'cowsay_mcp_tool_calls_total{tool="cowsay-mcp"} 21' in exposition
+
+    assert report["requests"] == 20
+    assert report["errors"] == 0
+    assert report["p99_ms"] >= report["p50_ms"] > 0
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 50) == 0.0
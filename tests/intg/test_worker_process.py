@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import sys
+
+import cowsay
+
+
+def test_worker_process_serves_many_calls_over_one_pipe():
+    """A single warm worker answers a stream of tool calls in order."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "cowsay_mcp.main", "--worker"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        for request_id in range(50):
+            text = f"message {request_id}"
+            request = {"id": request_id, "tool": "cowsay-mcp", "args": {"text": text}}
+            proc.stdin.write(json.dumps(request) + "\n")
+            proc.stdin.flush()
+
+            response = json.loads(proc.stdout.readline())
+            assert response == {
+                "id": request_id,
+                "result": cowsay.get_output_string("cow", text),
+            }
+    finally:
+        proc.stdin.close()
+        assert proc.wait(timeout=10) == 0
+
+
+def test_framed_worker_answers_pipelined_calls():
+    """Calls written back to back over a framed pipe all come back by id."""
+    from demo.client import open_client
+
+    async def run() -> list[str]:
+        async with open_client("stdio", framing="json") as client:
+            await client.connect()
+            return await asyncio.gather(
+                *(
+                    client.call_tool("cowsay-mcp", {"text": f"message {index}"})
+                    for index in range(20)
+                )
+            )
+
+    results = asyncio.run(run())
+    assert results == [
+        cowsay.get_output_string("cow", f"message {index}") for index in range(20)
+    ]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+
+from benchmarks import demo_backends, framing, suite, tool_loop, wrap_width
+
+
+def test_quick_suite_reports_every_layer(tmp_path):
+    output = tmp_path / "bench.json"
+
+    exit_code = suite.main(["--quick", "--output", str(output)])
+
+    assert exit_code == 0
+    report = json.loads(output.read_text())
+    assert report["schema"] == suite.SCHEMA_VERSION
+    assert {"python", "cowsay_mcp", "timestamp"} <= set(report["metadata"])
+    cases = {(r["layer"], r["case"]) for r in report["results"]}
+    assert {layer for layer, _ in cases} == set(suite.LAYERS)
+    assert {
+        ("run_cowsay", "empty"),
+        ("run_cowsay", "1_mb"),
+        ("run_cowsay", "unicode_emoji"),
+    } <= cases
+    for result in report["results"]:
+        assert result["min_us"] <= result["median_us"] <= result["p99_us"]
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    def report(median: float) -> dict:
+        return {
+            "results": [{"layer": "run_cowsay", "case": "1_line", "median_us": median}]
+        }
+
+    assert suite.compare(report(10.0), report(12.0), tolerance=1.25) == []
+    regressions = suite.compare(report(10.0), report(15.0), tolerance=1.25)
+    assert regressions == [
+        {
+            "layer": "run_cowsay",
+            "case": "1_line",
+            "baseline_median_us": 10.0,
+            "median_us": 15.0,
+            "ratio": 1.5,
+        }
+    ]
+
+
+def test_wrap_width_benchmark_covers_every_corpus(capsys):
+    wrap_width.main(["--quick"])
+
+    results = json.loads(capsys.readouterr().out)
+    cases = {(r["impl"], r["case"]) for r in results}
+    assert ("render_cells", "emoji_heavy") in cases
+    assert ("wrap_unicodedata", "cjk_heavy") in cases
+
+
+def test_demo_backends_benchmark_reports_each_backend(capsys):
+    demo_backends.main(["--calls", "3", "--backend", "inprocess", "--backend", "stdio"])
+
+    report = json.loads(capsys.readouterr().out)
+    assert set(report) == {"inprocess", "stdio"}
+    for result in report.values():
+        assert result["count"] == 3
+        assert result["p99_ms"] >= result["p50_ms"] > 0
+
+
+def test_tool_loop_benchmark_runs_on_cpu(capsys):
+    tool_loop.main(["--samples", "1", "--batch-size", "2", "--backend", "inprocess"])
+
+    report = json.loads(capsys.readouterr().out)
+    (result,) = report.values()
+    assert result["succeeded"] == result["items"] == 5
+    assert result["tokens_per_s"] > 0
+
+
+def test_framing_benchmark_compares_protocols(capsys):
+    framing.main(["--calls", "5", "--size", "2048", "--quick"])
+
+    report = json.loads(capsys.readouterr().out)
+    assert {r["framing"] for r in report["parse"]} >= {"lines", "json"}
+    assert set(report["pipelined"]) == {"lines", "json"}
+    assert all(r["calls"] == 5 for r in report["pipelined"].values())
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BUDGET_FILE = Path(__file__).with_name("startup_budget.json")
+BUDGETS: dict[str, dict] = json.loads(BUDGET_FILE.read_text())
+RUNS = 3
+
+
+def import_profile(statement: str) -> tuple[dict[str, int], set[str]]:
+    """Run `python -X importtime -c statement` in a fresh interpreter.
+
+    Returns the cumulative microseconds of each top-level import and the set of
+    every module imported along the way.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    top_level: dict[str, int] = {}
+    modules: set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def cold_start_ms(statement: str) -> tuple[float, set[str]]:
+    """Best-of-N import time for a mode, excluding interpreter start-up imports."""
+
+    baseline, _ = import_profile("pass")
+    best = float("inf")
+    modules: set[str] = set()
+    for _ in range(RUNS):
+        top_level, modules = import_profile(statement)
+        total = sum(us for name, us in top_level.items() if name not in baseline)
+        best = min(best, total / 1000)
+    return best, modules
+
+
+@pytest.mark.parametrize("mode", sorted(BUDGETS))
+def test_cold_start_within_budget(mode):
+    budget = BUDGETS[mode]
+    elapsed_ms, modules = cold_start_ms(budget["statement"])
+
+    print(f"\n{mode}: {elapsed_ms:.1f} ms (budget {budget['budget_ms']} ms)")
+    assert elapsed_ms <= budget["budget_ms"], (
+        f"{mode} cold start took {elapsed_ms:.1f} ms, "
+        f"over the {budget['budget_ms']} ms budget in {BUDGET_FILE.name}"
+    )
+    leaked = {
+        name
+        for name in modules
+        for forbidden in budget["forbidden_modules"]
+        if name == forbidden or name.startswith(forbidden + ".")
+    }
+    assert not leaked, f"{mode} imported {sorted(leaked)}"
+
+
+def test_pipe_call_does_not_import_server():
+    """Answering a piped tool call must not load FastMCP."""
+    script = (
+        "import io, sys\n"
+        'sys.stdin = io.StringIO(\'{"tool": "cowsay-mcp", "args": {"text": "hi"}}\')\n'
+        "sys.stdin.isatty = lambda: False\n"
+        "from cowsay_mcp.main import main\n"
+        "main()\n"
+        "assert 'fastmcp' not in sys.modules, 'fastmcp was imported'\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)["result"]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from types import ModuleType
+
+import pytest
+
+from demo import backends, llm
+from demo.main import fetch_primary_tool, parse_tool_call
+from demo.prompting import POEM_ANALYST_PROMPT, build_initial_messages
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    monkeypatch.setattr(backends, "_active", None)
+    monkeypatch.setenv(backends.BACKEND_ENV, "scripted")
+    return llm.load_model("scripted", warmup=False)
+
+
+class TestBackendSelection:
+    """Test choosing backends by name, environment and registration."""
+
+    def test_environment_selects_backend(self, monkeypatch):
+        monkeypatch.setattr(backends, "_active", None)
+        monkeypatch.delenv(backends.BACKEND_ENV, raising=False)
+        assert backends.get_backend().name == "mlx"
+        monkeypatch.setenv(backends.BACKEND_ENV, "scripted")
+        assert backends.get_backend().name == "scripted"
+
+    def test_use_backend_overrides_environment(self, monkeypatch):
+        monkeypatch.setattr(backends, "_active", None)
+        monkeypatch.setenv(backends.BACKEND_ENV, "mlx")
+        assert backends.use_backend("scripted").name == "scripted"
+        assert backends.get_backend().name == "scripted"
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown LLM backend"):
+            backends.get_backend("tpu")
+
+    def test_register_backend(self, monkeypatch):
+        monkeypatch.setattr(backends, "_FACTORIES", dict(backends._FACTORIES))
+        custom = backends.LLMBackend(
+            name="echo",
+            load=lambda model_id, **options: (object(), object()),
+            generate=lambda model, tokenizer, prompt, **kwargs: prompt,
+        )
+        backends.register_backend("echo", lambda: custom)
+        assert "echo" in backends.backend_names()
+        assert backends.get_backend("echo") is custom
+
+
+class TestMlxBackend:
+    """Test how the mlx backend passes generation options to mlx-lm."""
+
+    def test_generate_turns_temperature_into_a_sampler(self, monkeypatch):
+        sample_utils = ModuleType("mlx_lm.sample_utils")
+        sample_utils.make_sampler = lambda temp: ("sampler", temp)
+        monkeypatch.setitem(sys.modules, "mlx_lm.sample_utils", sample_utils)
+        calls = []
+
+        def fake_generate(model, tokenizer, prompt, **kwargs):
+            calls.append(kwargs)
+            return "reply"
+
+        monkeypatch.setattr(backends, "_MLX_FUNCS", (None, fake_generate))
+
+        assert backends._mlx_generate("m", "t", "hi", temperature=0.0, max_tokens=4)
+        assert backends._mlx_generate("m", "t", "hi", max_tokens=4)
+        assert calls == [
+            {"max_tokens": 4, "sampler": ("sampler", 0.0)},
+            {"max_tokens": 4},
+        ]
+
+
+class TestScriptedBackend:
+    """Test the deterministic CPU backend end to end through chat_once."""
+
+    def test_generates_a_valid_tool_call(self, scripted):
+        tool = asyncio.run(fetch_primary_tool())
+        raw = llm.chat_once(scripted, build_initial_messages("nature", tool))
+
+        assert raw == llm.chat_once(scripted, build_initial_messages("nature", tool))
+        poem = parse_tool_call(raw, tool.name)
+        assert "nature" in poem
+        assert set(json.loads(raw)["args"]) == {"text"}
+
+    def test_calls_the_first_tool_of_a_catalog_prompt(self, scripted):
+        from demo.main import fetch_tool_catalog
+
+        catalog = asyncio.run(fetch_tool_catalog())
+        offered = [catalog["cowsay-mcp-batch"], catalog["cowsay-mcp"]]
+        raw = llm.chat_once(scripted, build_initial_messages("nature", offered))
+
+        assert json.loads(raw)["tool"] == "cowsay-mcp-batch"
+        assert "nature" in parse_tool_call(raw, catalog)
+
+    def test_explains_a_poem(self, scripted):
+        explanation = llm.chat_once(
+            scripted,
+            [
+                {"role": "system", "content": POEM_ANALYST_PROMPT},
+                {"role": "user", "content": "First line\nsecond line"},
+            ],
+        )
+        assert '"First line"' in explanation
+
+    def test_respects_max_tokens(self, scripted):
+        reply = llm.chat_once(
+            scripted, [{"role": "user", "content": "poem"}], max_tokens=3
+        )
+        assert reply == "The poem"  # "The", " ", "poem"
+
+    def test_replays_recorded_replies(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(backends, "_active", "scripted")
+        replies = tmp_path / "replies.json"
+        replies.write_text(json.dumps(["one", "two"]))
+        bundle = llm.load_model(str(replies), warmup=False)
+
+        messages = [{"role": "user", "content": "hi"}]
+        assert [llm.chat_once(bundle, messages) for _ in range(3)] == [
+            "one",
+            "two",
+            "one",
+        ]
+
+    def test_batches_through_backend(self, scripted):
+        conversations = [[{"role": "user", "content": f"line {i}"}] for i in range(3)]
+        outputs = llm.chat_batch(scripted, conversations)
+        assert [output.split('"')[1] for output in outputs] == [
+            "line 0",
+            "line 1",
+            "line 2",
+        ]
+        assert llm.count_tokens(scripted, "a b") == 3
+
+    def test_bundle_keeps_its_backend_after_a_switch(self, scripted, monkeypatch):
+        monkeypatch.setattr(backends, "_active", "mlx")
+        assert llm.backend_for(scripted).name == "scripted"
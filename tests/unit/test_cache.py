@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import pytest
+
+from cowsay_mcp.cache import RenderCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRenderCache:
+    """Test LRU, byte-bound and TTL behaviour of the render cache."""
+
+    def test_hit_and_miss_counters(self):
+        cache = RenderCache()
+        assert cache.get("cow", "hi", 49) is None
+        cache.put("cow", "hi", 49, "art")
+        assert cache.get("cow", "hi", 49) == "art"
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+
+    def test_key_includes_character_and_width(self):
+        cache = RenderCache()
+        cache.put("cow", "hi", 49, "art")
+        assert cache.get("tux", "hi", 49) is None
+        assert cache.get("cow", "hi", 20) is None
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = RenderCache(max_entries=2)
+        cache.put("cow", "a", 49, "A")
+        cache.put("cow", "b", 49, "B")
+        cache.get("cow", "a", 49)
+        cache.put("cow", "c", 49, "C")
+        assert cache.get("cow", "b", 49) is None
+        assert cache.get("cow", "a", 49) == "A"
+        assert cache.stats().evictions == 1
+
+    def test_evicts_to_stay_within_byte_budget(self):
+        cache = RenderCache(max_entries=100, max_bytes=10, max_entry_bytes=10)
+        cache.put("cow", "a", 49, "x" * 6)
+        cache.put("cow", "b", 49, "y" * 6)
+        stats = cache.stats()
+        assert (stats.entries, stats.bytes, stats.evictions) == (1, 6, 1)
+
+    def test_counts_utf8_bytes(self):
+        cache = RenderCache()
+        cache.put("cow", "a", 49, "漢")
+        assert cache.stats().bytes == 3
+
+    def test_oversized_entries_are_not_stored(self):
+        cache = RenderCache(max_entries=100, max_bytes=1600)
+        cache.put("cow", "small", 49, "s")
+        cache.put("cow", "huge", 49, "h" * 101)
+        assert cache.get("cow", "huge", 49) is None
+        assert cache.get("cow", "small", 49) == "s"
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = RenderCache(ttl=5, clock=clock)
+        cache.put("cow", "a", 49, "A")
+        clock.now = 4.9
+        assert cache.get("cow", "a", 49) == "A"
+        clock.now = 5.0
+        assert cache.get("cow", "a", 49) is None
+        assert cache.stats().expirations == 1
+
+    def test_get_or_render_only_renders_once(self):
+        cache = RenderCache()
+        calls = []
+
+        def render():
+            calls.append(1)
+            return "art"
+
+        assert cache.get_or_render("cow", "a", 49, render) == "art"
+        assert cache.get_or_render("cow", "a", 49, render) == "art"
+        assert len(calls) == 1
+
+    def test_zero_entries_disables_cache(self):
+        cache = RenderCache(max_entries=0)
+        cache.put("cow", "a", 49, "A")
+        assert cache.get("cow", "a", 49) is None
+        assert cache.stats().misses == 0
+
+    def test_clear_resets_state(self):
+        cache = RenderCache()
+        cache.put("cow", "a", 49, "A")
+        cache.get("cow", "a", 49)
+        cache.clear()
+        assert cache.stats() == cache.stats().__class__(0, 0, 0, 0, 0, 0)
+
+    def test_rejects_negative_limits(self):
+        with pytest.raises(ValueError):
+            RenderCache(max_entries=-1)
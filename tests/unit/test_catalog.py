@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from demo.catalog import ToolCatalog, summary_line
+from demo.prompting import build_initial_messages, compile_prompt
+from demo.toolcall import decode_tool_call, parse_tool_call
+
+
+def _tool(name, description, tags=(), properties=("text",)):
+    return SimpleNamespace(
+        name=name,
+        description=description,
+        tags=set(tags),
+        parameters={
+            "properties": {prop: {"type": "string"} for prop in properties},
+            "required": list(properties),
+        },
+    )
+
+
+TOOLS = [
+    _tool("cowsay-mcp", "Speech bubbles with a cow. Long details.", ["art"]),
+    _tool("fetch-url", "Download a web page over HTTP.", ["http"], ["url"]),
+    _tool("read-file", "Read a file from the filesystem.", ["filesystem"], ["path"]),
+]
+
+
+class TestToolCatalog:
+    """Test the name index and relevance-based selection."""
+
+    def test_is_a_name_index_in_registration_order(self):
+        catalog = ToolCatalog(TOOLS)
+        assert list(catalog) == ["cowsay-mcp", "fetch-url", "read-file"]
+        assert catalog["fetch-url"] is TOOLS[1]
+        assert "missing" not in catalog
+
+    def test_select_ranks_by_relevance(self):
+        catalog = ToolCatalog(TOOLS)
+        assert catalog.select("please download this http page", 1) == [TOOLS[1]]
+        assert catalog.select("read the file at this path", 2)[0] is TOOLS[2]
+        assert catalog.select("a cow says hi", None)[0] is TOOLS[0]
+
+    def test_ties_keep_registration_order(self):
+        catalog = ToolCatalog(TOOLS)
+        assert catalog.select("nothing matches", 2) == TOOLS[:2]
+        with pytest.raises(ValueError):
+            catalog.select("x", 0)
+
+    def test_summary_line_is_the_first_sentence(self):
+        assert summary_line(TOOLS[0]) == "Speech bubbles with a cow."
+
+
+class TestCatalogPrompt:
+    """Test the compact multi-tool prompt."""
+
+    def test_prompt_lists_only_selected_tools(self):
+        many = TOOLS + [
+            _tool(f"tool-{index}", f"Unrelated helper number {index}.")
+            for index in range(200)
+        ]
+        selected = ToolCatalog(many).select("download a page over http", 2)
+        prompt = compile_prompt(selected).system_prompt
+
+        assert "- fetch-url: Download a web page over HTTP." in prompt
+        assert prompt.count("\n- ") == 2
+        assert '"url": "..."' in prompt
+        assert len(prompt) < 800
+
+    def test_messages_name_a_single_tool_or_ask_for_the_best(self):
+        single = build_initial_messages("nature", TOOLS[0])
+        several = build_initial_messages("nature", TOOLS[:2])
+        assert "using cowsay-mcp" in single[1]["content"]
+        assert "using the most suitable tool" in several[1]["content"]
+        assert "Available tools:" in several[0]["content"]
+
+
+class TestDispatch:
+    """Test parsing calls against a name index."""
+
+    def test_parse_tool_call_accepts_any_catalog_tool(self):
+        catalog = ToolCatalog(TOOLS)
+        raw = '{"tool": "read-file", "args": {"path": "a.txt", "text": "x"}}'
+        assert parse_tool_call(raw, catalog) == "x"
+        call = decode_tool_call(raw, catalog)
+        assert (call.tool, call.args["path"]) == ("read-file", "a.txt")
+
+    def test_unknown_tool_is_rejected(self):
+        with pytest.raises(ValueError, match="Unexpected tool requested: rm"):
+            parse_tool_call('{"tool": "rm", "args": {"text": "x"}}', ToolCatalog(TOOLS))
+
+    def test_single_name_is_not_a_substring_match(self):
+        with pytest.raises(ValueError, match="Unexpected tool requested"):
+            parse_tool_call('{"tool": "cowsay", "args": {"text": "x"}}', "cowsay-mcp")
+
+    def test_batch_texts_are_joined(self):
+        raw = '{"tool": "cowsay-mcp-batch", "args": {"texts": ["a", "b"]}}'
+        assert parse_tool_call(raw, {"cowsay-mcp-batch"}) == "a\nb"
+
+
+class TestMultiToolPipeline:
+    """Test that the pipeline dispatches to the tool the model picked."""
+
+    def test_model_can_pick_the_batch_tool(self, monkeypatch, capsys):
+        from demo.main import fetch_tool_catalog, run_pipeline
+
+        catalog = asyncio.run(fetch_tool_catalog())
+        assert {"cowsay-mcp", "cowsay-mcp-batch"} <= set(catalog)
+        prompts = []
+
+        def fake_chat_once(bundle, messages, **kwargs):
+            prompts.append((messages, kwargs))
+            if len(prompts) == 1:
+                return (
+                    '{"tool": "cowsay-mcp-batch", '
+                    '"args": {"texts": ["one", "two"], "colour": "red"}}'
+                )
+            return "An explanation."
+
+        client = MagicMock()
+        client.connect = AsyncMock()
+        client.call_tool = AsyncMock(
+            return_value=[
+                {"result": "art one", "error": None},
+                {"result": None, "error": "bad text"},
+            ]
+        )
+        monkeypatch.setattr(
+            "demo.main.load_model", lambda model_id: (object(), object())
+        )
+        monkeypatch.setattr("demo.main.chat_once", fake_chat_once)
+
+        asyncio.run(run_pipeline(client, tools=2))
+
+        client.call_tool.assert_awaited_once_with(
+            "cowsay-mcp-batch", {"texts": ["one", "two"]}
+        )
+        messages, kwargs = prompts[0]
+        assert "cowsay-mcp-batch" in messages[0]["content"]
+        assert kwargs["tool"] is None
+        assert prompts[1][0][1]["content"] == "one\ntwo"
+        assert "art one\nerror: bad text" in capsys.readouterr().out
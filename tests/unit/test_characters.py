@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+import cowsay
+import pytest
+
+from cowsay_mcp.cache import RenderCache
+from cowsay_mcp.characters import CharacterRegistry
+from cowsay_mcp.render import CowsayError, render
+from cowsay_mcp.tools import list_characters, run_cowsay, run_cowsay_async
+
+SNAIL = "\n   \\\n    \\  @\n     _/|\n"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def write(path, template: str, mtime_ns: int) -> None:
+    path.write_text(template, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestCharacterRegistry:
+    """Test built-in lookups and the watched custom directory."""
+
+    def test_builtins_are_compiled_once(self):
+        registry = CharacterRegistry()
+        assert registry.names() == sorted(cowsay.char_names)
+        assert registry.get("tux") is registry.get("tux")
+        with pytest.raises(CowsayError, match="Available Characters"):
+            registry.get("nobody")
+
+    def test_custom_directory_is_reloaded_incrementally(self, tmp_path, monkeypatch):
+        clock = FakeClock()
+        registry = CharacterRegistry(clock=clock)
+        changes: list[str] = []
+        registry.add_listener(changes.append)
+        write(tmp_path / "snail.cow", SNAIL, 1_000)
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        assert registry.watch(str(tmp_path), poll_interval=5) == {"snail"}
+        snail = registry.get("snail")
+        assert render("hi", snail).endswith("  \\  @\n       _/|")
+        assert {"name": "snail", "source": str(tmp_path / "snail.cow")} in (
+            registry.describe()
+        )
+
+        reads: list[str] = []
+        real_open = open
+        monkeypatch.setattr(
+            "builtins.open",
+            lambda path, *a, **k: reads.append(str(path)) or real_open(path, *a, **k),
+        )
+        write(tmp_path / "tux.cow", "\n  <o>\n", 2_000)
+        assert registry.get("tux").name == "tux"  # before the poll interval
+        assert reads == []
+
+        clock.now = 5
+        assert registry.get("tux").lines == ("  <o>",)
+        assert reads == [str(tmp_path / "tux.cow")]  # snail was not re-read
+        assert registry.get("snail") is snail
+
+        (tmp_path / "tux.cow").unlink()
+        assert registry.refresh() == {"tux"}
+        assert registry.get("tux").lines == CharacterRegistry().get("tux").lines
+        assert changes == ["snail", "tux", "tux"]
+
+    def test_missing_directory_is_empty(self, tmp_path):
+        registry = CharacterRegistry()
+        assert registry.watch(str(tmp_path / "absent")) == set()
+
+
+class TestCharacterTools:
+    """Test the character argument of the tools."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        cache = RenderCache()
+        monkeypatch.setattr("cowsay_mcp.tools.render_cache", cache)
+        return cache
+
+    @pytest.mark.parametrize("character", ["tux", "dragon", "kitty"])
+    def test_run_cowsay_uses_character(self, character):
+        expected = cowsay.get_output_string(character, "hello")
+        assert run_cowsay("hello", character) == expected
+        assert asyncio.run(run_cowsay_async("hello", character)) == expected
+
+    def test_unknown_character_is_reported(self):
+        assert run_cowsay("hello", "nobody").startswith(
+            "cowsay error: Available Characters"
+        )
+
+    def test_changed_characters_are_dropped_from_cache(self, fresh_cache):
+        from cowsay_mcp.tools import _on_character_changed
+
+        run_cowsay("hello", "tux")
+        run_cowsay("hello", "cow")
+        _on_character_changed("tux")
+        assert fresh_cache.stats().entries == 1
+
+    def test_list_characters_and_resource(self):
+        from fastmcp import Client
+
+        from cowsay_mcp.server import server
+
+        async def read() -> list[dict[str, str]]:
+            async with Client(server) as client:
+                contents = await client.read_resource("characters://list")
+            return json.loads(contents[0].text)
+
+        listed = asyncio.run(read())
+        assert listed == list_characters()
+        assert {"name": "cow", "source": "builtin"} in listed
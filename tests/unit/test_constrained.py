@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from demo.constrained import (
+    CompiledToolCall,
+    ConstraintCursor,
+    ToolCallAutomaton,
+    compile_tool_call,
+    tool_call_template,
+    vocabulary,
+)
+from demo.main import fetch_primary_tool, parse_tool_call
+
+PIECES = [
+    "Sure",  # 0: chatter the unconstrained model prefers
+    " here",
+    '{"',
+    "tool",
+    '": "',
+    "cowsay",
+    "-mcp",
+    '", "',
+    "args",
+    '": {"',
+    "text",
+    "Hello",
+    " cow",
+    "\\n",
+    "\\",
+    '"}}',
+    "}}",
+    '"',
+    "}",
+    "<eos>",  # 19
+]
+EOS = 19
+
+
+class ToyTokenizer:
+    eos_token_id = EOS
+    all_special_ids = [EOS]
+
+    def __len__(self):
+        return len(PIECES)
+
+    def decode(self, tokens):
+        return "".join(PIECES[token] for token in tokens)
+
+
+def _tool(parameters):
+    return SimpleNamespace(name="cowsay-mcp", parameters=parameters)
+
+
+TEXT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "text": {"type": "string"},
+        "character": {"type": "string", "default": "cow"},
+    },
+    "required": ["text"],
+}
+
+
+def _decode(compiled, script, max_tokens=40):
+    """Decode a "model" that wants to emit `script`, token by token.
+
+    A wanted token is taken when the mask allows it; otherwise the lowest
+    allowed id is forced in its place and the model tries again next step.
+    """
+    cursor = ConstraintCursor(compiled)
+    wanted = list(script)
+    out = []
+    for _ in range(max_tokens):
+        allowed = cursor.allowed()
+        if wanted and wanted[0] in allowed:
+            token = wanted.pop(0)
+        else:
+            token = min(allowed)
+        cursor.advance(token)
+        if token == EOS:
+            break
+        out.append(PIECES[token])
+    return "".join(out), cursor
+
+
+class TestTemplate:
+    """Test the automaton built from the tool schema."""
+
+    def test_accepts_exactly_the_json_dumps_call(self):
+        automaton = ToolCallAutomaton(tool_call_template("cowsay-mcp", TEXT_SCHEMA))
+        call = json.dumps({"tool": "cowsay-mcp", "args": {"text": 'a "b"\nc'}})
+
+        assert automaton.advance(0, call) == automaton.final
+        assert automaton.advance(0, call + " ") is None
+        empty = json.dumps({"tool": "cowsay-mcp", "args": {"text": ""}})
+        assert automaton.advance(0, empty) is None
+        assert automaton.advance(0, call.replace("cowsay-mcp", "other")) is None
+        assert (
+            automaton.advance(0, '{"tool": "cowsay-mcp", "args": {"text": "\\x') is None
+        )
+
+    def test_integer_arguments(self):
+        schema = {"properties": {"n": {"type": "integer"}}}
+        automaton = ToolCallAutomaton(tool_call_template("t", schema))
+        assert (
+            automaton.advance(0, '{"tool": "t", "args": {"n": 42}}') == automaton.final
+        )
+        assert automaton.advance(0, '{"tool": "t", "args": {"n": }}') is None
+
+    def test_unsupported_types_are_rejected(self):
+        with pytest.raises(ValueError, match="Cannot constrain"):
+            tool_call_template("t", {"properties": {"flag": {"type": "boolean"}}})
+
+
+class TestCompiledToolCall:
+    """Test token masks over a toy vocabulary."""
+
+    def test_masked_decoding_yields_a_valid_call(self):
+        compiled = compile_tool_call(_tool(TEXT_SCHEMA), ToyTokenizer())
+        # Unconstrained, this "model" would answer 'Sure here"}}' with no tool call.
+        text, cursor = _decode(compiled, [0, 1, 15, EOS])
+
+        assert cursor.done
+        assert text == '{"tool": "cowsay-mcp", "args": {"text": "Sure here"}}'
+        assert parse_tool_call(text, "cowsay-mcp") == "Sure here"
+
+    def test_strings_cannot_be_empty_or_badly_escaped(self):
+        compiled = compile_tool_call(_tool(TEXT_SCHEMA), ToyTokenizer())
+        # Closing the string at once, or "\S", are both masked out.
+        text, cursor = _decode(compiled, [15, 14, 0, 17, EOS])
+
+        assert cursor.done
+        assert json.loads(text)["args"]["text"]
+
+    def test_final_state_only_allows_eos(self):
+        compiled = compile_tool_call(_tool(TEXT_SCHEMA), ToyTokenizer())
+        assert compiled.allowed(compiled.final) == (EOS,)
+        assert EOS not in compiled.allowed(0)
+
+    def test_compiled_masks_are_cached_per_tool_and_tokenizer(self):
+        tokenizer = ToyTokenizer()
+        first = compile_tool_call(_tool(TEXT_SCHEMA), tokenizer)
+        assert compile_tool_call(_tool(TEXT_SCHEMA), tokenizer) is first
+        assert compile_tool_call(_tool(TEXT_SCHEMA), ToyTokenizer()) is not first
+        other = _tool({"properties": {"message": {"type": "string"}}})
+        assert compile_tool_call(other, tokenizer) is not first
+
+    def test_allowed_sets_are_memoised(self):
+        compiled = CompiledToolCall(
+            ToolCallAutomaton(tool_call_template("cowsay-mcp", TEXT_SCHEMA)),
+            *vocabulary(ToyTokenizer()),
+        )
+        assert compiled.allowed(0) is compiled.allowed(0)
+        assert [PIECES[token] for token in compiled.allowed(0)] == ['{"']
+
+    def test_real_tool_schema_compiles(self):
+        tool = asyncio.run(fetch_primary_tool())
+        compiled = compile_tool_call(tool, ToyTokenizer())
+        text, cursor = _decode(compiled, [11, 12, 15, EOS])
+        assert cursor.done
+        assert parse_tool_call(text, tool.name) == "Hello cow"
+
+
+class TestChatOnceConstraint:
+    """Test that chat_once hands the compiled constraint to the backend."""
+
+    def test_backend_receives_constraint_kwargs(self, monkeypatch):
+        from demo import llm
+        from demo.backends import LLMBackend
+
+        seen = {}
+
+        def generate(model, tokenizer, prompt, **kwargs):
+            seen.update(kwargs)
+            return '{"tool": "cowsay-mcp", "args": {"text": "hi"}}'
+
+        backend = LLMBackend(
+            name="masked",
+            load=lambda model_id, **options: (object(), ToyTokenizer()),
+            generate=generate,
+            constrain=lambda compiled: {"mask": compiled},
+        )
+        monkeypatch.setattr(llm, "backend_for", lambda bundle: backend)
+        tokenizer = ToyTokenizer()
+        tool = _tool(TEXT_SCHEMA)
+
+        llm.chat_once(
+            (object(), tokenizer), [{"role": "user", "content": "x"}], tool=tool
+        )
+
+        assert seen["mask"] is compile_tool_call(tool, tokenizer)
+
+    def test_unconstrainable_schema_decodes_freely(self, monkeypatch):
+        from demo import llm
+        from demo.backends import LLMBackend
+
+        seen = {}
+        backend = LLMBackend(
+            name="masked",
+            load=lambda model_id, **options: (object(), ToyTokenizer()),
+            generate=lambda model, tokenizer, prompt, **kwargs: seen.update(kwargs)
+            or "ok",
+            constrain=lambda compiled: {"mask": compiled},
+        )
+        monkeypatch.setattr(llm, "backend_for", lambda bundle: backend)
+        tool = _tool({"properties": {"flag": {"type": "boolean"}}})
+
+        llm.chat_once(
+            (object(), ToyTokenizer()), [{"role": "user", "content": "x"}], tool=tool
+        )
+
+        assert "mask" not in seen
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -84,7 +86,7 @@ class TestFetchPrimaryTool:
 
         monkeypatch.setattr("demo.main.server", mock_server)
 
-        result = fetch_primary_tool()
+        result = asyncio.run(fetch_primary_tool())
         assert result == mock_tool
 
     def test_fetch_primary_tool_empty(self, monkeypatch):
@@ -96,4 +98,337 @@ class TestFetchPrimaryTool:
         monkeypatch.setattr("demo.main.server", mock_server)
 
         with pytest.raises(RuntimeError, match="No tools registered"):
-            fetch_primary_tool()
+            asyncio.run(fetch_primary_tool())
+
+
+class TestToolClients:
+    """Test backend selection for the demo's tool calls."""
+
+    def test_default_backend_is_in_process(self):
+        from demo.client import FastMCPToolClient, open_client
+        from demo.main import _parse_args
+
+        async def call() -> str:
+            async with open_client(_parse_args(None).backend) as client:
+                assert isinstance(client, FastMCPToolClient)
+                await client.connect()
+                return await client.call_tool("cowsay-mcp", {"text": "hi"})
+
+        assert "| hi |" in asyncio.run(call())
+
+    def test_http_backend_requires_url(self):
+        from demo.client import open_client
+        from demo.main import _parse_args
+
+        with pytest.raises(SystemExit):
+            _parse_args(["--backend", "http"])
+        with pytest.raises(ValueError, match="URL"):
+            open_client("http")
+        assert _parse_args(
+            ["--server-command", "uv run x --worker"]
+        ).server_command == [
+            "uv",
+            "run",
+            "x",
+            "--worker",
+        ]
+
+    def test_stdio_client_rejects_mismatched_ids(self, monkeypatch):
+        from demo.client import StdioWorkerClient, ToolCallError
+
+        proc = MagicMock()
+        proc.stdout.readline = AsyncMock(return_value=b'{"id": 99, "result": "art"}\n')
+        proc.stdin.drain = AsyncMock()
+        monkeypatch.setattr(
+            "demo.client.asyncio.create_subprocess_exec", AsyncMock(return_value=proc)
+        )
+
+        client = StdioWorkerClient(["worker"])
+        with pytest.raises(ToolCallError, match="another request"):
+            asyncio.run(client.call_tool("cowsay-mcp", {"text": "hi"}))
+        assert b'"id": 1' in proc.stdin.write.call_args.args[0]
+
+
+class TestRunPipeline:
+    """Test the single-loop demo pipeline."""
+
+    def test_model_loading_overlaps_tool_discovery(self, monkeypatch, capsys):
+        import threading
+
+        from demo.main import run_pipeline
+
+        discovered = threading.Event()
+        tool = MagicMock()
+        tool.name = "cowsay-mcp"
+
+        def slow_load(model_id):
+            # Only returns if tool discovery ran while the model was loading.
+            assert discovered.wait(timeout=5)
+            return (object(), object())
+
+        async def fetch():
+            discovered.set()
+            return tool
+
+        client = MagicMock()
+        client.connect = AsyncMock()
+        client.call_tool = AsyncMock(return_value="ASCII art")
+        monkeypatch.setattr("demo.main.load_model", slow_load)
+        monkeypatch.setattr("demo.main.fetch_primary_tool", fetch)
+        monkeypatch.setattr("demo.main.build_initial_messages", lambda theme, t: [])
+        monkeypatch.setattr(
+            "demo.main.chat_once",
+            lambda bundle, messages, **kwargs: '{"tool": "cowsay-mcp", "args": {"text": "moo"}}',
+        )
+
+        asyncio.run(run_pipeline(client))
+
+        client.connect.assert_awaited_once()
+        client.call_tool.assert_awaited_once_with("cowsay-mcp", {"text": "moo"})
+        assert "ASCII art" in capsys.readouterr().out
+
+
+class TestBatchRunner:
+    """Test the batched multi-theme runner."""
+
+    @staticmethod
+    def _tool():
+        tool = MagicMock()
+        tool.name = "cowsay-mcp"
+        return tool
+
+    def test_plan_items_repeats_every_theme(self):
+        from demo.batch import plan_items
+
+        items = plan_items(["a", "b"], samples=2)
+        assert [(item.theme, item.sample) for item in items] == [
+            ("a", 0),
+            ("b", 0),
+            ("a", 1),
+            ("b", 1),
+        ]
+        with pytest.raises(ValueError):
+            plan_items(["a"], samples=0)
+
+    def test_tool_calls_overlap_next_generation(self, monkeypatch):
+        import threading
+
+        from demo.batch import plan_items, run_batch
+
+        tool_started = threading.Event()
+        batches = []
+
+        def fake_chat_batch(bundle, conversations, **kwargs):
+            batches.append(len(conversations))
+            if len(batches) == 3:
+                # Second generation batch: the first batch's tool calls must
+                # already be running on the loop.
+                assert tool_started.wait(timeout=5)
+            if conversations[0][0]["content"] == "system":
+                return [
+                    '{"tool": "cowsay-mcp", "args": {"text": "%s"}}'
+                    % messages[1]["content"]
+                    for messages in conversations
+                ]
+            return ["an explanation of two words"] * len(conversations)
+
+        async def call_tool(name, args):
+            tool_started.set()
+            return f"<{args['text']}>"
+
+        client = MagicMock()
+        client.call_tool = AsyncMock(side_effect=call_tool)
+        monkeypatch.setattr("demo.batch.chat_batch", fake_chat_batch)
+        monkeypatch.setattr(
+            "demo.batch.build_initial_messages",
+            lambda theme, tool: [
+                {"role": "system", "content": "system"},
+                {"role": "user", "content": theme},
+            ],
+        )
+
+        report = asyncio.run(
+            run_batch(
+                (object(), object()),
+                client,
+                self._tool(),
+                plan_items(["a", "b", "c"]),
+                batch_size=2,
+            )
+        )
+
+        assert batches == [2, 2, 1, 1]
+        assert [item.result for item in report.items] == ["<a>", "<b>", "<c>"]
+        assert all(item.explanation for item in report.items)
+        summary = report.summary()
+        assert summary["succeeded"] == 3
+        assert set(summary["stage_s"]) == {"generate", "parse", "tool", "explain"}
+        assert report.generated_tokens > 0
+
+    def test_invalid_items_are_reported_not_fatal(self, monkeypatch):
+        from demo.batch import plan_items, run_batch
+
+        responses = iter(
+            [
+                ['{"tool": "cowsay-mcp", "args": {"text": "moo"}}', "no json"],
+                ["still no json"],  # the re-prompt with the parse error
+                ["fine"],  # the explanation of "moo"
+            ]
+        )
+        client = MagicMock()
+        client.call_tool = AsyncMock(return_value="art")
+        monkeypatch.setattr(
+            "demo.batch.chat_batch", lambda bundle, conversations, **kw: next(responses)
+        )
+        monkeypatch.setattr("demo.batch.build_initial_messages", lambda theme, tool: [])
+
+        report = asyncio.run(
+            run_batch(
+                (object(), object()), client, self._tool(), plan_items(["a", "b"])
+            )
+        )
+
+        assert report.items[0].result == "art"
+        assert report.items[1].error.startswith("Invalid tool call:")
+        assert report.items[1].raw_response == "still no json"
+        assert report.summary()["failed"] == 1
+        assert report.repair.failures == 1
+        assert report.repair.reprompt_fixes == 0
+        assert report.repair.extra_tokens > 0
+        client.call_tool.assert_awaited_once_with("cowsay-mcp", {"text": "moo"})
+
+    def test_reprompt_repairs_items_in_one_call(self, monkeypatch):
+        from demo.batch import plan_items, run_batch
+
+        calls = []
+        responses = iter(
+            [
+                [
+                    "no json",
+                    '```json\n{"name": "cowsay-mcp", "arguments": {"text": "b"},}\n```',
+                ],
+                ['{"tool": "cowsay-mcp", "args": {"text": "a"}}'],
+                ["about a", "about b"],
+            ]
+        )
+
+        def fake_chat_batch(bundle, conversations, **kwargs):
+            calls.append(conversations)
+            return next(responses)
+
+        client = MagicMock()
+        client.call_tool = AsyncMock(return_value="art")
+        monkeypatch.setattr("demo.batch.chat_batch", fake_chat_batch)
+        monkeypatch.setattr("demo.batch.build_initial_messages", lambda theme, tool: [])
+
+        report = asyncio.run(
+            run_batch(
+                (object(), object()), client, self._tool(), plan_items(["a", "b"])
+            )
+        )
+
+        assert [item.poem for item in report.items] == ["a", "b"]
+        assert report.summary()["failed"] == 0
+        assert report.summary()["repaired"] == 2
+        assert (report.repair.local_fixes, report.repair.reprompt_fixes) == (1, 1)
+        assert report.repair.success_rate == 1.0
+        retry = calls[1][0]
+        assert [message["role"] for message in retry] == ["assistant", "user"]
+        assert "No JSON found" in retry[1]["content"]
+
+
+class TestChatBatch:
+    """Test batched generation and its sequential fallback."""
+
+    @staticmethod
+    def _backend(monkeypatch, batch_generate, constrain=None):
+        from demo import llm
+        from demo.backends import LLMBackend
+
+        backend = LLMBackend(
+            name="fake",
+            load=lambda model_id, **options: (object(), object()),
+            generate=lambda model, tokenizer, prompt, **kwargs: prompt,
+            batch_generate=batch_generate,
+            constrain=constrain,
+        )
+        monkeypatch.setattr(llm, "backend_for", lambda bundle: backend)
+        return llm
+
+    def test_falls_back_to_chat_once(self, monkeypatch):
+        llm = self._backend(monkeypatch, None)
+        monkeypatch.setattr(
+            llm, "chat_once", lambda bundle, messages, **kwargs: messages[0]["content"]
+        )
+        conversations = [
+            [{"role": "user", "content": "a"}],
+            [{"role": "user", "content": "b"}],
+        ]
+        assert llm.chat_batch(None, conversations) == ["a", "b"]
+
+    def test_uses_batch_generate_when_available(self, monkeypatch):
+        calls = []
+
+        def fake_batch_generate(model, tokenizer, prompts, **kwargs):
+            calls.append((prompts, kwargs))
+            return [f" out{i} " for i in range(len(prompts))]
+
+        llm = self._backend(monkeypatch, fake_batch_generate)
+        tokenizer = MagicMock()
+        tokenizer.encode = lambda text: list(text)
+        monkeypatch.setattr(llm, "render_messages", lambda messages: "p")
+        monkeypatch.setattr(llm, "chat_once", MagicMock(side_effect=AssertionError))
+
+        outputs = llm.chat_batch(
+            (object(), tokenizer),
+            [[{"role": "user", "content": "x"}]] * 3,
+            temperature=0.5,
+        )
+
+        assert outputs == ["out0", "out1", "out2"]
+        assert calls == [(["p", "p", "p"], {"max_tokens": 256, "temperature": 0.5})]
+        assert llm.count_tokens((object(), tokenizer), "abc") == 3
+
+    def test_batched_tool_calls_stop_after_the_json_object(self, monkeypatch):
+        llm = self._backend(
+            monkeypatch,
+            lambda model, tokenizer, prompts, **kwargs: [
+                '{"tool": "t", "args": {"text": "}"}} and then some',
+                "no json at all",
+            ],
+        )
+        monkeypatch.setattr(llm, "chat_once", MagicMock(side_effect=AssertionError))
+
+        outputs = llm.chat_batch(
+            (object(), object()),
+            [[{"role": "user", "content": "x"}]] * 2,
+            until_tool_call=True,
+        )
+
+        assert outputs == ['{"tool": "t", "args": {"text": "}"}}', "no json at all"]
+
+    def test_constrained_calls_are_generated_one_by_one(self, monkeypatch):
+        llm = self._backend(
+            monkeypatch,
+            MagicMock(side_effect=AssertionError),
+            constrain=lambda compiled: {},
+        )
+        calls = []
+
+        def fake_chat_once(bundle, messages, **kwargs):
+            calls.append(kwargs)
+            return messages[0]["content"]
+
+        monkeypatch.setattr(llm, "chat_once", fake_chat_once)
+        tool = SimpleNamespace(name="t", parameters={})
+        conversations = [
+            [{"role": "user", "content": "a"}],
+            [{"role": "user", "content": "b"}],
+        ]
+
+        outputs = llm.chat_batch(
+            (object(), object()), conversations, until_tool_call=True, tool=tool
+        )
+
+        assert outputs == ["a", "b"]
+        assert [(c["tool"], c["until_tool_call"]) for c in calls] == [(tool, True)] * 2
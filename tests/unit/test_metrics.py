@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from cowsay_mcp.metrics import (
+    LatencyHistogram,
+    MetricsRegistry,
+    bucket_index,
+    bucket_upper_bound,
+    payload_size,
+)
+
+
+def test_bucket_bounds_contain_their_values():
+    previous = -1
+    for value in list(range(0, 4096)) + [10**6, 10**9, 2**40 + 12345]:
+        index = bucket_index(value)
+        assert index >= previous or value > 4095
+        assert value <= bucket_upper_bound(index)
+        if value >= 32:
+            # relative error stays within one sub-bucket
+            assert bucket_upper_bound(index) - value < value / 16 + 1
+        previous = index
+
+
+def test_histogram_percentiles_track_recorded_values():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+
+    assert histogram.count == 1000
+    assert histogram.minimum == 1000
+    assert histogram.maximum == 1_000_000
+    assert histogram.percentile(50) == pytest.approx(500_000, rel=1 / 16)
+    assert histogram.percentile(99) == pytest.approx(990_000, rel=1 / 16)
+    assert histogram.percentile(100) == 1_000_000
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_histogram_cumulative_counts_are_monotonic():
+    histogram = LatencyHistogram()
+    for value in (5, 50, 500, 5000):
+        histogram.record(value)
+
+    assert histogram.cumulative((10, 100, 1000, 10_000)) == [1, 2, 3, 4]
+
+
+def test_payload_size_counts_utf8_bytes():
+    assert payload_size({"text": "héllo"}) == len("text") + len("héllo".encode())
+    assert payload_size(["ab", None, 12]) == 4
+
+
+def test_registry_snapshot_and_prometheus_export():
+    registry = MetricsRegistry()
+    registry.record("cowsay-mcp", 2_000_000, bytes_in=10, bytes_out=100)
+    registry.record("cowsay-mcp", 4_000_000, bytes_in=5, error=True)
+
+    snapshot = registry.snapshot()["cowsay-mcp"]
+    assert (snapshot["calls"], snapshot["errors"]) == (2, 1)
+    assert (snapshot["bytes_in"], snapshot["bytes_out"]) == (15, 100)
+    assert snapshot["latency_ms"]["mean"] == 3.0
+    assert snapshot["latency_ms"]["max"] == 4.0
+
+    text = registry.render_prometheus()
+    assert 'cowsay_mcp_tool_calls_total{tool="cowsay-mcp"} 2' in text
+    assert 'cowsay_mcp_tool_errors_total{tool="cowsay-mcp"} 1' in text
+    assert (
+        'cowsay_mcp_tool_latency_seconds_bucket{tool="cowsay-mcp",le="0.001"} 0' in text
+    )
+    assert (
+        'cowsay_mcp_tool_latency_seconds_bucket{tool="cowsay-mcp",le="0.005"} 2' in text
+    )
+    assert 'cowsay_mcp_tool_latency_seconds_count{tool="cowsay-mcp"} 2' in text
+
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_server_middleware_records_tool_calls():
+    from fastmcp import Client
+
+    from cowsay_mcp.server import metrics, server
+
+    async def run() -> tuple[dict, str]:
+        async with Client(server) as client:
+            await client.call_tool("cowsay-mcp", {"text": "counted"})
+            await client.call_tool("cowsay-mcp-batch", {"texts": ["a", "b"]})
+            with pytest.raises(Exception):
+                await client.call_tool("cowsay-mcp", {})
+            tools_json = await client.read_resource("metrics://tools")
+            prometheus = await client.read_resource("metrics://prometheus")
+        return json.loads(tools_json[0].text), prometheus[0].text
+
+    metrics.reset()
+    report, prometheus = asyncio.run(run())
+
+    cowsay_stats = report["tools"]["cowsay-mcp"]
+    assert (cowsay_stats["calls"], cowsay_stats["errors"]) == (2, 1)
+    assert cowsay_stats["bytes_out"] > cowsay_stats["bytes_in"] > 0
+    assert report["tools"]["cowsay-mcp-batch"]["calls"] == 1
+    assert "hits" in report["render_cache"]
+    assert 'cowsay_mcp_tool_calls_total{tool="cowsay-mcp-batch"} 1' in prometheus
+    assert "cowsay_mcp_render_cache_misses_total" in prometheus
+
+
+def test_invalid_input_is_counted_as_an_error():
+    from fastmcp import Client
+
+    from cowsay_mcp.server import metrics, server
+
+    async def run():
+        async with Client(server) as client:
+            blank = await client.call_tool(
+                "cowsay-mcp", {"text": "   "}, raise_on_error=False
+            )
+            unknown = await client.call_tool(
+                "cowsay-mcp",
+                {"text": "hi", "character": "nobody"},
+                raise_on_error=False,
+            )
+        return blank, unknown
+
+    metrics.reset()
+    blank, unknown = asyncio.run(run())
+
+    assert blank.is_error and "meaningful" in blank.content[0].text
+    assert unknown.is_error and "Available Characters" in unknown.content[0].text
+    stats = metrics.snapshot()["cowsay-mcp"]
+    assert (stats["calls"], stats["errors"]) == (2, 2)
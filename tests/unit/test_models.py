@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+
+from demo import llm
+from demo.models import ModelRegistry
+
+
+class _Loader:
+    def __init__(self):
+        self.loads: list[tuple[str, dict]] = []
+
+    def __call__(self, model_id, **options):
+        self.loads.append((model_id, options))
+        return (f"model:{model_id}", f"tokenizer:{model_id}")
+
+
+def _sizes(mapping):
+    return lambda bundle: mapping[bundle[0]]
+
+
+class TestModelRegistry:
+    """Test model reuse, warm-up, eviction and metrics."""
+
+    def test_reuses_bundle_per_id_and_options(self):
+        loader = _Loader()
+        warmed = []
+        registry = ModelRegistry(loader, warmup=warmed.append, size_of=lambda b: 0)
+
+        first = registry.get("m")
+        assert registry.get("m") is first
+        registry.get("m", adapter_path="lora")
+        registry.get("m", warmup=False, adapter_path="other")
+
+        assert loader.loads == [
+            ("m", {}),
+            ("m", {"adapter_path": "lora"}),
+            ("m", {"adapter_path": "other"}),
+        ]
+        assert warmed == [first, ("model:m", "tokenizer:m")]
+        stats = registry.stats()
+        assert (stats.loads, stats.hits) == (3, 1)
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        loader = _Loader()
+        registry = ModelRegistry(
+            loader,
+            memory_budget=100,
+            size_of=_sizes({"model:a": 40, "model:b": 40, "model:c": 40}),
+        )
+
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")  # b is now least recently used
+        registry.get("c")
+
+        stats = registry.stats()
+        assert [model.model_id for model in stats.models] == ["a", "c"]
+        assert stats.evictions == 1
+        assert stats.bytes == 80
+        registry.get("b")
+        assert [model_id for model_id, _ in loader.loads] == ["a", "b", "c", "b"]
+
+    def test_oversized_model_stays_loaded(self):
+        registry = ModelRegistry(
+            _Loader(), memory_budget=10, size_of=_sizes({"model:big": 50})
+        )
+        registry.get("big")
+        assert [model.model_id for model in registry.stats().models] == ["big"]
+
+    def test_records_load_and_warmup_time(self):
+        ticks = iter([0.0, 2.0, 2.5])
+        registry = ModelRegistry(
+            _Loader(),
+            warmup=lambda bundle: None,
+            size_of=lambda b: 0,
+            clock=lambda: next(ticks),
+        )
+        registry.get("m")
+        (model,) = registry.stats().models
+        assert (model.load_seconds, model.warmup_seconds) == (2.0, 0.5)
+        assert registry.stats().load_seconds == 2.5
+
+    def test_concurrent_requests_share_one_load(self):
+        release = threading.Event()
+        loader = _Loader()
+
+        def slow_loader(model_id, **options):
+            release.wait(timeout=5)
+            return loader(model_id, **options)
+
+        registry = ModelRegistry(slow_loader, size_of=lambda b: 0)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get("m")))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(loader.loads) == 1
+        assert len({id(bundle) for bundle in results}) == 1
+
+    def test_model_is_published_before_its_load_lock_is_dropped(self):
+        registry = ModelRegistry(_Loader(), size_of=lambda b: 0)
+        published = []
+
+        class _Loading(dict):
+            def pop(self, key, *default):
+                # A caller arriving after this point makes a new key lock,
+                # so the model must already be visible to `_lookup`.
+                published.append(key in registry._models)
+                return super().pop(key, *default)
+
+        registry._loading = _Loading()
+        registry.get("m")
+        assert published == [True]
+
+    def test_evict_forces_reload(self):
+        loader = _Loader()
+        registry = ModelRegistry(loader, size_of=lambda b: 0)
+        registry.get("m")
+        assert registry.evict("m") is True
+        assert registry.evict("m") is False
+        registry.get("m")
+        assert len(loader.loads) == 2
+
+
+class TestLoadModel:
+    """Test that load_model goes through the shared registry."""
+
+    def test_load_model_loads_once(self, monkeypatch):
+        loader = _Loader()
+        registry = ModelRegistry(loader, warmup=None, size_of=lambda b: 0)
+        monkeypatch.setattr(llm, "model_registry", registry)
+
+        assert llm.load_model("m", backend="scripted") is llm.load_model(
+            "m", backend="scripted"
+        )
+        llm.load_model("m", backend="mlx")
+        assert loader.loads == [
+            ("m", {"backend": "scripted"}),
+            ("m", {"backend": "mlx"}),
+        ]
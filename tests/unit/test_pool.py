@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import cowsay
+
+from cowsay_mcp.pool import RenderPool, gil_disabled
+
+
+def thread_factory(created: list[int]):
+    def factory(max_workers: int) -> ThreadPoolExecutor:
+        created.append(max_workers)
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    return factory
+
+
+class TestRenderPool:
+    """Test threshold-based offloading of renders."""
+
+    def test_should_offload_respects_threshold(self):
+        pool = RenderPool(2, threshold=10)
+        assert not pool.should_offload("short")
+        assert pool.should_offload("x" * 10)
+
+    def test_zero_workers_disables_offload(self):
+        pool = RenderPool(0, threshold=1)
+        assert not pool.should_offload("x" * 1000)
+
+    def test_executor_is_created_lazily_once(self):
+        created: list[int] = []
+        pool = RenderPool(3, threshold=1, executor_factory=thread_factory(created))
+        assert created == []
+
+        async def render_twice():
+            return [await pool.render("one"), await pool.render("two", "tux")]
+
+        results = asyncio.run(render_twice())
+        pool.shutdown()
+
+        assert created == [3]
+        assert results == [
+            cowsay.get_output_string("cow", "one"),
+            cowsay.get_output_string("tux", "two"),
+        ]
+
+    def test_default_executor_renders_in_worker(self):
+        pool = RenderPool(1, threshold=1)
+        try:
+            result = asyncio.run(pool.render("from a worker", width=8))
+        finally:
+            pool.shutdown()
+        assert "| from a w |" in result
+
+    def test_gil_disabled_matches_interpreter(self):
+        assert isinstance(gil_disabled(), bool)
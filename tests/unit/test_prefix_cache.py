@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import pytest
+
+from demo import llm
+from demo.prefix_cache import FakePrefixBackend, PromptPrefixCache
+
+
+class _Model:
+    """Weak-referenceable stand-in for an mlx model."""
+
+
+def _messages(system: str, user: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+class TestPromptPrefixCache:
+    """Test prefix reuse and the LRU bound."""
+
+    def test_prefix_is_prefilled_once(self):
+        backend = FakePrefixBackend()
+        cache = PromptPrefixCache(backend)
+
+        for user in ("first", "second", "third"):
+            assert (
+                cache.generate("SYSTEM: long\n", "SYSTEM: long\nUSER: " + user) == "ok"
+            )
+
+        assert backend.prefilled == len("SYSTEM: long\n")
+        prefix_tokens = len("SYSTEM: long\n")
+        assert [state for state, _ in backend.calls] == [prefix_tokens] * 3
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+        assert stats.reused_tokens == 3 * prefix_tokens
+
+    def test_lru_evicts_least_recently_used_prefix(self):
+        backend = FakePrefixBackend()
+        cache = PromptPrefixCache(backend, max_entries=2)
+
+        cache.generate("a", "a1")
+        cache.generate("b", "b1")
+        cache.generate("a", "a2")  # a is now most recent
+        cache.generate("c", "c1")  # evicts b
+        cache.generate("a", "a3")
+        assert backend.prefilled == 3
+        cache.generate("b", "b2")
+        assert backend.prefilled == 4
+        assert cache.stats().evictions == 2
+        assert cache.stats().entries == 2
+
+    def test_mismatched_tokens_generate_from_scratch(self):
+        class BoundaryBackend(FakePrefixBackend):
+            def encode(self, text):
+                # Merge a trailing newline with the next character, as BPE might.
+                return [
+                    hash(text[i : i + 2]) if text[i] == "\n" else ord(text[i])
+                    for i in range(len(text))
+                ]
+
+        backend = BoundaryBackend()
+        cache = PromptPrefixCache(backend)
+        cache.generate("SYS\n", "SYS\nUSER")
+        assert backend.calls == [(0, len("SYS\nUSER"))]
+        assert cache.stats().reused_tokens == 0
+        # the boundary never splits cleanly, so prompts stay fully encoded
+        assert cache.encode("SYS\n", "SYS\nME") == backend.encode("SYS\nME")
+
+    def test_only_the_suffix_is_encoded_after_the_first_prompt(self):
+        backend = FakePrefixBackend()
+        cache = PromptPrefixCache(backend)
+        prefix = "SYSTEM: " + "rules " * 50 + "\n"
+
+        cache.generate(prefix, prefix + "USER: one")
+        first = backend.encoded
+        cache.generate(prefix, prefix + "USER: two")
+        tokens = cache.encode(prefix, prefix + "USER: three")
+
+        assert backend.encoded - first == len("USER: two") + len("USER: three")
+        assert tokens == backend.encode(prefix + "USER: three")
+        assert backend.calls[-1] == (len(prefix), len("USER: two"))
+
+    def test_rejects_non_positive_bound(self):
+        with pytest.raises(ValueError):
+            PromptPrefixCache(FakePrefixBackend(), max_entries=0)
+
+
+class TestChatOncePrefixCache:
+    """Test that chat_once routes shared system prompts through the bundle's cache."""
+
+    def test_chat_once_reuses_system_prefix(self):
+        bundle = (_Model(), object())
+        backend = FakePrefixBackend(reply="  moo  ")
+        cache = llm.attach_prefix_cache(bundle, backend)
+
+        assert llm.chat_once(bundle, _messages("tool rules", "poem 1")) == "moo"
+        assert llm.chat_once(bundle, _messages("tool rules", "poem 2")) == "moo"
+
+        prefix = llm.system_prefix(_messages("tool rules", "x"))
+        assert prefix == "SYSTEM: tool rules\n"
+        assert backend.prefilled == len(prefix)
+        assert cache.stats().hits == 1
+        assert llm.prefix_cache_for(bundle) is cache
+
+    def test_prefix_cache_can_be_bypassed(self, monkeypatch):
+        from demo.backends import LLMBackend
+
+        bundle = (_Model(), object())
+        backend = FakePrefixBackend()
+        llm.attach_prefix_cache(bundle, backend)
+        plain = LLMBackend(
+            name="plain",
+            load=lambda model_id, **options: bundle,
+            generate=lambda model, tokenizer, prompt, **kwargs: "plain",
+        )
+        monkeypatch.setattr(llm, "backend_for", lambda bundle: plain)
+
+        assert llm.chat_once(bundle, _messages("s", "u"), prefix_cache=False) == "plain"
+        assert backend.calls == []
+
+
+def test_batched_prompts_reuse_prefix_tokens(monkeypatch):
+    from demo.backends import LLMBackend
+
+    bundle = (_Model(), object())
+    prefix_backend = FakePrefixBackend()
+    batches = []
+    backend = LLMBackend(
+        name="tokens",
+        load=lambda model_id, **options: bundle,
+        generate=lambda model, tokenizer, prompt, **kwargs: "one",
+        batch_generate=lambda model, tokenizer, prompts, **kwargs: batches.append(
+            prompts
+        )
+        or ["x"] * len(prompts),
+        prefix_backend=lambda model, tokenizer: prefix_backend,
+    )
+    monkeypatch.setattr(llm, "backend_for", lambda bundle: backend)
+    conversations = [_messages("tool rules", f"poem {i}") for i in range(3)]
+
+    llm.chat_batch(bundle, conversations)
+    llm.chat_batch(bundle, conversations[::-1])
+
+    expected = [llm.render_messages(messages) for messages in conversations]
+    assert batches[0] == [[ord(char) for char in prompt] for prompt in expected]
+    suffix = len(expected[0]) - len(llm.system_prefix(conversations[0]))
+    # The first prompt is encoded twice (prefix + suffix, then whole) to
+    # check the boundary; the other five only encode their own messages.
+    assert prefix_backend.encoded == len(expected[0]) * 2 + 5 * suffix
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+from demo import prompting
 from demo.prompting import (
     THEMES,
     build_initial_messages,
     build_system_prompt,
+    compile_prompt,
     summarise_parameters,
     summarise_tags,
+    tool_fingerprint,
 )
 
 
@@ -140,6 +145,60 @@ class TestBuildInitialMessages:
             assert theme in messages[1]["content"]
 
 
+def _tool(**overrides):
+    spec = {
+        "name": "cowsay-mcp",
+        "description": "Speech bubbles",
+        "tags": {"text", "art"},
+        "parameters": {"properties": {"text": {"type": "string"}}},
+    }
+    spec.update(overrides)
+    return SimpleNamespace(**spec)
+
+
+class TestCompiledPrompt:
+    """Test the fingerprint-keyed system prompt cache."""
+
+    def test_prompt_is_rendered_once_per_fingerprint(self, monkeypatch):
+        renders = []
+        render = prompting.render_system_prompt
+        monkeypatch.setattr(
+            prompting,
+            "render_system_prompt",
+            lambda tool: renders.append(tool) or render(tool),
+        )
+        prompting.clear_compiled_prompts()
+
+        for theme in THEMES * 20:
+            build_initial_messages(theme, _tool())
+
+        assert len(renders) == 1
+        assert compile_prompt(_tool()) is compile_prompt(_tool())
+
+    def test_changed_registration_gets_a_new_prompt(self):
+        original = compile_prompt(_tool())
+        changed = compile_prompt(_tool(description="Talking cows"))
+
+        assert changed is not original
+        assert "Talking cows" in changed.system_prompt
+        assert tool_fingerprint(_tool(tags={"art", "text"})) == original.fingerprint
+        schema = {"properties": {"message": {"type": "string"}}}
+        assert tool_fingerprint(_tool(parameters=schema)) != original.fingerprint
+
+    def test_messages_accept_a_compiled_prompt(self):
+        compiled = compile_prompt(_tool())
+        assert build_initial_messages("nature", compiled) == build_initial_messages(
+            "nature", _tool()
+        )
+
+    def test_server_tool_compiles(self):
+        from demo.main import fetch_primary_tool
+
+        tool = asyncio.run(fetch_primary_tool())
+        assert compile_prompt(tool).system_prompt == build_system_prompt(tool)
+        assert tool.name in compile_prompt(tool).system_prompt
+
+
 class TestConstants:
     """Test constant values."""
 
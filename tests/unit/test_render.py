@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import random
+
+import cowsay
+import pytest
+
+from cowsay_mcp.render import (
+    CowsayError,
+    compile_character,
+    get_character,
+    iter_render,
+    render,
+    wrap_text,
+)
+
+ALPHABET = (
+    "abcdefghijklmnopqrstuvwxyz"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "0123456789"
+    " \t\n\r\x0b\x0c 　"
+    ".,;:!?-_=+*/\\|()[]{}<>'\"`~@#$%^&"
+    "éñüßøπλжк漢字かなカナ한글"
+    "🐄🌸🚀✨‍️"
+)
+
+
+def generate_corpus(seed: int = 1234, size: int = 2000) -> list[str]:
+    """Build a reproducible mix of short, long, multi-line and unicode texts."""
+
+    rng = random.Random(seed)
+    corpus = [
+        "a",
+        "Hello world",
+        "x" * 49,
+        "x" * 50,
+        "y" * 98,
+        "y" * 99,
+        "  padded  ",
+        "line one\nline two",
+        "\n\nblank lines\n\n\nbetween\n",
+        "tab\tinside",
+        "🐄 moo 🐄",
+        "日本語のテキストです" * 10,
+    ]
+    for _ in range(size):
+        length = rng.choice([1, 5, 20, 48, 49, 50, 120, 400])
+        corpus.append("".join(rng.choice(ALPHABET) for _ in range(length)))
+    return [text for text in corpus if text.strip()]
+
+
+CORPUS = generate_corpus()
+
+
+def test_render_matches_cowsay_for_cow_corpus():
+    for text in CORPUS:
+        assert render(text) == cowsay.get_output_string("cow", text), repr(text)
+
+
+@pytest.mark.parametrize("character", cowsay.char_names)
+def test_render_matches_cowsay_for_every_character(character):
+    for text in CORPUS[:200]:
+        assert render(text, character) == cowsay.get_output_string(character, text)
+
+
+@pytest.mark.parametrize("text", ["", " ", "\n\n", "\t 　"])
+def test_render_rejects_blank_text(text):
+    with pytest.raises(CowsayError):
+        render(text)
+
+
+def test_iter_render_matches_render_for_corpus():
+    for text in CORPUS:
+        assert "\n".join(iter_render(text)) == render(text), repr(text)
+    for character in ("tux", "dragon"):
+        assert "\n".join(iter_render("hi\nthere", character, width=3)) == render(
+            "hi\nthere", character, width=3
+        )
+
+
+def test_iter_render_is_lazy_and_validates_eagerly():
+    lines = iter_render("abc\n" * 1000, width=2)
+    assert next(lines) == "  __"
+    assert next(lines) == " /  \\"
+    assert next(lines) == "| ab |"
+    with pytest.raises(CowsayError):
+        iter_render("   ")
+    with pytest.raises(CowsayError):
+        iter_render("hi", "not-a-character")
+
+
+def test_render_rejects_unknown_character():
+    with pytest.raises(CowsayError, match="Available Characters"):
+        render("hello", "not-a-character")
+
+
+def test_render_rejects_non_positive_width():
+    with pytest.raises(ValueError, match="width"):
+        render("hello", width=0)
+
+
+def test_render_custom_width_wraps_lines():
+    output = render("abcdefgh", width=3)
+    assert "| abc |" in output
+    assert "| gh  |" in output
+
+
+def test_wrap_text_skips_blank_lines_and_slices():
+    assert wrap_text("  ab  \n\n  cdefg ", width=2) == ["ab", "cd", "ef", "g"]
+
+
+def test_compiled_character_tail_is_reused():
+    compiled = get_character("cow")
+    assert compiled.tail(5) is compiled.tail(5)
+    assert compiled.tail(2).splitlines()[0].startswith("  ")
+
+
+def test_compile_character_drops_empty_lines():
+    compiled = compile_character("dot", "\n.\n\n..\n")
+    assert compiled.lines == (".", "..")
+    assert compiled.tail(1) == " .\n .."
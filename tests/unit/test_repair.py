@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import pytest
+
+from demo.repair import ToolCallRepairer, normalise_tool_call, repair_locally
+
+TOOL = "cowsay-mcp"
+
+
+class TestRepairLocally:
+    """Test the cheap fixes applied before re-prompting."""
+
+    def test_extracts_json_from_code_fence(self):
+        raw = 'Here you go:\n```json\n{"tool": "cowsay-mcp", "args": {"text": "moo"}}\n```'
+        assert repair_locally(raw, TOOL).text == "moo"
+
+    def test_fence_is_preferred_over_surrounding_braces(self):
+        raw = 'Use {braces} wisely.\n```\n{"tool": "cowsay-mcp", "args": {"text": "x"}}\n```'
+        assert repair_locally(raw, TOOL).text == "x"
+
+    def test_trailing_commas_outside_strings_are_dropped(self):
+        raw = '{"tool": "cowsay-mcp", "args": {"text": "a, }b,]",},}'
+        assert repair_locally(raw, TOOL).text == "a, }b,]"
+
+    def test_name_and_arguments_aliases(self):
+        raw = '{"name": "cowsay-mcp", "arguments": {"text": "hi"}}'
+        assert repair_locally(raw, TOOL).text == "hi"
+
+    def test_openai_function_wrapper_with_string_arguments(self):
+        raw = (
+            '{"type": "function", "function": {"name": "cowsay-mcp", '
+            '"arguments": "{\\"text\\": \\"wrapped\\"}"}}'
+        )
+        assert repair_locally(raw, TOOL).text == "wrapped"
+
+    def test_other_tool_stays_rejected(self):
+        raw = '```json\n{"name": "nonexistent-tool", "arguments": {"text": "x"}}\n```'
+        with pytest.raises(ValueError, match="Unexpected tool requested"):
+            repair_locally(raw, TOOL)
+
+    def test_no_json_at_all(self):
+        with pytest.raises(ValueError, match="No JSON found"):
+            repair_locally("just prose", TOOL)
+
+    def test_normalise_keeps_canonical_calls(self):
+        call = {"tool": TOOL, "args": {"text": "x"}}
+        assert normalise_tool_call(call) == call
+
+
+class TestToolCallRepairer:
+    """Test the repair loop and its counters."""
+
+    def test_clean_and_local_fixes(self):
+        repairer = ToolCallRepairer(TOOL)
+        chat = pytest.fail  # never re-prompted
+        assert (
+            repairer.repair(
+                '{"tool": "cowsay-mcp", "args": {"text": "a"}}', [], chat
+            ).text
+            == "a"
+        )
+        assert (
+            repairer.repair(
+                '{"name": "cowsay-mcp", "arguments": {"text": "b"}}', [], chat
+            ).text
+            == "b"
+        )
+
+        stats = repairer.stats()
+        assert (stats.calls, stats.clean, stats.local_fixes) == (2, 1, 1)
+        assert stats.extra_tokens == 0
+        assert stats.success_rate == 1.0
+
+    def test_reprompt_sends_error_feedback(self):
+        seen = []
+
+        def chat(messages):
+            seen.append(messages)
+            return '{"tool": "cowsay-mcp", "args": {"text": "fixed"}}'
+
+        repairer = ToolCallRepairer(TOOL, count_tokens=len)
+        system = [{"role": "system", "content": "rules"}]
+
+        assert repairer.repair("oops", system, chat).text == "fixed"
+
+        (messages,) = seen
+        assert messages[0] == system[0]
+        assert messages[1] == {"role": "assistant", "content": "oops"}
+        assert "No JSON found" in messages[2]["content"]
+        stats = repairer.stats()
+        assert stats.reprompt_fixes == 1
+        assert stats.extra_tokens == len(messages[2]["content"]) + len(
+            '{"tool": "cowsay-mcp", "args": {"text": "fixed"}}'
+        )
+
+    def test_failure_raises_last_error_and_is_counted(self):
+        replies = iter(["still bad", '{"tool": "other", "args": {"text": "x"}}'])
+        repairer = ToolCallRepairer(TOOL, max_reprompts=2)
+
+        with pytest.raises(ValueError, match="Unexpected tool requested: other"):
+            repairer.repair("bad", [], lambda messages: next(replies))
+
+        stats = repairer.stats()
+        assert (stats.failures, stats.repaired) == (1, 0)
+        assert stats.success_rate == 0.0
+
+    def test_without_reprompts_fails_after_local_fixes(self):
+        repairer = ToolCallRepairer(TOOL, max_reprompts=0)
+        with pytest.raises(ValueError):
+            repairer.repair("bad", [], pytest.fail)
+        assert repairer.stats().failures == 1
+
+    def test_rejects_negative_reprompts(self):
+        with pytest.raises(ValueError):
+            ToolCallRepairer(TOOL, max_reprompts=-1)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from demo import backends, llm
+from demo.response_cache import ResponseCache, response_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = llm.use_response_cache(str(tmp_path / "responses.sqlite"))
+    yield cache
+    llm.use_response_cache(None)
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    monkeypatch.setattr(backends, "_active", "scripted")
+    return llm.load_model("scripted", warmup=False)
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    calls = []
+    original = llm._generate
+
+    def counting(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(llm, "_generate", counting)
+    return calls
+
+
+MESSAGES = [
+    {"role": "system", "content": "Reply briefly."},
+    {"role": "user", "content": "Hello"},
+]
+
+
+class TestResponseCache:
+    """Test the SQLite response store."""
+
+    def test_round_trip_and_persistence(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        key = response_key("m", "prompt", {"max_tokens": 8})
+        first = ResponseCache(path)
+        assert first.get(key) is None
+        first.put(key, "answer")
+        assert first.get(key) == "answer"
+        first.close()
+
+        second = ResponseCache(path)
+        assert second.get(key) == "answer"
+        stats = second.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 0, 1)
+        second.close()
+
+    def test_key_covers_model_prompt_and_params(self):
+        key = response_key("m", "p", {"a": 1, "b": 2})
+        assert key == response_key("m", "p", {"b": 2, "a": 1})
+        assert key != response_key("other", "p", {"a": 1, "b": 2})
+        assert key != response_key("m", "p2", {"a": 1, "b": 2})
+        assert key != response_key("m", "p", {"a": 1, "b": 3})
+
+    def test_oldest_entries_are_evicted_over_budget(self, tmp_path):
+        cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=10)
+        for index in range(4):
+            cache.put(bytes([index]), "abcd")
+
+        assert cache.get(bytes([0])) is None
+        assert cache.get(bytes([1])) is None
+        assert cache.get(bytes([3])) == "abcd"
+        stats = cache.stats()
+        assert (stats.entries, stats.bytes, stats.evictions) == (2, 8, 2)
+        cache.put(b"big", "x" * 11)
+        assert cache.get(b"big") is None
+        cache.close()
+
+    def test_budget_holds_across_connections(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        # Two handles on one file stand in for two demo processes.
+        first = ResponseCache(path, max_bytes=10)
+        second = ResponseCache(path, max_bytes=10)
+        for index in range(4):
+            (first if index < 2 else second).put(bytes([index]), "abcd")
+
+        for cache in (first, second):
+            stats = cache.stats()
+            assert (stats.entries, stats.bytes) == (2, 8)
+        assert first.get(bytes([1])) is None
+        assert first.get(bytes([3])) == second.get(bytes([2])) == "abcd"
+        first.close()
+        second.close()
+
+
+class TestChatOnceResponseCache:
+    """Test that greedy chat_once calls are answered from the cache."""
+
+    def test_greedy_calls_are_cached(self, cache, scripted, generations):
+        first = llm.chat_once(scripted, MESSAGES, temperature=0.0)
+        second = llm.chat_once(scripted, MESSAGES, temperature=0.0)
+
+        assert first == second
+        assert len(generations) == 1
+        assert cache.stats().hits == 1
+
+    def test_sampled_calls_bypass_the_cache(self, cache, scripted, generations):
+        llm.chat_once(scripted, MESSAGES, temperature=0.3)
+        llm.chat_once(scripted, MESSAGES, temperature=0.3)
+
+        assert len(generations) == 2
+        assert cache.stats().entries == 0
+
+    def test_generation_settings_are_part_of_the_key(
+        self, cache, scripted, generations
+    ):
+        llm.chat_once(scripted, MESSAGES, max_tokens=16)
+        llm.chat_once(scripted, MESSAGES, max_tokens=32)
+        llm.chat_once(scripted, MESSAGES, max_tokens=32, until_tool_call=True)
+
+        assert len(generations) == 3
+
+    def test_chat_batch_generates_only_misses(self, cache, scripted, monkeypatch):
+        prompts = []
+        original = backends.get_backend("scripted").batch_generate
+
+        def counting(model, tokenizer, batch, **kwargs):
+            prompts.extend(batch)
+            return original(model, tokenizer, batch, **kwargs)
+
+        monkeypatch.setattr(
+            llm,
+            "backend_for",
+            lambda bundle: backends.LLMBackend(
+                name="counting",
+                load=backends._scripted_load,
+                generate=backends._scripted_generate,
+                batch_generate=counting,
+            ),
+        )
+        other = [{"role": "user", "content": "Bye"}]
+        llm.chat_once(scripted, MESSAGES)
+
+        outputs = llm.chat_batch(scripted, [MESSAGES, other, MESSAGES + other])
+
+        assert outputs[0] == llm.chat_once(scripted, MESSAGES)
+        assert len(prompts) == 2
+        assert llm.chat_batch(scripted, [other, MESSAGES + other]) == outputs[1:]
+        assert len(prompts) == 2
+
+    def test_cached_responses_are_not_counted_as_generated(self, cache, scripted):
+        from unittest.mock import AsyncMock
+
+        from demo.batch import plan_items, run_batch
+        from demo.main import fetch_primary_tool
+
+        tool = asyncio.run(fetch_primary_tool())
+        client = AsyncMock()
+        client.call_tool.return_value = "art"
+
+        def run():
+            items = plan_items(["nature", "space"])
+            return asyncio.run(
+                run_batch(scripted, client, tool, items, deterministic=True)
+            )
+
+        first, second = run(), run()
+
+        assert first.generated_tokens > 0 and first.cached_responses == 0
+        assert second.generated_tokens == 0
+        assert second.summary()["cached_responses"] == 4
@@ -1,21 +1,236 @@
 from __future__ import annotations
 
-from cowsay_mcp.server import run_cowsay
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import cowsay
+import pytest
+
+from cowsay_mcp.cache import RenderCache
+from cowsay_mcp.pool import RenderPool
+from cowsay_mcp.server import (
+    run_cowsay,
+    run_cowsay_async,
+    run_cowsay_batch,
+    run_cowsay_batch_async,
+)
+from cowsay_mcp.settings import Settings
+from cowsay_mcp.tools import _get_render_pool
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = RenderCache()
+    monkeypatch.setattr("cowsay_mcp.tools.render_cache", cache)
+    return cache
 
 
 def test_run_cowsay_success(monkeypatch):
     monkeypatch.setattr(
-        "cowsay_mcp.server.cowsay.get_output_string",
-        lambda cow, text: f"{cow}:{text}",
+        "cowsay_mcp.tools.render",
+        lambda text, *args, **kwargs: f"cow:{text}",
     )
 
     assert run_cowsay("hello") == "cow:hello"
 
 
 def test_run_cowsay_handles_exception(monkeypatch):
-    def raise_error(cow, text):  # noqa: D401 - helper raising error
+    def raise_error(text, *args, **kwargs):  # noqa: D401 - helper raising error
         raise ValueError("boom")
 
-    monkeypatch.setattr("cowsay_mcp.server.cowsay.get_output_string", raise_error)
+    monkeypatch.setattr("cowsay_mcp.tools.render", raise_error)
 
     assert run_cowsay("hello").startswith("cowsay error:")
+
+
+def test_run_cowsay_serves_repeats_from_cache(monkeypatch, fresh_cache):
+    calls: list[str] = []
+
+    def counting_render(text, *args, **kwargs):
+        calls.append(text)
+        return f"cow:{text}"
+
+    monkeypatch.setattr("cowsay_mcp.tools.render", counting_render)
+
+    assert run_cowsay("hello") == run_cowsay("hello") == "cow:hello"
+    assert calls == ["hello"]
+    stats = fresh_cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+class TestRunCowsayAsync:
+    """Test the event-loop friendly tool variant."""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        pool = RenderPool(2, threshold=20, executor_factory=ThreadPoolExecutor)
+        monkeypatch.setattr("cowsay_mcp.tools._render_pool", pool)
+        yield pool
+        pool.shutdown()
+
+    def test_small_text_renders_inline(self, pool, monkeypatch):
+        async def fail(*args, **kwargs):
+            raise AssertionError("small texts must not be offloaded")
+
+        monkeypatch.setattr(pool, "render", fail)
+        assert asyncio.run(run_cowsay_async("tiny")) == run_cowsay("tiny")
+
+    def test_large_text_is_offloaded_and_cached(self, pool, fresh_cache):
+        text = "a fairly long poem line " * 4
+
+        first = asyncio.run(run_cowsay_async(text))
+        second = asyncio.run(run_cowsay_async(text))
+
+        assert first == second == cowsay.get_output_string("cow", text)
+        assert fresh_cache.stats().hits == 1
+
+    def test_errors_are_reported_as_text(self, pool):
+        assert asyncio.run(run_cowsay_async(" " * 40)).startswith("cowsay error:")
+
+    def test_render_pool_is_shut_down_at_exit(self, monkeypatch):
+        registered = []
+        monkeypatch.setattr("cowsay_mcp.tools._render_pool", None)
+        monkeypatch.setattr("atexit.register", registered.append)
+
+        pool = _get_render_pool()
+
+        assert _get_render_pool() is pool
+        assert registered == [pool.shutdown]
+
+
+class TestRunCowsayBatch:
+    """Test the batch rendering tool."""
+
+    def test_batch_returns_one_result_per_text(self):
+        results = run_cowsay_batch(["one", "two"])
+        assert results == [
+            {"result": cowsay.get_output_string("cow", "one"), "error": None},
+            {"result": cowsay.get_output_string("cow", "two"), "error": None},
+        ]
+
+    def test_batch_uses_per_item_characters(self):
+        results = run_cowsay_batch(["moo", "hi"], ["cow", "tux"])
+        assert results[1] == {
+            "result": cowsay.get_output_string("tux", "hi"),
+            "error": None,
+        }
+
+    def test_batch_reports_errors_per_item(self):
+        results = run_cowsay_batch(["ok", "   ", "bad char"], [None, None, "nope"])
+        assert results[0]["result"] and results[0]["error"] is None
+        assert results[1]["result"] is None
+        assert "meaningful" in results[1]["error"]
+        assert "Available Characters" in results[2]["error"]
+
+    def test_batch_rejects_mismatched_characters(self):
+        with pytest.raises(ValueError, match="same length"):
+            run_cowsay_batch(["a", "b"], ["cow"])
+
+    @pytest.mark.parametrize(
+        ("texts", "characters", "message"),
+        [
+            ("hey", None, "texts must be a list of strings"),
+            (["a", 1], None, "texts must be a list of strings"),
+            (["a", "b"], "tux", "characters must be a list"),
+            (["a"], [{"name": "tux"}], "characters must be a list"),
+        ],
+    )
+    def test_batch_rejects_wrong_argument_types(self, texts, characters, message):
+        with pytest.raises(ValueError, match=message):
+            run_cowsay_batch(texts, characters)
+        with pytest.raises(ValueError, match=message):
+            asyncio.run(run_cowsay_batch_async(texts, characters))
+
+    def test_large_batch_runs_in_parallel_chunks(self, monkeypatch):
+        monkeypatch.setattr(
+            "cowsay_mcp.tools.settings",
+            Settings(batch_parallel_threshold=4, batch_max_workers=3),
+        )
+        monkeypatch.setattr("cowsay_mcp.tools._batch_executor", None)
+        texts = [f"line {i}" for i in range(10)] + [""]
+
+        results = run_cowsay_batch(texts)
+
+        assert [r.get("result") for r in results[:10]] == [
+            cowsay.get_output_string("cow", text) for text in texts[:10]
+        ]
+        assert "error" in results[10]
+
+
+class TestRunCowsayBatchAsync:
+    """Test that the batch tool keeps large batches off the event loop."""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        pool = RenderPool(2, threshold=50, executor_factory=ThreadPoolExecutor)
+        monkeypatch.setattr("cowsay_mcp.tools._render_pool", pool)
+        yield pool
+        pool.shutdown()
+
+    def test_small_batch_renders_inline(self, pool, monkeypatch):
+        async def fail(*args, **kwargs):
+            raise AssertionError("small batches must not be offloaded")
+
+        monkeypatch.setattr(pool, "render_many", fail)
+        assert asyncio.run(run_cowsay_batch_async(["a", "b"])) == run_cowsay_batch(
+            ["a", "b"]
+        )
+
+    def test_large_batch_goes_to_the_render_pool(self, pool, monkeypatch, fresh_cache):
+        monkeypatch.setattr(
+            "cowsay_mcp.tools.settings", Settings(batch_parallel_threshold=4)
+        )
+        calls = []
+        render_many = pool.render_many
+
+        async def counting(items, *args, **kwargs):
+            calls.append(len(items))
+            return await render_many(items, *args, **kwargs)
+
+        monkeypatch.setattr(pool, "render_many", counting)
+        texts = [f"line {i}" for i in range(5)] + ["  ", "bad char"]
+        characters = [None] * 6 + ["nope"]
+
+        results = asyncio.run(run_cowsay_batch_async(texts, characters))
+
+        assert calls == [4, 3]
+        assert results[:5] == [
+            {"result": cowsay.get_output_string("cow", text), "error": None}
+            for text in texts[:5]
+        ]
+        assert "meaningful" in results[5]["error"]
+        assert "Available Characters" in results[6]["error"]
+        # rendered items are cached, so a repeat only sends the failures
+        asyncio.run(run_cowsay_batch_async(texts, characters))
+        assert calls[2:] == [1, 1]
+
+    def test_large_batch_without_pool_uses_threads(self, monkeypatch):
+        monkeypatch.setattr("cowsay_mcp.tools._render_pool", RenderPool(0, 1))
+        monkeypatch.setattr(
+            "cowsay_mcp.tools.settings",
+            Settings(batch_parallel_threshold=4, batch_max_workers=3),
+        )
+        monkeypatch.setattr("cowsay_mcp.tools._batch_executor", None)
+        texts = [f"line {i}" for i in range(10)]
+
+        assert asyncio.run(run_cowsay_batch_async(texts)) == run_cowsay_batch(texts)
+
+
+def test_batch_tool_returns_typed_items_through_fastmcp():
+    from fastmcp import Client
+
+    from cowsay_mcp.server import server
+
+    async def call():
+        async with Client(server) as client:
+            return await client.call_tool(
+                "cowsay-mcp-batch", {"texts": ["moo", " "]}, raise_on_error=False
+            )
+
+    result = asyncio.run(call())
+
+    # `dict[str, str]` items used to come back as empty `Root()` objects
+    assert result.data == [
+        {"result": cowsay.get_output_string("cow", "moo"), "error": None},
+        {"result": None, "error": "Pass something meaningful to cowsay"},
+    ]
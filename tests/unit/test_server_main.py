@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import io
 import json
+import sys
 from unittest.mock import patch
 
+import cowsay
 import pytest
 
+from cowsay_mcp.framing import HEADER as FrameHeader
+from cowsay_mcp.framing import (
+    FrameError,
+    codec_functions,
+    frame,
+    read_frame,
+    serve_frames,
+)
 from cowsay_mcp.main import main as server_main
+from cowsay_mcp.main import serve_lines
+from cowsay_mcp.render import render
+from cowsay_mcp.settings import Settings
 
 
 class TestServerMain:
@@ -31,19 +45,38 @@ class TestServerMain:
         mock_stdin.read.return_value = json.dumps(tool_call)
 
         with patch(
-            "cowsay_mcp.server.run_cowsay", return_value="Mocked ASCII art"
-        ) as mock_run_cowsay:
+            "cowsay_mcp.tools.render_cowsay", return_value="Mocked ASCII art"
+        ) as mock_render_cowsay:
             with patch("builtins.print") as mock_print:
                 server_main()
 
         mock_server_run.assert_not_called()
-        mock_run_cowsay.assert_called_once_with("Hello world")
+        mock_render_cowsay.assert_called_once_with("Hello world", "cow")
         # Check that JSON response was printed
         printed_calls = [call for call in mock_print.call_args_list if len(call[0]) > 0]
         assert len(printed_calls) == 1
         response = json.loads(printed_calls[0][0][0])
         assert response == {"result": "Mocked ASCII art"}
 
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("sys.stdin")
+    @patch("cowsay_mcp.main.server.run")
+    def test_server_main_stdin_mode_streams_large_text(
+        self, mock_server_run, mock_stdin, mock_stdout, monkeypatch
+    ):
+        """Test one-shot pipe calls above the stream threshold are streamed."""
+        monkeypatch.setattr("cowsay_mcp.tools.settings", Settings(stream_threshold=5))
+        mock_stdin.isatty.return_value = False
+        tool_call = {"tool": "cowsay-mcp", "args": {"text": "Hello world"}}
+        mock_stdin.read.return_value = json.dumps(tool_call)
+
+        server_main()
+
+        mock_server_run.assert_not_called()
+        assert json.loads(mock_stdout.getvalue()) == {
+            "result": cowsay.get_output_string("cow", "Hello world")
+        }
+
     @patch("sys.stdin")
     @patch("cowsay_mcp.main.server.run")
     def test_server_main_stdin_mode_unknown_tool(self, mock_server_run, mock_stdin):
@@ -124,13 +157,13 @@ class TestServerMain:
         mock_stdin.read.return_value = json.dumps(tool_call)
 
         with patch(
-            "cowsay_mcp.server.run_cowsay", return_value="ASCII art"
-        ) as mock_run_cowsay:
+            "cowsay_mcp.tools.render_cowsay", return_value="ASCII art"
+        ) as mock_render_cowsay:
             with patch("builtins.print"):
                 server_main()
 
-        mock_run_cowsay.assert_called_once_with(
-            ""
+        mock_render_cowsay.assert_called_once_with(
+            "", "cow"
         )  # Should pass empty string for missing text
 
     @patch("sys.stdin")
@@ -144,10 +177,275 @@ class TestServerMain:
         mock_stdin.read.return_value = json.dumps(tool_call)
 
         with patch(
-            "cowsay_mcp.server.run_cowsay", side_effect=Exception("Tool failed")
-        ) as mock_run_cowsay:
+            "cowsay_mcp.tools.render_cowsay", side_effect=Exception("Tool failed")
+        ) as mock_render_cowsay:
             with patch("builtins.print"):
                 with pytest.raises(SystemExit):
                     server_main()
 
-        mock_run_cowsay.assert_called_once_with("test")
+        mock_render_cowsay.assert_called_once_with("test", "cow")
+
+
+class TestWorkerMode:
+    """Test the newline-delimited JSON worker loop."""
+
+    def test_serve_lines_answers_each_request_with_its_id(self):
+        requests = [
+            {"id": 1, "tool": "cowsay-mcp", "args": {"text": "one"}},
+            {"id": "b", "tool": "cowsay-mcp", "args": {"text": "two"}},
+        ]
+        stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+        stdout = io.StringIO()
+
+        with patch(
+            "cowsay_mcp.tools.render_cowsay", side_effect=lambda t, c: f"art:{t}"
+        ):
+            served = serve_lines(stdin, stdout)
+
+        assert served == 2
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        assert responses == [
+            {"id": 1, "result": "art:one"},
+            {"id": "b", "result": "art:two"},
+        ]
+
+    def test_serve_lines_reports_errors_without_stopping(self):
+        stdin = io.StringIO(
+            "not json\n"
+            "\n"
+            '{"id": 7, "tool": "unknown-tool", "args": {}}\n'
+            "[1, 2]\n"
+            '{"id": 8, "tool": "cowsay-mcp", "args": {"text": "ok"}}\n'
+        )
+        stdout = io.StringIO()
+
+        with patch("cowsay_mcp.tools.render_cowsay", return_value="art"):
+            served = serve_lines(stdin, stdout)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        assert served == 4
+        assert responses[0]["id"] is None and "error" in responses[0]
+        assert responses[1] == {"id": 7, "error": "Unknown tool: unknown-tool"}
+        assert responses[2]["id"] is None and "JSON object" in responses[2]["error"]
+        assert responses[3] == {"id": 8, "result": "art"}
+
+    def test_serve_lines_dispatches_batch_tool(self):
+        request = {"id": 3, "tool": "cowsay-mcp-batch", "args": {"texts": ["a", ""]}}
+        stdout = io.StringIO()
+
+        serve_lines(io.StringIO(json.dumps(request) + "\n"), stdout)
+
+        response = json.loads(stdout.getvalue())
+        assert response["id"] == 3
+        first, second = response["result"]
+        assert first["result"] and first["error"] is None
+        assert second["result"] is None and "meaningful" in second["error"]
+
+    def test_serve_lines_rejects_a_string_of_texts(self):
+        request = {"id": 5, "tool": "cowsay-mcp-batch", "args": {"texts": "hey"}}
+        stdout = io.StringIO()
+
+        serve_lines(io.StringIO(json.dumps(request) + "\n"), stdout)
+
+        assert json.loads(stdout.getvalue()) == {
+            "id": 5,
+            "error": "texts must be a list of strings",
+        }
+
+    def test_serve_lines_passes_character(self):
+        request = {
+            "id": 4,
+            "tool": "cowsay-mcp",
+            "args": {"text": "hi", "character": "tux"},
+        }
+        stdout = io.StringIO()
+
+        serve_lines(io.StringIO(json.dumps(request) + "\n"), stdout)
+
+        response = json.loads(stdout.getvalue())
+        assert response["result"] == cowsay.get_output_string("tux", "hi")
+
+    def test_serve_lines_streams_large_results(self, monkeypatch):
+        monkeypatch.setattr("cowsay_mcp.tools.settings", Settings(stream_threshold=10))
+        text = 'a long enough line\nwith "quotes" and 🐄'
+        request = {"id": 9, "tool": "cowsay-mcp", "args": {"text": text}}
+        stdout = io.StringIO()
+
+        with patch("cowsay_mcp.tools.render_cowsay") as mock_render_cowsay:
+            serve_lines(io.StringIO(json.dumps(request) + "\n"), stdout)
+
+        mock_render_cowsay.assert_not_called()
+        assert (
+            stdout.getvalue()
+            == json.dumps({"id": 9, "result": render(text, cells=True)}) + "\n"
+        )
+
+    @pytest.mark.parametrize("stream_threshold", [1, 1_000_000])
+    def test_render_errors_are_reported_as_errors(self, monkeypatch, stream_threshold):
+        monkeypatch.setattr(
+            "cowsay_mcp.tools.settings", Settings(stream_threshold=stream_threshold)
+        )
+        requests = [
+            {"id": 1, "tool": "cowsay-mcp", "args": {"text": "    "}},
+            {"id": 2, "tool": "cowsay-mcp", "args": {"text": "hi", "character": "x"}},
+        ]
+        stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+        stdout = io.StringIO()
+
+        serve_lines(stdin, stdout)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        assert [r["id"] for r in responses] == [1, 2]
+        for response in responses:
+            assert "result" not in response
+            assert response["error"].startswith("cowsay error:")
+
+    @patch("cowsay_mcp.main.serve_lines")
+    @patch("cowsay_mcp.main.server.run")
+    def test_server_main_worker_flag(self, mock_server_run, mock_serve_lines):
+        """Test the --worker flag starts the line loop instead of the server."""
+        server_main(["--worker"])
+
+        mock_serve_lines.assert_called_once()
+        mock_server_run.assert_not_called()
+
+
+class TestFramedWorker:
+    """Test the length-prefixed worker loop."""
+
+    @staticmethod
+    def _responses(data: bytes) -> list[dict]:
+        stream = io.BytesIO(data)
+        responses = []
+        while stream.tell() < len(data):
+            (size,) = FrameHeader.unpack(stream.read(FrameHeader.size))
+            responses.append(json.loads(stream.read(size)))
+        return responses
+
+    def test_serve_frames_answers_each_request_with_its_id(self):
+        encode, _ = codec_functions("json")
+        requests = [
+            {"id": 1, "tool": "cowsay-mcp", "args": {"text": "one\ntwo"}},
+            {"id": 2, "tool": "unknown-tool", "args": {}},
+            {"id": 3, "tool": "cowsay-mcp", "args": {"text": "three"}},
+        ]
+        frames = [frame(encode(request)) for request in requests]
+        stdin = io.BytesIO(b"".join(frames) + frame(b"not json"))
+        stdout = io.BytesIO()
+
+        assert serve_frames(stdin, stdout) == 4
+
+        responses = self._responses(stdout.getvalue())
+        assert responses[0] == {
+            "id": 1,
+            "result": cowsay.get_output_string("cow", "one\ntwo"),
+        }
+        assert responses[1] == {"id": 2, "error": "Unknown tool: unknown-tool"}
+        assert responses[2]["id"] == 3 and "result" in responses[2]
+        assert responses[3]["id"] is None and "error" in responses[3]
+
+    def test_render_errors_are_reported_as_errors(self):
+        encode, _ = codec_functions("json")
+        request = {"id": 4, "tool": "cowsay-mcp", "args": {"text": "  "}}
+        stdout = io.BytesIO()
+
+        serve_frames(io.BytesIO(frame(encode(request))), stdout)
+
+        (response,) = self._responses(stdout.getvalue())
+        assert response == {
+            "id": 4,
+            "error": "cowsay error: Pass something meaningful to cowsay",
+        }
+
+    def test_truncated_frame_gets_an_error_response(self):
+        for data, message in (
+            (frame(b"{}")[:-1], "Truncated frame payload"),
+            (b"\x00\x00", "Truncated frame header"),
+        ):
+            with pytest.raises(FrameError, match=message):
+                read_frame(io.BytesIO(data))
+            stdout = io.BytesIO()
+            assert serve_frames(io.BytesIO(data), stdout) == 1
+            assert self._responses(stdout.getvalue()) == [
+                {"id": None, "error": message}
+            ]
+
+    def test_oversized_frames_do_not_stop_the_worker(self, monkeypatch):
+        monkeypatch.setattr("cowsay_mcp.framing.MAX_FRAME", 200)
+        encode, _ = codec_functions("json")
+        big_request = encode({"id": 1, "tool": "cowsay-mcp", "args": {"x": "y" * 300}})
+        requests = [
+            FrameHeader.pack(len(big_request)) + big_request,
+            frame(encode({"id": 2, "tool": "cowsay-mcp", "args": {"text": "z" * 60}})),
+            frame(encode({"id": 3, "tool": "cowsay-mcp", "args": {"text": "ok"}})),
+        ]
+        stdout = io.BytesIO()
+
+        assert serve_frames(io.BytesIO(b"".join(requests)), stdout) == 3
+
+        too_big, big_result, ok = self._responses(stdout.getvalue())
+        assert too_big == {"id": None, "error": "Frame exceeds 200 bytes"}
+        assert big_result["id"] == 2 and "exceeds 200" in big_result["error"]
+        assert ok == {"id": 3, "result": cowsay.get_output_string("cow", "ok")}
+
+    def test_msgpack_codec_needs_msgpack(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "msgpack", None)
+        with pytest.raises(RuntimeError, match="pip install msgpack"):
+            codec_functions("msgpack")
+        with pytest.raises(ValueError, match="Unknown codec"):
+            codec_functions("xml")
+
+    @patch("cowsay_mcp.framing.serve_frames")
+    @patch("cowsay_mcp.main.serve_lines")
+    def test_server_main_framing_flag(self, mock_serve_lines, mock_serve_frames):
+        server_main(["--worker", "--framing", "json"])
+
+        mock_serve_lines.assert_not_called()
+        assert mock_serve_frames.call_args.args[2] == "json"
+
+
+class TestNetworkTransport:
+    """Test transport selection for the MCP server."""
+
+    @patch("sys.stdin")
+    @patch("cowsay_mcp.main.server.run")
+    def test_http_transport_ignores_piped_stdin(self, mock_server_run, mock_stdin):
+        mock_stdin.isatty.return_value = False
+
+        server_main(
+            [
+                "--transport",
+                "http",
+                "--port",
+                "9001",
+                "--limit-concurrency",
+                "16",
+                "--keep-alive",
+                "30",
+                "--stateless",
+            ]
+        )
+
+        mock_stdin.read.assert_not_called()
+        mock_server_run.assert_called_once_with(
+            transport="http",
+            host="127.0.0.1",
+            port=9001,
+            path=None,
+            uvicorn_config={"timeout_keep_alive": 30, "limit_concurrency": 16},
+            stateless_http=True,
+        )
+
+    @patch("cowsay_mcp.main.server.run")
+    def test_transport_defaults_come_from_environment(
+        self, mock_server_run, monkeypatch
+    ):
+        monkeypatch.setenv("COWSAY_MCP_TRANSPORT", "sse")
+        monkeypatch.setenv("COWSAY_MCP_PORT", "9100")
+
+        server_main([])
+
+        kwargs = mock_server_run.call_args.kwargs
+        assert kwargs["transport"] == "sse"
+        assert kwargs["port"] == 9100
+        assert "stateless_http" not in kwargs
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from cowsay_mcp.settings import Settings
+
+
+class TestSettings:
+    """Test environment-driven configuration."""
+
+    def test_defaults(self):
+        settings = Settings.from_env({})
+        assert settings == Settings()
+        assert settings.cache_ttl is None
+
+    def test_reads_cache_limits(self):
+        settings = Settings.from_env(
+            {
+                "COWSAY_MCP_CACHE_MAX_ENTRIES": "10",
+                "COWSAY_MCP_CACHE_MAX_BYTES": "2048",
+                "COWSAY_MCP_CACHE_TTL": "1.5",
+            }
+        )
+        assert settings.cache_max_entries == 10
+        assert settings.cache_max_bytes == 2048
+        assert settings.cache_ttl == 1.5
+
+    def test_non_positive_ttl_disables_expiry(self):
+        assert Settings.from_env({"COWSAY_MCP_CACHE_TTL": "0"}).cache_ttl is None
+
+    def test_reads_wrap_mode(self):
+        assert Settings.from_env({}).wrap == "cells"
+        assert Settings.from_env({"COWSAY_MCP_WRAP": "CodePoints"}).wrap == "codepoints"
+        with pytest.raises(ValueError, match="COWSAY_MCP_WRAP"):
+            Settings.from_env({"COWSAY_MCP_WRAP": "bytes"})
+
+    def test_reads_characters_directory(self):
+        settings = Settings.from_env(
+            {
+                "COWSAY_MCP_CHARACTERS_DIR": "/srv/cows",
+                "COWSAY_MCP_CHARACTERS_POLL_INTERVAL": "0.5",
+            }
+        )
+        assert settings.characters_dir == "/srv/cows"
+        assert settings.characters_poll_interval == 0.5
+        assert Settings.from_env({}).characters_dir is None
+
+    def test_metrics_can_be_disabled(self):
+        assert Settings.from_env({}).metrics_enabled is True
+        assert Settings.from_env({"COWSAY_MCP_METRICS": "0"}).metrics_enabled is False
+
+    def test_invalid_value_names_variable(self):
+        with pytest.raises(ValueError, match="COWSAY_MCP_CACHE_MAX_ENTRIES"):
+            Settings.from_env({"COWSAY_MCP_CACHE_MAX_ENTRIES": "lots"})
+
+    def test_reads_transport_options(self):
+        settings = Settings.from_env(
+            {
+                "COWSAY_MCP_TRANSPORT": "HTTP",
+                "COWSAY_MCP_HTTP_LIMIT_CONCURRENCY": "100",
+                "COWSAY_MCP_HTTP_STATELESS": "yes",
+            }
+        )
+        assert settings.transport == "http"
+        assert settings.http_limit_concurrency == 100
+        assert settings.http_stateless is True
+
+    def test_rejects_unknown_transport(self):
+        with pytest.raises(ValueError, match="COWSAY_MCP_TRANSPORT"):
+            Settings.from_env({"COWSAY_MCP_TRANSPORT": "carrier-pigeon"})
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from demo import backends, llm
+from demo.prefix_cache import FakePrefixBackend
+from demo.streaming import ToolCallScanner, take_until_tool_call
+
+TOOL_CALL = '{"tool": "cowsay-mcp", "args": {"text": "a } b \\" { c \\\\"}}'
+
+
+def _feed_all(chunks):
+    scanner = ToolCallScanner()
+    consumed = 0
+    for chunk in chunks:
+        end = scanner.feed(chunk)
+        if end is not None:
+            return consumed + end
+        consumed += len(chunk)
+    return None
+
+
+class TestToolCallScanner:
+    """Test incremental detection of the end of the tool-call object."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+    def test_finds_object_end_regardless_of_chunking(self, chunk_size):
+        text = "Sure! " + TOOL_CALL + " and then some rambling {not json"
+        chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+        end = _feed_all(chunks)
+
+        start = text.index("{")
+        assert end == start + len(TOOL_CALL)
+        assert json.loads(text[start:end])["args"]["text"] == 'a } b " { c \\'
+
+    def test_incomplete_object_is_not_reported(self):
+        assert _feed_all(['{"tool": "x", "args": {"text": "}"']) is None
+
+    def test_escape_split_across_chunks(self):
+        assert _feed_all(['{"a": "\\', '"}', '"}']) == len('{"a": "\\"}"}')
+
+
+class TestTakeUntilToolCall:
+    """Test that streaming stops at the closing brace."""
+
+    def test_stops_consuming_the_stream(self):
+        pulled = []
+        closed = []
+
+        def stream():
+            try:
+                for piece in [
+                    TOOL_CALL[:10],
+                    TOOL_CALL[10:] + " trailing",
+                    "more",
+                    "x",
+                ]:
+                    pulled.append(piece)
+                    yield piece
+            finally:
+                closed.append(True)
+
+        assert take_until_tool_call(stream()) == TOOL_CALL
+        assert len(pulled) == 2
+        assert closed == [True]
+
+    def test_returns_everything_without_an_object(self):
+        assert take_until_tool_call(["no ", "json"]) == "no json"
+
+
+class TestStreamChat:
+    """Test streaming through the backends and the prefix cache."""
+
+    def test_chat_once_stops_generating_after_the_tool_call(
+        self, monkeypatch, tmp_path
+    ):
+        monkeypatch.setattr(backends, "_active", "scripted")
+        replies = tmp_path / "rambling.json"
+        replies.write_text(json.dumps([TOOL_CALL + " and a long story" * 50]))
+        bundle = llm.load_model(str(replies), warmup=False)
+        generated = []
+        original = backends._scripted_stream_generate
+
+        def counting_stream(*args, **kwargs):
+            for piece in original(*args, **kwargs):
+                generated.append(piece)
+                yield piece
+
+        monkeypatch.setattr(
+            llm,
+            "backend_for",
+            lambda b: backends.LLMBackend(
+                name="counting",
+                load=backends._scripted_load,
+                generate=backends._scripted_generate,
+                stream_generate=counting_stream,
+            ),
+        )
+
+        messages = [{"role": "user", "content": "go"}]
+        assert llm.chat_once(bundle, messages, until_tool_call=True) == TOOL_CALL
+        assert "".join(generated) == TOOL_CALL
+
+    def test_stream_chat_uses_prefix_cache(self):
+        class Model:
+            pass
+
+        bundle = (Model(), object())
+        backend = FakePrefixBackend(reply="streamed")
+        llm.attach_prefix_cache(bundle, backend)
+        messages = [
+            {"role": "system", "content": "rules"},
+            {"role": "user", "content": "hi"},
+        ]
+
+        assert list(llm.stream_chat(bundle, messages)) == list("streamed")
+        assert backend.prefilled == len("SYSTEM: rules\n")
+
+    def test_backend_without_streaming_yields_one_piece(self, monkeypatch):
+        plain = backends.LLMBackend(
+            name="plain",
+            load=lambda model_id, **options: (object(), object()),
+            generate=lambda model, tokenizer, prompt, **kwargs: " whole ",
+        )
+        monkeypatch.setattr(llm, "backend_for", lambda bundle: plain)
+        pieces = llm.stream_chat(
+            (object(), object()), [{"role": "user", "content": "x"}]
+        )
+        assert list(pieces) == ["whole"]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import random
+import unicodedata
+
+import pytest
+
+from cowsay_mcp._width_table import UNICODE_VERSION
+from cowsay_mcp.render import iter_render, render
+from cowsay_mcp.width import _table, char_widths, display_width, wrap_cells
+
+ALPHABET = "ab cd漢字かな한글é́🐄🌸👩‍👍🏽❤️🇯🇵ｶ\u200b\n"
+
+MIXED = [
+    "🐄🌸 牛が言う：こんにちは！ 🚀✨ 한국어 텍스트 👩‍👩‍👧 ❤️",
+    "日本語のテキストです" * 10,
+    "👍🏽 é café 🇯🇵 1️⃣ " * 8,
+    "ＦＵＬＬＷＩＤＴＨ and halfwidth ｶﾀｶﾅ",
+]
+rng = random.Random(11)
+MIXED += [
+    "".join(rng.choice(ALPHABET) for _ in range(rng.choice([5, 40, 120])))
+    for _ in range(300)
+]
+MIXED = [text for text in MIXED if text.strip()]
+
+
+@pytest.mark.parametrize(
+    ("text", "cells"),
+    [
+        ("abc", 3),
+        ("漢字", 4),
+        ("é", 1),
+        ("​", 0),
+        ("👩‍👩‍👧", 2),
+        ("👍🏽", 2),
+        ("❤️", 2),
+        ("🇯🇵", 2),
+        ("ｶﾀｶﾅ", 4),
+    ],
+)
+def test_display_width(text, cells):
+    assert display_width(text) == cells
+
+
+@pytest.mark.skipif(
+    unicodedata.unidata_version != UNICODE_VERSION,
+    reason="table generated for a different Unicode version",
+)
+def test_table_matches_unicodedata_sample():
+    rng = random.Random(7)
+    for codepoint in rng.sample(range(0x110000), 20_000) + list(range(0x3000)):
+        char = chr(codepoint)
+        if 0x1F3FB <= codepoint <= 0x1F3FF:
+            continue
+        if unicodedata.category(char) in ("Mn", "Me") or (
+            unicodedata.category(char) == "Cf" and codepoint != 0x00AD
+        ):
+            expected = 0
+        elif 0x1160 <= codepoint <= 0x11FF or 0xD7B0 <= codepoint <= 0xD7FF:
+            expected = 0
+        elif unicodedata.east_asian_width(char) in ("W", "F"):
+            expected = 2
+        else:
+            expected = 1
+        assert char_widths(char) == [expected], hex(codepoint)
+
+
+@pytest.mark.parametrize("width", [1, 2, 3, 10, 49])
+def test_wrap_cells_respects_width_and_keeps_clusters(width):
+    for text in MIXED:
+        for raw_line in text.split("\n"):
+            wrapped = wrap_cells(raw_line, width)
+            assert "".join(line for line, _ in wrapped) == raw_line.strip()
+            for index, (line, cells) in enumerate(wrapped):
+                widths = char_widths(line)
+                assert cells == sum(widths)
+                # only a single cluster wider than the bubble may overflow it
+                assert cells <= width or len(widths) - widths.count(0) == 1
+                # continuation lines never start in the middle of a cluster
+                assert index == 0 or widths[0] != 0
+
+
+def test_cells_render_matches_codepoints_for_ascii():
+    rng = random.Random(3)
+    for _ in range(200):
+        text = "".join(rng.choice("abc \t\n-_|") for _ in range(rng.randint(1, 120)))
+        if text.strip():
+            assert render(text, cells=True) == render(text)
+
+
+def test_cells_render_aligns_borders():
+    for text in MIXED:
+        lines = render(text, "tux", width=20, cells=True).split("\n")
+        rows = [line for line in lines if line.startswith("| ")]
+        assert {display_width(row) for row in rows} == {len(lines[0]) + 2}
+
+
+def test_iter_render_cells_matches_render():
+    for text in MIXED:
+        assert "\n".join(iter_render(text, cells=True, width=17)) == render(
+            text, cells=True, width=17
+        )
+
+
+@pytest.mark.parametrize("window", [1, 2, 5])
+def test_wrap_cells_is_independent_of_the_measuring_window(monkeypatch, window):
+    expected = [wrap_cells(text, width) for text in MIXED for width in (1, 3, 49)]
+    monkeypatch.setattr("cowsay_mcp.width._WINDOW", window)
+    assert [wrap_cells(text, width) for text in MIXED for width in (1, 3, 49)] == (
+        expected
+    )
+
+
+def test_width_table_is_built_on_the_first_non_ascii_line():
+    _table.cache_clear()
+    render("plain ascii " * 20, cells=True)
+    assert display_width("ascii") == 5
+    assert _table.cache_info().currsize == 0
+
+    assert display_width("漢字") == 4
+    assert _table.cache_info().currsize == 1